@@ -9,6 +9,20 @@
 #define TURN_LEFT 0x02
 #define TURN_RIGHT 0x03
 #define STOP 0x04
+#define FRAME_DELIMITER '\n' // Terminates every reply so the host can split the byte stream into frames
+#define SEQUENCE_FLAG 0x80 // Marks a sequence ID byte that precedes a sensor byte in pipelined mode
+#define NO_SEQUENCE -1
+
+// Binary protocol: SYNC, VERSION, sequence number, reading count, readings packed two per byte
+// (first in the high nibble), CRC-8 over everything after SYNC. Replies echo the sequence number and
+// carry one movement code per reading. SYNC is neither a sensor byte nor a sequence ID byte.
+#define PROTOCOL_SYNC 0x5A
+#define PROTOCOL_VERSION 1
+#define PROTOCOL_HEADER_SIZE 4
+#define PROTOCOL_MAX_COUNT 64
+#define PROTOCOL_FRAME_SIZE(count) (PROTOCOL_HEADER_SIZE + ((count) + 1) / 2 + 1)
+#define PROTOCOL_MAX_FRAME_SIZE PROTOCOL_FRAME_SIZE(PROTOCOL_MAX_COUNT)
+#define CRC_POLYNOMIAL 0x07 // CRC-8 (SMBus), initial value 0
 
 // Define a struct to hold the sensor values
 typedef struct {
@@ -18,25 +32,27 @@ typedef struct {
     int collision;
 } SensorValues;
 
-volatile char buffer[BUFFER_SIZE]; // Buffer to store received string
-volatile int index = 0;
-volatile int data_ready = 0; // Flag to indicate data is ready to be processed
-
-volatile SensorValues sensor_values = {0, 0, 0, 0}; // Initialize sensor values
+volatile unsigned char rx_buffer[BUFFER_SIZE]; // Ring buffer filled by the UART receive interrupt
+volatile uint8_t rx_head = 0; // Next write position
+volatile uint8_t rx_tail = 0; // Next read position
 
 // Function to initialize UART
 void uart_init(unsigned int baud) {
     unsigned int ubrr = F_CPU/16/baud-1;
     UBRR0H = (unsigned char)(ubrr>>8);
     UBRR0L = (unsigned char)ubrr;
-    UCSR0B = (1<<RXEN0) | (1<<TXEN0); // Enable receiver and transmitter
+    UCSR0B = (1<<RXEN0) | (1<<TXEN0) | (1<<RXCIE0); // Enable receiver, transmitter and receive interrupt
     UCSR0C = (1<<USBS0) | (3<<UCSZ00); // Set frame format: 8 data bits, 2 stop bits
 }
 
-// Function to receive data
-unsigned char uart_receive(void) {
-    while (!(UCSR0A & (1<<RXC0))); // Wait for data to be received
-    return UDR0; // Get and return received data from buffer
+// UART receive interrupt: queue every byte so several frames can be in flight
+ISR(USART_RX_vect) {
+    unsigned char received_byte = UDR0;
+    uint8_t next_head = (rx_head + 1) % BUFFER_SIZE;
+    if (next_head != rx_tail) { // Drop the byte if the buffer is full
+        rx_buffer[rx_head] = received_byte;
+        rx_head = next_head;
+    }
 }
 
 // Function to transmit data
@@ -52,7 +68,27 @@ void uart_transmit_string(const char* str) {
     }
 }
 
+// Function to transmit a buffer of binary data
+void uart_transmit_bytes(const uint8_t* data, uint8_t length) {
+    while (length--) {
+        uart_transmit(*data++);
+    }
+}
+
+// CRC-8 of a buffer, the same as crc8 in the simulator's protocol.py
+uint8_t crc8(const uint8_t* data, uint8_t length) {
+    uint8_t crc = 0;
+    while (length--) {
+        crc ^= *data++;
+        for (uint8_t bit = 0; bit < 8; bit++) {
+            crc = (crc & 0x80) ? (uint8_t)((crc << 1) ^ CRC_POLYNOMIAL) : (uint8_t)(crc << 1);
+        }
+    }
+    return crc;
+}
+
 // Function to parse the received byte and update the sensor values
+// Only the low nibble is used, so the same layout serves single bytes and packed binary frames.
 void parse_sensor_values_byte(unsigned char byte, SensorValues* values) {
     values->front = (byte >> 3) & 0x01;
     values->left = (byte >> 2) & 0x01;
@@ -60,6 +96,22 @@ void parse_sensor_values_byte(unsigned char byte, SensorValues* values) {
     values->collision = byte & 0x01;
 }
 
+// Returns the sensor nibble at index of the packed readings of a binary frame
+uint8_t frame_nibble(const uint8_t* frame, uint8_t index) {
+    uint8_t packed = frame[PROTOCOL_HEADER_SIZE + index / 2];
+    return (index % 2 == 0) ? (packed >> 4) : (packed & 0x0F);
+}
+
+// Function to check a complete binary frame
+// Returns the number of readings, or 0 if the CRC does not match so the host resends it after its timeout.
+uint8_t check_sensor_frame(const uint8_t* frame) {
+    uint8_t size = PROTOCOL_FRAME_SIZE(frame[3]);
+    if (crc8(frame + 1, size - 2) != frame[size - 1]) {
+        return 0;
+    }
+    return frame[3];
+}
+
 // Function to decide the robot's movement based on sensor values
 uint8_t decide_movement(const SensorValues* values) {
     if (values->collision) {
@@ -79,43 +131,86 @@ uint8_t decide_movement(const SensorValues* values) {
     }
 }
 
+// Answers a complete binary frame with one movement per reading; frames with a wrong CRC are dropped
+void handle_sensor_frame(const uint8_t* frame) {
+    static uint8_t reply[PROTOCOL_MAX_FRAME_SIZE];
+    uint8_t count = check_sensor_frame(frame);
+    SensorValues sensor_values;
+
+    if (count == 0) {
+        return;
+    }
+    reply[0] = PROTOCOL_SYNC;
+    reply[1] = PROTOCOL_VERSION;
+    reply[2] = frame[2];
+    reply[3] = count;
+    for (uint8_t i = 0; i < count; i++) {
+        parse_sensor_values_byte(frame_nibble(frame, i), &sensor_values);
+        uint8_t movement = decide_movement(&sensor_values);
+        uint8_t* packed = &reply[PROTOCOL_HEADER_SIZE + i / 2];
+        *packed = (i % 2 == 0) ? (uint8_t)(movement << 4) : (uint8_t)(*packed | movement);
+    }
+    uint8_t size = PROTOCOL_FRAME_SIZE(count);
+    reply[size - 1] = crc8(reply + 1, size - 2);
+    uart_transmit_bytes(reply, size);
+}
+
 // Timer interrupt service routine
-ISR(TIMER1_COMPA_vect) {
-    static enum {RECEIVE, PROCESS} state = RECEIVE;
-    unsigned char received_byte;
-
-    switch (state) {
-        case RECEIVE:
-            received_byte = uart_receive();
-            buffer[index++] = received_byte;
-            if (index >= 1) { // We only need one byte
-                data_ready = 1; // Set flag to indicate data is ready to be processed
-                index = 0; // Reset index for next byte
-                state = PROCESS; // Move to the next state
+// Processes every frame received since the last tick. A frame is either a single sensor byte,
+// answered with "<movement>\n", a sequence ID byte (SEQUENCE_FLAG | id) followed by a sensor
+// byte, answered with "<id>:<movement>\n" so the host can match replies to in-flight frames,
+// or a binary protocol frame starting with PROTOCOL_SYNC, answered with a binary frame.
+// ISR_NOBLOCK keeps the receive interrupt running while replies are transmitted.
+ISR(TIMER1_COMPA_vect, ISR_NOBLOCK) {
+    static volatile uint8_t busy = 0;
+    static int sequence_id = NO_SEQUENCE;
+    static uint8_t frame[PROTOCOL_MAX_FRAME_SIZE];
+    static uint8_t frame_length = 0; // Bytes of the binary frame received so far, 0 outside a frame
+
+    if (busy) {
+        return; // The previous tick is still transmitting
+    }
+    busy = 1;
+
+    while (rx_tail != rx_head) {
+        unsigned char received_byte = rx_buffer[rx_tail];
+        rx_tail = (rx_tail + 1) % BUFFER_SIZE;
+
+        if (frame_length > 0 || received_byte == PROTOCOL_SYNC) {
+            frame[frame_length++] = received_byte;
+            if (frame_length == PROTOCOL_HEADER_SIZE
+                    && (frame[1] != PROTOCOL_VERSION || frame[3] == 0 || frame[3] > PROTOCOL_MAX_COUNT)) {
+                frame_length = 0; // Unsupported version or count, wait for the next SYNC
+            } else if (frame_length >= PROTOCOL_HEADER_SIZE && frame_length == PROTOCOL_FRAME_SIZE(frame[3])) {
+                handle_sensor_frame(frame);
+                frame_length = 0;
             }
-            break;
-
-        case PROCESS:
-            if (data_ready) {
-                // Step 2: Parse the received byte and update the sensor values
-                parse_sensor_values_byte(buffer[0], &sensor_values);
+            continue;
+        }
 
-                // Step 3: Decide the movement and send the instruction
-                uint8_t movement = decide_movement(&sensor_values);
+        if (received_byte & SEQUENCE_FLAG) {
+            sequence_id = received_byte & ~SEQUENCE_FLAG;
+            continue;
+        }
 
-                // Create a buffer to hold the movement and sensor values
-                char output_buffer[BUFFER_SIZE];
-                snprintf(output_buffer, BUFFER_SIZE, "%d", movement);
+        // Parse the received byte and update the sensor values
+        SensorValues sensor_values;
+        parse_sensor_values_byte(received_byte, &sensor_values);
 
-                // Send the combined movement and sensor values
-                uart_transmit_string(output_buffer);
+        // Decide the movement and send the instruction
+        uint8_t movement = decide_movement(&sensor_values);
 
-                // Reset data_ready flag
-                data_ready = 0;
-                state = RECEIVE; // Move back to the receive state
-            }
-            break;
+        char output_buffer[BUFFER_SIZE];
+        if (sequence_id != NO_SEQUENCE) {
+            snprintf(output_buffer, BUFFER_SIZE, "%d:%d%c", sequence_id, movement, FRAME_DELIMITER);
+            sequence_id = NO_SEQUENCE;
+        } else {
+            snprintf(output_buffer, BUFFER_SIZE, "%d%c", movement, FRAME_DELIMITER);
+        }
+        uart_transmit_string(output_buffer);
     }
+
+    busy = 0;
 }
 
 // Function to initialize Timer1
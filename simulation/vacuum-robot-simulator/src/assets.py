@@ -0,0 +1,138 @@
+import os
+import pygame
+
+# Assets are found relative to this file, so the simulator can be started from any directory
+ASSET_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'img')
+ROBOT_IMAGE = 'cleaning-robot.png'
+TEXT_COLOR = (0, 0, 0)
+LEGEND_ITEMS = [
+    ("Unvisited (U)", (200, 200, 200)),
+    ("Visited (V)", (0, 255, 0)),
+    ("Obstacle Unidentified (O)", (255, 0, 0)),
+    ("Obstacle Identified (I)", (0, 0, 255)),
+    ("Robot (R)", (255, 255, 0))
+]
+LEGEND_ROW_HEIGHT = 30
+
+_fonts = {}
+_images = {}
+_legend = None
+
+def get_font(size):
+    """
+    Returns the default font in a size, loading it only once.
+
+    Args:
+        size (int): The font size.
+
+    Returns:
+        pygame.font.Font: The font.
+    """
+    font = _fonts.get(size)
+    if font is None:
+        font = _fonts[size] = pygame.font.SysFont(None, size)
+    return font
+
+def asset_path(name):
+    """
+    Returns the absolute path of a file in the asset directory.
+
+    Args:
+        name (str): The file name.
+
+    Returns:
+        str: The path.
+    """
+    return os.path.join(ASSET_DIR, name)
+
+def load_image(name, size=None):
+    """
+    Loads an image from the asset directory, scaled and converted for fast blitting, caching the result.
+
+    Args:
+        name (str): The file name.
+        size (tuple): The size (width, height) to scale to, or None to keep the original size.
+
+    Returns:
+        pygame.Surface: The image. Callers that modify it must copy it first.
+    """
+    key = (name, size)
+    image = _images.get(key)
+    if image is None:
+        image = pygame.image.load(asset_path(name))
+        if pygame.display.get_surface() is not None:
+            image = image.convert_alpha()  # Needs a display mode to be set
+        if size is not None:
+            image = pygame.transform.scale(image, size)
+        _images[key] = image
+    return image
+
+def load_robot_image(cell_size, background=None):
+    """
+    Returns the robot image facing north for a cell size.
+
+    Args:
+        cell_size (int): The cell size in pixels.
+        background (tuple): An RGB color the image is limited to with BLEND_RGBA_MIN, so its transparent and
+            white areas take the color of the cell behind it; None keeps the original colors.
+
+    Returns:
+        pygame.Surface: The image. Callers that modify it must copy it first.
+    """
+    key = (ROBOT_IMAGE, (cell_size, cell_size), background)
+    image = _images.get(key)
+    if image is None:
+        image = load_image(ROBOT_IMAGE, (cell_size, cell_size))
+        if background is not None:
+            image = image.copy()
+            image.fill(background, special_flags=pygame.BLEND_RGBA_MIN)
+        _images[key] = image
+    return image
+
+def legend_surface():
+    """
+    Returns the legend explaining the cell colors, rendered once.
+
+    Returns:
+        pygame.Surface: The legend on a transparent background.
+    """
+    global _legend
+    if _legend is None:
+        font = get_font(24)
+        labels = [font.render(text, True, TEXT_COLOR) for text, _ in LEGEND_ITEMS]
+        width = 30 + max(label.get_width() for label in labels)
+        _legend = pygame.Surface((width, LEGEND_ROW_HEIGHT * len(LEGEND_ITEMS)), pygame.SRCALPHA)
+        for row, ((_, color), label) in enumerate(zip(LEGEND_ITEMS, labels)):
+            pygame.draw.rect(_legend, color, (0, row * LEGEND_ROW_HEIGHT, 20, 20))
+            _legend.blit(label, (30, row * LEGEND_ROW_HEIGHT))
+    return _legend
+
+class CachedText:
+    def __init__(self, size, color=TEXT_COLOR):
+        """
+        Text that is only rendered again when it changes, e.g. a timer that changes once a second.
+
+        Args:
+            size (int): The font size.
+            color (tuple): The RGB text color.
+        """
+        self.size = size
+        self.color = color
+        self.text = None
+        self.surface = None
+
+    def render(self, text):
+        """
+        Returns the rendered text.
+
+        Args:
+            text (str): The text.
+
+        Returns:
+            tuple: (surface, changed), where changed is False if the text is the same as last time.
+        """
+        if text == self.text:
+            return self.surface, False
+        self.text = text
+        self.surface = get_font(self.size).render(text, True, self.color)
+        return self.surface, True
@@ -0,0 +1,368 @@
+import argparse
+import fnmatch
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import numpy as np
+from grid import Grid, CellState
+from heatmap import VisitCounter
+from map_generator import generate_floor_plan
+from range_sensor import RangeSensor
+from robot import Robot
+from sensor_cache import SensorCache
+from serial_utils import format_sensor_data_as_bits
+from simulation import run_episode, make_random_turn_policy
+
+DEFAULT_THRESHOLD = 0.2  # Allowed slowdown against the baseline before a benchmark counts as a regression
+
+# Benchmark name -> setup function, filled by the benchmark decorator
+BENCHMARKS = {}
+
+def benchmark(name):
+    """
+    Registers a benchmark.
+
+    The decorated function does the setup and returns (run, operations): a callable that is timed and the number
+    of operations one call of it performs, so results are reported per operation.
+
+    Args:
+        name (str): The benchmark name, grouped with dots, e.g. 'robot.simulate_sensors'.
+
+    Returns:
+        callable: The decorator.
+    """
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+def _obstacle_grid(size):
+    grid = Grid(size, size)
+    for i in range(2, size - 2, 4):
+        grid.set(i, size // 2, CellState.OBSTACLE)
+    return grid
+
+@benchmark('robot.simulate_sensors')
+def bench_simulate_sensors():
+    robot = Robot((5, 5), 'N', _obstacle_grid(20))
+
+    def run():
+        for _ in range(1000):
+            robot.simulate_sensors()
+    return run, 1000
+
+@benchmark('robot.simulate_sensors_cached')
+def bench_simulate_sensors_cached():
+    grid = _obstacle_grid(20)
+    robot = Robot((5, 5), 'N', grid, sensor_cache=SensorCache(grid))
+
+    def run():
+        for _ in range(1000):
+            robot.simulate_sensors()
+    return run, 1000
+
+@benchmark('robot.move_forward')
+def bench_move_forward():
+    robot = Robot((0, 0), 'E', Grid(1000, 1))
+
+    def run():
+        robot.position = (0, 0)
+        for _ in range(999):
+            robot.move_forward()
+    return run, 999
+
+@benchmark('sensor.range_measure')
+def bench_range_measure():
+    grid = _obstacle_grid(20)
+    sensor = RangeSensor()
+
+    def run():
+        for _ in range(1000):
+            sensor.measure(grid, 5, 5, 'N')
+    return run, 1000
+
+@benchmark('sensor.range_cast_1000')
+def bench_range_cast():
+    grid = _obstacle_grid(200)
+    sensor = RangeSensor()
+    rng = np.random.default_rng(0)
+    xs, ys = rng.integers(0, 200, 1000), rng.integers(0, 200, 1000)
+    headings = rng.integers(0, 4, 1000)
+
+    def run():
+        sensor.cast(grid, xs, ys, headings)
+    return run, 1
+
+@benchmark('mapgen.floor_plan_1000')
+def bench_floor_plan():
+    def run():
+        generate_floor_plan(1000, 1000, seed=0)
+    return run, 1
+
+@benchmark('heatmap.visit')
+def bench_heatmap_visit():
+    heatmap = VisitCounter(1000, 1000)
+
+    def run():
+        for x in range(1000):
+            heatmap.visit(x, 500)
+    return run, 1000
+
+@benchmark('serial.format_sensor_data_as_bits')
+def bench_format_sensor_data():
+    sensors = {'front': True, 'left': False, 'right': True}
+
+    def run():
+        for _ in range(1000):
+            format_sensor_data_as_bits(sensors)
+    return run, 1000
+
+def _bench_episode(size):
+    def setup():
+        template = _obstacle_grid(size)
+
+        def run():
+            run_episode(template.copy(), (0, 0), 'N', make_random_turn_policy(seed=0), max_steps=2000,
+                        target_coverage=1.1)
+        return run, 2000
+    return setup
+
+for _size in (10, 50, 200):
+    benchmark(f"episode.steps_{_size}x{_size}")(_bench_episode(_size))
+
+def _pygame():
+    # Rendering is measured offscreen; set the driver before pygame opens a display
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    import pygame
+    pygame.init()
+    return pygame
+
+@benchmark('render.grid_renderer_full')
+def bench_grid_renderer_full():
+    pygame = _pygame()
+    from renderer import GridRenderer
+    screen = pygame.display.set_mode((500, 500))
+    grid = _obstacle_grid(10)
+    renderer = GridRenderer(screen, grid, pygame.Surface((50, 50)), 50)
+
+    def run():
+        renderer.invalidate()
+        renderer.draw('N')
+    return run, 1
+
+@benchmark('render.grid_renderer_step')
+def bench_grid_renderer_step():
+    pygame = _pygame()
+    from renderer import GridRenderer
+    screen = pygame.display.set_mode((500, 500))
+    grid = _obstacle_grid(10)
+    renderer = GridRenderer(screen, grid, pygame.Surface((50, 50)), 50)
+    renderer.draw('N')
+    state = [0]
+
+    def run():
+        # One robot move: two changed cells
+        x = state[0] % 10
+        grid.set(x, 0, CellState.VISITED)
+        grid.set((x + 1) % 10, 0, CellState.ROBOT)
+        renderer.draw('N')
+        state[0] += 1
+    return run, 1
+
+@benchmark('render.viewport_2000_fit')
+def bench_viewport_fit():
+    pygame = _pygame()
+    from viewport import Viewport, ViewportRenderer
+    screen = pygame.display.set_mode((500, 500))
+    grid = _obstacle_grid(2000)
+    viewport = Viewport(pygame.Rect(0, 0, 500, 500), grid.width, grid.height)
+    viewport.fit()
+    renderer = ViewportRenderer(screen, grid, pygame.Surface((50, 50)), viewport)
+
+    def run():
+        renderer.invalidate()
+        renderer.draw('N')
+    return run, 1
+
+@benchmark('render.viewport_2000_step')
+def bench_viewport_step():
+    pygame = _pygame()
+    from viewport import Viewport, ViewportRenderer
+    screen = pygame.display.set_mode((500, 500))
+    grid = _obstacle_grid(2000)
+    viewport = Viewport(pygame.Rect(0, 0, 500, 500), grid.width, grid.height)
+    viewport.fit()
+    renderer = ViewportRenderer(screen, grid, pygame.Surface((50, 50)), viewport)
+    renderer.draw('N')
+    state = [0]
+
+    def run():
+        # One robot move: two changed cells, redrawn without the rest of the view
+        x = state[0] % 2000
+        grid.set(x, 0, CellState.VISITED)
+        grid.set((x + 1) % 2000, 0, CellState.ROBOT)
+        renderer.draw('N')
+        state[0] += 1
+    return run, 1
+
+@benchmark('render.viewport_2000_heatmap')
+def bench_viewport_heatmap():
+    pygame = _pygame()
+    from viewport import Viewport, ViewportRenderer
+    screen = pygame.display.set_mode((500, 500))
+    grid = _obstacle_grid(2000)
+    heatmap = VisitCounter(grid.width, grid.height)
+    rng = np.random.default_rng(0)
+    heatmap.visit_many(rng.integers(0, 2000, 1000000), rng.integers(0, 2000, 1000000))
+    viewport = Viewport(pygame.Rect(0, 0, 500, 500), grid.width, grid.height)
+    viewport.fit()
+    renderer = ViewportRenderer(screen, grid, pygame.Surface((50, 50)), viewport, heatmap=heatmap)
+    renderer.toggle_heatmap()
+
+    def run():
+        renderer.invalidate()
+        renderer.draw('N')
+    return run, 1
+
+@benchmark('serial.loopback_round_trip')
+def bench_loopback_round_trip():
+    from serial_utils import SerialCommunication
+    serial_comm = SerialCommunication(port='loop://', timeout=0.1)
+
+    def run():
+        for _ in range(100):
+            serial_comm.send_data(b'1\n')
+            serial_comm.receive_frame(timeout=1.0)
+    return run, 100
+
+@benchmark('serial.emulator_round_trip')
+def bench_emulator_round_trip():
+    from firmware_emulator import FirmwareEmulator
+    emulator = FirmwareEmulator()
+    data = format_sensor_data_as_bits({'front': True})
+
+    def run():
+        for _ in range(1000):
+            emulator.send_data(data)
+            emulator.receive_frame(timeout=0)
+    return run, 1000
+
+@benchmark('serial.emulator_binary_batch')
+def bench_emulator_binary_batch():
+    from firmware_emulator import FirmwareEmulator
+    from protocol import FrameDecoder, MAX_COUNT
+    from swarm import make_serial_swarm_policy
+    policy = make_serial_swarm_policy(FirmwareEmulator(framer=FrameDecoder()))
+    sensor_bits = np.arange(4 * MAX_COUNT, dtype=np.uint8) % 8 << 1
+
+    def run():
+        policy(sensor_bits)
+    return run, len(sensor_bits)
+
+def measure(setup, repeat=5, min_time=0.1):
+    """
+    Times a benchmark.
+
+    Each repetition calls run as often as needed to take at least min_time, which keeps timer resolution
+    and call overhead out of the result.
+
+    Args:
+        setup (callable): The registered setup function.
+        repeat (int): The number of repetitions.
+        min_time (float): The minimum duration of a repetition in seconds.
+
+    Returns:
+        dict: 'min', 'median' and 'max' seconds per operation over the repetitions.
+    """
+    run, operations = setup()
+    run()  # Warm up caches and lazy initialization
+    start = time.perf_counter()
+    run()
+    calls = max(1, int(min_time / max(time.perf_counter() - start, 1e-9)))
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(calls):
+            run()
+        samples.append((time.perf_counter() - start) / (calls * operations))
+    return {'min': min(samples), 'median': statistics.median(samples), 'max': max(samples)}
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """
+    Compares results with a baseline.
+
+    Args:
+        results (dict): Benchmark name -> measurement, see measure.
+        baseline (dict): A saved results file.
+        threshold (float): The allowed relative slowdown of the median.
+
+    Returns:
+        list of tuple: (name, baseline median, current median, ratio) for every regression.
+    """
+    regressions = []
+    for name, result in results.items():
+        reference = baseline['results'].get(name)
+        if reference is None:
+            continue
+        ratio = result['median'] / reference['median']
+        if ratio > 1 + threshold:
+            regressions.append((name, reference['median'], result['median'], ratio))
+    return regressions
+
+def _format_time(seconds):
+    for unit, scale in (('s', 1), ('ms', 1e-3), ('us', 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f} {unit}"
+    return f"{seconds / 1e-9:.0f} ns"
+
+def main(argv=None, prog=None):
+    """
+    Runs the benchmarks from the command line.
+
+    Args:
+        argv (list of str): The command line arguments; None uses sys.argv.
+        prog (str): The program name shown in the usage, e.g. 'cli.py bench'.
+    """
+    parser = argparse.ArgumentParser(prog=prog,
+                                     description="Benchmarks of the simulator core, the renderers and the serial paths.")
+    parser.add_argument('patterns', nargs='*', default=['*'], help="Glob patterns of the benchmarks to run")
+    parser.add_argument('--list', action='store_true', help="List the benchmarks and exit")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--min-time', type=float, default=0.1, help="Minimum seconds per repetition")
+    parser.add_argument('--save', metavar='PATH', help="Write the results as a baseline")
+    parser.add_argument('--compare', metavar='PATH', help="Compare against a baseline; exits with 1 on regressions")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD, help="Allowed relative slowdown")
+    args = parser.parse_args(argv)
+
+    names = [name for name in BENCHMARKS if any(fnmatch.fnmatch(name, pattern) for pattern in args.patterns)]
+    if args.list:
+        print("\n".join(names))
+        sys.exit(0)
+
+    results = {}
+    for name in names:
+        results[name] = measure(BENCHMARKS[name], repeat=args.repeat, min_time=args.min_time)
+        print(f"{name:40s} {_format_time(results[name]['median']):>12s} per op "
+              f"(min {_format_time(results[name]['min'])}, max {_format_time(results[name]['max'])})")
+
+    if args.save:
+        with open(args.save, 'w') as file:
+            json.dump({'python': platform.python_version(), 'machine': platform.machine(),
+                       'created': time.strftime('%Y-%m-%dT%H:%M:%S'), 'results': results}, file, indent=2)
+        print(f"Baseline written to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        regressions = compare(results, baseline, threshold=args.threshold)
+        for name, reference, current, ratio in regressions:
+            print(f"REGRESSION {name}: {_format_time(reference)} -> {_format_time(current)} ({ratio:.2f}x)")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions beyond {args.threshold:.0%} against {args.compare}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,365 @@
+import numpy as np
+from grid import Grid, CellState, OBSTACLE_TABLE, VISITED_TABLE, _OBSTACLE_LOOKUP
+
+DEFAULT_TILE_SIZE = 64
+
+class ChunkedGrid:
+    def __init__(self, width, height, fill=CellState.UNVISITED, tile_size=DEFAULT_TILE_SIZE):
+        """
+        Initializes a grid stored as square tiles that are only allocated when they stop being uniform.
+
+        A tile is either a single int shared by all of its cells or a uint8 array of shape (tile_size, tile_size).
+        Tiles that were never written hold the fill state and take no memory, so a map of any size costs memory
+        in proportion to the area that differs from its surroundings.
+
+        Args:
+            width (int): The number of columns.
+            height (int): The number of rows.
+            fill (CellState): The initial state of every cell.
+            tile_size (int): The width and height of a tile; must be a power of two.
+        """
+        if tile_size <= 0 or tile_size & (tile_size - 1):
+            raise ValueError(f"tile_size must be a power of two, got {tile_size}")
+        self.width = width
+        self.height = height
+        self.fill_state = int(fill)
+        self.tile_size = tile_size
+        self._shift = tile_size.bit_length() - 1
+        self._mask = tile_size - 1
+        self._tile_columns = (width + tile_size - 1) >> self._shift
+        self.tiles = {}  # (tile column, tile row) -> int or numpy.ndarray; missing tiles hold fill_state
+        self._listeners = []
+        self._counts = [0] * len(CellState)
+        self._counts[self.fill_state] = width * height
+
+    @classmethod
+    def from_grid(cls, grid, tile_size=DEFAULT_TILE_SIZE):
+        """
+        Converts a dense grid, storing uniform tiles as single values.
+
+        Args:
+            grid (Grid): The grid to convert.
+            tile_size (int): The width and height of a tile.
+
+        Returns:
+            ChunkedGrid: The new grid.
+        """
+        chunked = cls(grid.width, grid.height, tile_size=tile_size)
+        for tile_y in range(0, grid.height, tile_size):
+            for tile_x in range(0, grid.width, tile_size):
+                block = grid.cells[tile_y:tile_y + tile_size, tile_x:tile_x + tile_size]
+                tile = np.full((tile_size, tile_size), chunked.fill_state, dtype=np.uint8)
+                tile[:block.shape[0], :block.shape[1]] = block
+                chunked.tiles[(tile_x >> chunked._shift, tile_y >> chunked._shift)] = tile
+        chunked._counts = [grid.count(state) for state in CellState]
+        chunked.compact()
+        return chunked
+
+    def to_grid(self):
+        """
+        Converts the grid to a dense Grid.
+
+        Returns:
+            Grid: The dense copy.
+        """
+        return Grid(self.width, self.height, cells=self.region(0, 0, self.width, self.height))
+
+    def add_listener(self, listener):
+        """
+        Registers a callback that is told about changed cells, see Grid.add_listener.
+
+        Args:
+            listener (callable): The callback.
+        """
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener):
+        """
+        Unregisters a callback added with add_listener.
+
+        Args:
+            listener (callable): The callback.
+        """
+        self._listeners.remove(listener)
+
+    def _notify(self, xs, ys):
+        for listener in self._listeners:
+            listener(xs, ys)
+
+    def in_bounds(self, x, y):
+        """
+        Checks whether a position lies inside the grid.
+
+        Args:
+            x (int): The column.
+            y (int): The row.
+
+        Returns:
+            bool: True if the position is inside the grid.
+        """
+        return 0 <= x < self.width and 0 <= y < self.height
+
+    def _value(self, x, y):
+        tile = self.tiles.get((x >> self._shift, y >> self._shift), self.fill_state)
+        if type(tile) is int:
+            return tile
+        return int(tile[y & self._mask, x & self._mask])
+
+    def get(self, x, y):
+        """
+        Gets the state of a cell.
+
+        Args:
+            x (int): The column.
+            y (int): The row.
+
+        Returns:
+            CellState: The state of the cell.
+        """
+        if not self.in_bounds(x, y):
+            raise IndexError(f"Cell {(x, y)} is outside the {self.width}x{self.height} grid")
+        return CellState(self._value(x, y))
+
+    def _writable_tile(self, key):
+        """
+        Returns the array of a tile, allocating it if the tile is uniform.
+
+        Args:
+            key (tuple): The (tile column, tile row).
+
+        Returns:
+            numpy.ndarray: The tile's cells.
+        """
+        tile = self.tiles.get(key, self.fill_state)
+        if type(tile) is int:
+            tile = np.full((self.tile_size, self.tile_size), tile, dtype=np.uint8)
+            self.tiles[key] = tile
+        return tile
+
+    def set(self, x, y, state):
+        """
+        Sets the state of a cell and keeps the per-state counts up to date.
+
+        Args:
+            x (int): The column.
+            y (int): The row.
+            state (CellState): The new state of the cell.
+        """
+        if not self.in_bounds(x, y):
+            raise IndexError(f"Cell {(x, y)} is outside the {self.width}x{self.height} grid")
+        state = int(state)
+        old_state = self._value(x, y)
+        if old_state == state:
+            return
+        self._counts[old_state] -= 1
+        self._counts[state] += 1
+        self._writable_tile((x >> self._shift, y >> self._shift))[y & self._mask, x & self._mask] = state
+        if self._listeners:
+            self._notify(x, y)
+
+    def set_many(self, xs, ys, state):
+        """
+        Sets many cells to the same state, one vectorized write per touched tile.
+
+        Args:
+            xs (numpy.ndarray): The columns of the cells.
+            ys (numpy.ndarray): The rows of the cells. Repeated positions are allowed.
+            state (CellState): The new state of the cells.
+        """
+        state = int(state)
+        flat = np.unique(np.asarray(ys, dtype=np.int64) * self.width + np.asarray(xs, dtype=np.int64))
+        ys, xs = np.divmod(flat, self.width)
+        old_states = self.values_at(xs, ys)
+        changed = old_states != state
+        xs, ys = xs[changed], ys[changed]
+        for old_state, count in enumerate(np.bincount(old_states[changed], minlength=len(CellState)).tolist()):
+            self._counts[old_state] -= count
+        self._counts[state] += len(xs)
+        keys = self._tile_keys(xs, ys)
+        for key in np.unique(keys).tolist():
+            in_tile = keys == key
+            tile = self._writable_tile(divmod(key, self._tile_columns)[::-1])
+            tile[ys[in_tile] & self._mask, xs[in_tile] & self._mask] = state
+        if self._listeners and len(xs):
+            self._notify(xs, ys)
+
+    def values_at(self, xs, ys):
+        """
+        Reads the cell codes of many cells.
+
+        Args:
+            xs (numpy.ndarray): The columns.
+            ys (numpy.ndarray): The rows.
+
+        Returns:
+            numpy.ndarray: The uint8 cell code per position.
+        """
+        xs = np.asarray(xs, dtype=np.int64)
+        ys = np.asarray(ys, dtype=np.int64)
+        values = np.full(xs.shape, self.fill_state, dtype=np.uint8)
+        keys = self._tile_keys(xs, ys)
+        for key in np.unique(keys).tolist():
+            tile = self.tiles.get(divmod(key, self._tile_columns)[::-1])
+            if tile is None:
+                continue
+            in_tile = keys == key
+            if type(tile) is int:
+                values[in_tile] = tile
+            else:
+                values[in_tile] = tile[ys[in_tile] & self._mask, xs[in_tile] & self._mask]
+        return values
+
+    def _tile_keys(self, xs, ys):
+        """
+        Numbers the tiles of many cells, for grouping them by tile.
+
+        Args:
+            xs (numpy.ndarray): The int64 columns.
+            ys (numpy.ndarray): The int64 rows.
+
+        Returns:
+            numpy.ndarray: tile row * tile columns + tile column per cell.
+        """
+        return (ys >> self._shift) * self._tile_columns + (xs >> self._shift)
+
+    def region(self, x0, y0, x1, y1):
+        """
+        Copies a rectangle of cells into a dense array, e.g. the part of a huge map that is on screen.
+
+        Args:
+            x0 (int): The first column.
+            y0 (int): The first row.
+            x1 (int): The column after the last one.
+            y1 (int): The row after the last one.
+
+        Returns:
+            numpy.ndarray: The uint8 cell codes of shape (y1 - y0, x1 - x0).
+        """
+        out = np.full((y1 - y0, x1 - x0), self.fill_state, dtype=np.uint8)
+        size = self.tile_size
+        for tile_y in range(y0 >> self._shift, ((y1 - 1) >> self._shift) + 1):
+            for tile_x in range(x0 >> self._shift, ((x1 - 1) >> self._shift) + 1):
+                tile = self.tiles.get((tile_x, tile_y))
+                if tile is None:
+                    continue
+                # Intersection of the tile with the rectangle, in grid coordinates
+                left, top = max(tile_x * size, x0), max(tile_y * size, y0)
+                right, bottom = min((tile_x + 1) * size, x1), min((tile_y + 1) * size, y1)
+                if type(tile) is int:
+                    out[top - y0:bottom - y0, left - x0:right - x0] = tile
+                else:
+                    out[top - y0:bottom - y0, left - x0:right - x0] = \
+                        tile[top - tile_y * size:bottom - tile_y * size, left - tile_x * size:right - tile_x * size]
+        return out
+
+    def compact(self):
+        """
+        Turns allocated tiles whose cells all share one state back into single values.
+
+        Returns:
+            int: The number of tiles released.
+        """
+        released = 0
+        for key, tile in list(self.tiles.items()):
+            if type(tile) is int:
+                continue
+            first = int(tile[0, 0])
+            if (tile == first).all():
+                if first == self.fill_state:
+                    del self.tiles[key]
+                else:
+                    self.tiles[key] = first
+                released += 1
+        return released
+
+    def allocated_tiles(self):
+        """
+        Returns the number of tiles that hold a cell array.
+
+        Returns:
+            int: The number of allocated tiles.
+        """
+        return sum(1 for tile in self.tiles.values() if type(tile) is not int)
+
+    def is_obstacle(self, x, y):
+        """
+        Checks whether a cell holds an obstacle ('O' or 'I').
+
+        Args:
+            x (int): The column.
+            y (int): The row.
+
+        Returns:
+            bool: True if the cell is an obstacle.
+        """
+        return _OBSTACLE_LOOKUP[self._value(x, y)]
+
+    def obstacle_mask_at(self, xs, ys):
+        """
+        Checks many cells for obstacles at once.
+
+        Args:
+            xs (numpy.ndarray): The columns.
+            ys (numpy.ndarray): The rows.
+
+        Returns:
+            numpy.ndarray: A bool array that is True where the cell is an obstacle.
+        """
+        return OBSTACLE_TABLE[self.values_at(xs, ys)]
+
+    def visited_mask_in(self, x0, y0, x1, y1):
+        """
+        Returns a boolean mask of the visited cells in a rectangle, including the robot's cell.
+
+        Args:
+            x0 (int): The first column.
+            y0 (int): The first row.
+            x1 (int): The column after the last one.
+            y1 (int): The row after the last one.
+
+        Returns:
+            numpy.ndarray: A bool array of shape (y1 - y0, x1 - x0).
+        """
+        return VISITED_TABLE[self.region(x0, y0, x1, y1)]
+
+    def count(self, state):
+        """
+        Returns the number of cells in a state.
+
+        Args:
+            state (CellState): The state to count.
+
+        Returns:
+            int: The number of cells.
+        """
+        return self._counts[state]
+
+    def counts(self):
+        """
+        Returns the number of cells per state.
+
+        Returns:
+            dict: A mapping from CellState to the number of cells.
+        """
+        return {state: self._counts[state] for state in CellState}
+
+    def free_cell_count(self):
+        """
+        Returns the number of cells that are not obstacles.
+
+        Returns:
+            int: The number of free cells.
+        """
+        return self.width * self.height - self._counts[CellState.OBSTACLE] - self._counts[CellState.IDENTIFIED]
+
+    def coverage_ratio(self):
+        """
+        Computes the fraction of free cells that have been visited.
+
+        Returns:
+            float: The coverage between 0.0 and 1.0.
+        """
+        free_cells = self.free_cell_count()
+        if free_cells == 0:
+            return 0.0
+        return (self._counts[CellState.VISITED] + self._counts[CellState.ROBOT]) / free_cells
@@ -0,0 +1,50 @@
+import argparse
+import importlib
+import os
+import sys
+
+# Subcommand -> (module, description). A module is imported only when its command runs, so the headless
+# commands never load pygame or pygame_gui, and pyserial is only loaded once a serial port is opened.
+COMMANDS = {
+    'gui': ('main', "Interactive simulator driving the controller board (or --port emulator)"),
+    'headless': ('simulation', "One cleaning run without a display"),
+    'replay': ('replay', "Play back a trajectory file recorded with --record"),
+    'bench': ('benchmark', "Benchmarks with baselines and regression checks"),
+    'sweep': ('sweep', "Monte Carlo sweep of controller policies on many maps"),
+    'boards': ('connection_manager', "Hardware-in-the-loop test of several controller boards"),
+    'maps': ('map_generator', "Generate seeded floor plans, cached on disk"),
+}
+
+def run(command, argv=None):
+    """
+    Runs a subcommand with its own arguments.
+
+    Args:
+        command (str): A key of COMMANDS.
+        argv (list of str): The arguments of the subcommand.
+
+    Returns:
+        The return value of the subcommand's main function.
+    """
+    module_name = COMMANDS[command][0]
+    module = importlib.import_module(module_name)
+    return module.main(argv, prog=f"{os.path.basename(sys.argv[0])} {command}")
+
+def main(argv=None):
+    """
+    Dispatches the command line to a subcommand.
+
+    Args:
+        argv (list of str): The command line arguments; None uses sys.argv.
+    """
+    parser = argparse.ArgumentParser(
+        description="Vacuum robot simulator. Run '<command> --help' for the options of a command.",
+        epilog="\n".join(f"  {name:10s} {description}" for name, (_, description) in COMMANDS.items()),
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('command', choices=COMMANDS, metavar='command', help="One of the commands below")
+    parser.add_argument('args', nargs=argparse.REMAINDER, help="Arguments of the command")
+    args = parser.parse_args(argv)
+    return run(args.command, args.args)
+
+if __name__ == "__main__":
+    sys.exit(main())
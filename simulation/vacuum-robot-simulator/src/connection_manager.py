@@ -0,0 +1,446 @@
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+import numpy as np
+from robot import Robot, HEADING_INDEX, DIRECTION_OFFSETS
+from robot_controller import RobotController
+from grid import Grid, CellState
+from sensor_cache import SensorCache
+from instrumentation import LatencyHistogram
+from serial_utils import open_serial_connection, PipelinedExchange, DEFAULT_BAUDRATE, EMULATOR_PORT
+
+SETTLE_TIME = 2.0  # Seconds to wait after opening a port; the board resets when the port is opened
+STALL_TIMEOUT = 5.0  # A link that gets no reply for this long while frames are in flight is reconnected
+HEALTHY_REPLY_AGE = 2.0  # A link is healthy if its last reply is at most this many seconds old
+
+# Errors that mean a link is gone; the link is closed and opened again. serial.SerialException is an
+# OSError, so pyserial is not needed to catch it.
+LINK_ERRORS = (OSError, ConnectionError)
+
+class Backoff:
+    def __init__(self, initial=0.5, maximum=10.0, factor=2.0, jitter=0.1):
+        """
+        Exponential backoff between reconnection attempts.
+
+        Args:
+            initial (float): The first delay in seconds.
+            maximum (float): The longest delay in seconds.
+            factor (float): The growth of the delay per failed attempt.
+            jitter (float): The random fraction added to each delay, so a rack of boards that fails together
+                does not retry in lockstep.
+        """
+        self.initial = initial
+        self.maximum = maximum
+        self.factor = factor
+        self.jitter = jitter
+        self.delay = initial
+
+    def reset(self):
+        """Starts over with the initial delay, e.g. after a successful connection."""
+        self.delay = self.initial
+
+    def next_delay(self):
+        """
+        Returns the delay before the next attempt and increases it.
+
+        Returns:
+            float: The delay in seconds.
+        """
+        delay = self.delay * (1 + random.uniform(0, self.jitter))
+        self.delay = min(self.delay * self.factor, self.maximum)
+        return delay
+
+class LinkHealth:
+    def __init__(self, port):
+        """
+        Connection and traffic statistics of one serial link.
+
+        Args:
+            port (str): The serial port of the link.
+        """
+        self.port = port
+        self.state = 'idle'  # 'connecting', 'connected', 'backoff' or 'closed'
+        self.connect_attempts = 0
+        self.connects = 0
+        self.disconnects = 0
+        self.frames_sent = 0
+        self.replies = 0
+        self.timeouts = 0
+        self.unmatched = 0
+        self.last_error = None
+        self.last_reply = None  # time.perf_counter() of the last reply
+        self.latency = LatencyHistogram()
+
+    def healthy(self):
+        """
+        Checks whether the link is connected and answering.
+
+        Returns:
+            bool: True if the last reply arrived within HEALTHY_REPLY_AGE seconds.
+        """
+        return (self.state == 'connected' and self.last_reply is not None
+                and time.perf_counter() - self.last_reply <= HEALTHY_REPLY_AGE)
+
+    def summary(self):
+        """
+        Summarizes the statistics.
+
+        Returns:
+            dict: The counters, 'state', 'healthy', 'last_error' and the reply latency percentiles in seconds.
+        """
+        return {
+            'port': self.port,
+            'state': self.state,
+            'healthy': self.healthy(),
+            'connect_attempts': self.connect_attempts,
+            'connects': self.connects,
+            'disconnects': self.disconnects,
+            'frames_sent': self.frames_sent,
+            'replies': self.replies,
+            'timeouts': self.timeouts,
+            'unmatched': self.unmatched,
+            'last_error': self.last_error,
+            'latency': self.latency.summary(),
+        }
+
+async def open_connection(port, baudrate=DEFAULT_BAUDRATE, binary=False, settle_time=SETTLE_TIME, backoff=None,
+                          health=None, max_attempts=None):
+    """
+    Opens a serial connection without blocking the event loop, retrying with backoff until it succeeds.
+
+    Opening a port blocks, so it runs in a worker thread; several links therefore connect concurrently.
+
+    Args:
+        port (str): The serial port, or EMULATOR_PORT.
+        baudrate (int): The baud rate.
+        binary (bool): Whether replies are binary protocol frames.
+        settle_time (float): Seconds to wait after opening a real port; the emulator needs none.
+        backoff (Backoff): The delays between attempts; a new Backoff by default.
+        health (LinkHealth): Updated with the attempts and their outcome if given.
+        max_attempts (int): Give up after this many attempts, or None to retry forever.
+
+    Returns:
+        SerialCommunication: The connection, or a FirmwareEmulator.
+
+    Raises:
+        serial.SerialException: If the last of max_attempts attempts failed.
+    """
+    backoff = backoff or Backoff()
+    loop = asyncio.get_running_loop()
+    attempt = 0
+    while True:
+        attempt += 1
+        if health is not None:
+            health.state = 'connecting'
+            health.connect_attempts += 1
+        try:
+            serial_comm = await loop.run_in_executor(None, open_serial_connection, port, baudrate, binary)
+        except LINK_ERRORS as e:
+            if health is not None:
+                health.last_error = str(e)
+            if max_attempts is not None and attempt >= max_attempts:
+                raise
+            delay = backoff.next_delay()
+            print(f"Opening {port} failed: {e}. Retrying in {delay:.1f} s.")
+            if health is not None:
+                health.state = 'backoff'
+            await asyncio.sleep(delay)
+            continue
+        if port != EMULATOR_PORT:
+            await asyncio.sleep(settle_time)
+        backoff.reset()
+        if health is not None:
+            health.state = 'connected'
+            health.connects += 1
+        return serial_comm
+
+class RobotLink:
+    def __init__(self, port, robot, baudrate=DEFAULT_BAUDRATE, binary=False, window=1, reply_timeout=1.0,
+                 tick_interval=0.005, settle_time=SETTLE_TIME):
+        """
+        Drives one robot on the shared map through one controller board.
+
+        Args:
+            port (str): The serial port of the board, or EMULATOR_PORT.
+            robot (Robot): The robot the board controls.
+            baudrate (int): The baud rate.
+            binary (bool): Whether to use the binary frame protocol.
+            window (int): Sensor frames in flight; more than 1 uses sequence IDs.
+            reply_timeout (float): Seconds after which a sensor frame is sent again.
+            tick_interval (float): Seconds between polls of the link.
+            settle_time (float): Seconds to wait after opening the port.
+        """
+        self.port = port
+        self.robot = robot
+        self.controller = RobotController(robot)
+        self.baudrate = baudrate
+        self.binary = binary
+        self.window = window
+        self.reply_timeout = reply_timeout
+        self.tick_interval = tick_interval
+        self.settle_time = settle_time
+        self.health = LinkHealth(port)
+        self.backoff = Backoff()
+        self.steps = 0
+        self.blocked = 0  # Forward moves refused because another robot was in the way
+        self._running = False
+
+    def stop(self):
+        """
+        Makes run() return after its current tick.
+
+        A link that is still connecting keeps retrying; cancel its task to end it right away.
+        """
+        self._running = False
+
+    def _cell_ahead(self):
+        dx, dy = DIRECTION_OFFSETS[HEADING_INDEX[self.robot.direction]]
+        return self.robot.position[0] + dx, self.robot.position[1] + dy
+
+    def _robot_ahead(self):
+        x, y = self._cell_ahead()
+        grid = self.robot.grid
+        return grid.in_bounds(x, y) and grid.get(x, y) == CellState.ROBOT
+
+    def _sensors(self):
+        sensors = self.controller.get_sensor_data()
+        if self._robot_ahead():
+            sensors['front'] = True  # Other robots block the way like obstacles
+        return sensors
+
+    def _apply(self, command):
+        """
+        Applies a command from the board to the robot and the shared grid.
+
+        Args:
+            command (str): The movement code ('1' forward, '2' left, '3' right, '4' stop).
+        """
+        robot = self.robot
+        if command == '1':
+            if self._robot_ahead():
+                self.blocked += 1
+            else:
+                old_position = robot.position
+                robot.move_forward()
+                if robot.position != old_position:
+                    robot.grid.set(old_position[0], old_position[1], CellState.VISITED)
+                    robot.grid.set(robot.position[0], robot.position[1], CellState.ROBOT)
+        elif command == '2':
+            robot.turn_left()
+        elif command == '3':
+            robot.turn_right()
+        self.steps += 1
+
+    async def _drive(self, serial_comm):
+        """
+        Runs the sense -> decide -> act exchange until the link fails or stop() is called.
+
+        Args:
+            serial_comm (SerialCommunication): The open connection.
+
+        Raises:
+            ConnectionError: If the connection died or stopped answering.
+        """
+        health = self.health
+        exchange = PipelinedExchange(serial_comm, window=self.window, timeout=self.reply_timeout,
+                                     sequenced=self.window > 1, binary=self.binary)
+        state_version = 0
+        last_progress = time.perf_counter()
+        while self._running:
+            if not serial_comm.alive():
+                raise ConnectionError("connection lost")
+            for command, state, latency in exchange.poll():
+                health.replies += 1
+                health.latency.record(latency)
+                health.last_reply = last_progress = time.perf_counter()
+                if state != state_version:
+                    continue  # Reply to sensor data of an older robot state
+                self._apply(command)
+                state_version += 1
+            if state_version not in exchange.contexts() and exchange.can_send():
+                exchange.send(self._sensors(), context=state_version)
+                health.frames_sent += 1
+            health.timeouts = exchange.timeouts
+            health.unmatched = exchange.unmatched
+            if exchange.in_flight and time.perf_counter() - last_progress > STALL_TIMEOUT:
+                raise ConnectionError(f"no reply for {STALL_TIMEOUT:g} s")
+            await asyncio.sleep(self.tick_interval)
+
+    async def run(self):
+        """Connects, drives the robot and reconnects with backoff whenever the link fails, until stop()."""
+        self._running = True
+        health = self.health
+        try:
+            while self._running:
+                serial_comm = await open_connection(self.port, self.baudrate, self.binary, self.settle_time,
+                                                    self.backoff, health)
+                try:
+                    await self._drive(serial_comm)
+                except LINK_ERRORS as e:
+                    health.last_error = str(e)
+                    health.disconnects += 1
+                    print(f"Link {self.port} failed: {e}")
+                finally:
+                    serial_comm.close()
+                if self._running:
+                    health.state = 'backoff'
+                    await asyncio.sleep(self.backoff.next_delay())
+        finally:
+            health.state = 'closed'
+
+class ConnectionManager:
+    def __init__(self, grid, baudrate=DEFAULT_BAUDRATE, binary=False, window=1, reply_timeout=1.0,
+                 settle_time=SETTLE_TIME):
+        """
+        Runs several robots on one map, each driven by its own board over its own serial port.
+
+        Every link is an asyncio task, so all ports are opened, driven and reconnected concurrently in one
+        event loop.
+
+        Args:
+            grid (Grid): The shared map.
+            baudrate (int): The baud rate of all boards.
+            binary (bool): Whether to use the binary frame protocol.
+            window (int): Sensor frames in flight per link.
+            reply_timeout (float): Seconds after which a sensor frame is sent again.
+            settle_time (float): Seconds to wait after opening a port.
+        """
+        self.grid = grid
+        self.sensor_cache = SensorCache(grid)
+        self.baudrate = baudrate
+        self.binary = binary
+        self.window = window
+        self.reply_timeout = reply_timeout
+        self.settle_time = settle_time
+        self.links = []
+        self._tasks = []
+
+    def add_robot(self, port, position, direction='N'):
+        """
+        Places a robot on the map that is driven by the board on a port.
+
+        Args:
+            port (str): The serial port, or EMULATOR_PORT.
+            position (tuple): The start position (x, y).
+            direction (str): The start direction ('N', 'E', 'S', 'W').
+
+        Returns:
+            RobotLink: The link.
+        """
+        robot = Robot(position, direction, self.grid, sensor_cache=self.sensor_cache)
+        self.grid.set(position[0], position[1], CellState.ROBOT)
+        link = RobotLink(port, robot, baudrate=self.baudrate, binary=self.binary, window=self.window,
+                         reply_timeout=self.reply_timeout, settle_time=self.settle_time)
+        self.links.append(link)
+        return link
+
+    def start(self):
+        """Starts one task per link; must be called from a running event loop."""
+        self._tasks = [asyncio.create_task(link.run(), name=f"link-{link.port}") for link in self.links]
+
+    async def stop(self):
+        """Stops all links, including those still connecting, and waits until their connections are closed."""
+        for link in self.links:
+            link.stop()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def health(self):
+        """
+        Returns the health of every link.
+
+        Returns:
+            list of dict: LinkHealth.summary() plus the robot's 'steps' and 'blocked' counts per link.
+        """
+        return [dict(link.health.summary(), steps=link.steps, blocked=link.blocked) for link in self.links]
+
+    def report(self):
+        """Prints one status line per link."""
+        for entry in self.health():
+            p50 = entry['latency']['p50']
+            latency = f"{p50 * 1000:.1f} ms" if p50 is not None else "-"
+            print(f"{entry['port']:>16s} {entry['state']:>10s} {'ok' if entry['healthy'] else 'DOWN':>4s} "
+                  f"replies {entry['replies']:>7d}  timeouts {entry['timeouts']:>4d}  "
+                  f"reconnects {entry['disconnects']:>3d}  p50 {latency}")
+
+    async def run(self, duration, report_interval=5.0):
+        """
+        Runs all links for a while, printing a health report at intervals.
+
+        Args:
+            duration (float): The run time in seconds.
+            report_interval (float): Seconds between health reports.
+        """
+        self.start()
+        end = time.perf_counter() + duration
+        try:
+            while time.perf_counter() < end:
+                await asyncio.sleep(min(report_interval, max(end - time.perf_counter(), 0)))
+                self.report()
+        finally:
+            await self.stop()
+
+def spread_positions(grid, count):
+    """
+    Picks start positions for several robots, spread evenly over the free cells in row order.
+
+    Args:
+        grid (Grid): The map.
+        count (int): The number of robots.
+
+    Returns:
+        list of tuple: The positions (x, y).
+    """
+    free = np.flatnonzero(~grid.obstacle_mask())
+    if len(free) < count:
+        raise ValueError(f"the map has only {len(free)} free cells for {count} robots")
+    picks = free[np.linspace(0, len(free) - 1, count).round().astype(int)]
+    return [(int(index % grid.width), int(index // grid.width)) for index in picks]
+
+def main(argv=None, prog=None):
+    """
+    Runs the hardware-in-the-loop test from the command line.
+
+    Exits with 1 if a board never replied.
+
+    Args:
+        argv (list of str): The command line arguments; None uses sys.argv.
+        prog (str): The program name shown in the usage, e.g. 'cli.py boards'.
+    """
+    parser = argparse.ArgumentParser(prog=prog,
+                                     description="Hardware-in-the-loop test of several controller boards on one map.")
+    parser.add_argument('ports', nargs='+', help="Serial ports of the boards; 'emulator' runs the firmware in-process")
+    parser.add_argument('--baudrate', type=int, default=DEFAULT_BAUDRATE)
+    parser.add_argument('--map', metavar='PATH', help="Map file (.map) or PNG floor plan; an empty room by default")
+    parser.add_argument('--size', type=int, default=20, help="Width and height of the empty room")
+    parser.add_argument('--duration', type=float, default=60, help="Test duration in seconds")
+    parser.add_argument('--binary', action='store_true', help="Use the binary frame protocol")
+    parser.add_argument('--pipeline', type=int, default=1, metavar='WINDOW', help="Sensor frames in flight per link")
+    parser.add_argument('--report-interval', type=float, default=5.0)
+    parser.add_argument('--health', metavar='PATH', help="Write the final link health as JSON")
+    args = parser.parse_args(argv)
+
+    if args.map:
+        from map_file import open_map, import_png
+        grid = import_png(args.map) if args.map.lower().endswith('.png') else open_map(args.map)
+    else:
+        grid = Grid(args.size, args.size)
+    manager = ConnectionManager(grid, baudrate=args.baudrate, binary=args.binary, window=args.pipeline)
+    for port, position in zip(args.ports, spread_positions(grid, len(args.ports))):
+        manager.add_robot(port, position)
+    asyncio.run(manager.run(args.duration, args.report_interval))
+    health = manager.health()
+    print(f"Coverage: {grid.coverage_ratio():.1%}")
+    if args.health:
+        with open(args.health, 'w') as file:
+            json.dump(health, file, indent=2)
+    # Every board must have answered, otherwise the rack test fails
+    sys.exit(0 if all(entry['replies'] > 0 for entry in health) else 1)
+
+if __name__ == "__main__":
+    main()
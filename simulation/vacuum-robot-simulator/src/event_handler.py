@@ -1,22 +1,42 @@
 import pygame
 import time
-from serial_utils import SerialCommunication
+from serial_utils import open_serial_connection, DEFAULT_PORT, DEFAULT_BAUDRATE
+from grid import CellState, CHAR_TO_STATE
+from scheduler import TIME_SCALES
 
-def handle_events(current_mode, robot_position, robot_direction, map_data, CELL_SIZE, GRID_SIZE, serial_comm, start_time, WIDTH, HEIGHT):
+# Keys that select the entries of TIME_SCALES
+TIME_SCALE_KEYS = (pygame.K_1, pygame.K_2, pygame.K_3)
+
+def handle_events(current_mode, robot_position, robot_direction, map_data, CELL_SIZE, GRID_SIZE, serial_comm, start_time, WIDTH, HEIGHT,
+                  *, serial_port=DEFAULT_PORT, serial_baudrate=DEFAULT_BAUDRATE, viewport=None, scheduler=None,
+                  instrumentation=None, serial_binary=False, on_start=None, renderer=None):
     """
     Handles Pygame events.
 
+    The optional features are enabled with keyword arguments.
+
     Args:
         current_mode (str): The current mode of the robot.
         robot_position (tuple): The current position of the robot.
         robot_direction (str): The current direction of the robot.
-        map_data (list of list of str): The grid data.
+        map_data (Grid): The grid data.
         CELL_SIZE (int): The size of each cell in the grid.
         GRID_SIZE (int): The size of the grid.
         serial_comm (SerialCommunication): The serial communication instance.
         start_time (float): The start time in seconds.
         WIDTH (int): The width of the screen.
         HEIGHT (int): The height of the screen.
+        serial_port (str): The serial port to open when the start button is pressed.
+        serial_baudrate (int): The baud rate to use when the start button is pressed.
+        viewport (Viewport): The camera the grid is drawn with. If given, clicks are mapped through it, the
+            mouse wheel zooms, dragging with the right button pans and Home fits the grid into view.
+        scheduler (Scheduler): The simulation scheduler. If given, the keys 1, 2 and 3 select the time scales
+            in TIME_SCALES (1x, 10x and as fast as possible).
+        instrumentation (Instrumentation): The loop instrumentation. If given, F3 toggles its overlay.
+        serial_binary (bool): Whether the connection opened by the start button expects binary protocol replies.
+        on_start (callable): Called instead of opening the connection when the start button is pressed, e.g. to
+            connect in the background; serial_comm and start_time are then returned unchanged.
+        renderer (ViewportRenderer): The grid renderer. If given, H toggles its visit heatmap overlay.
 
     Returns:
         tuple: Updated current_mode, robot_position, robot_direction, serial_comm, start_time.
@@ -25,23 +45,39 @@ def handle_events(current_mode, robot_position, robot_direction, map_data, CELL_
         if event.type == pygame.QUIT:
             pygame.quit()
             return None, None, None, None, None
+        elif viewport and event.type == pygame.MOUSEWHEEL:
+            viewport.zoom(1.25 ** event.y, pygame.mouse.get_pos())
+        elif viewport and event.type == pygame.MOUSEMOTION and event.buttons[2]:
+            viewport.pan(*event.rel)
         elif event.type == pygame.MOUSEBUTTONDOWN:
             x, y = event.pos
-            grid_x, grid_y = x // CELL_SIZE, y // CELL_SIZE
-            if grid_y < GRID_SIZE:  # Ensure click is within grid area
+            if viewport:
+                if event.button != 1:  # The wheel and the pan button don't edit cells
+                    continue
+                in_view = viewport.rect.collidepoint(event.pos)
+                cell = viewport.screen_to_cell(x, y)
+            else:
+                in_view = y // CELL_SIZE < GRID_SIZE  # Ensure click is within grid area
+                cell = (x // CELL_SIZE, y // CELL_SIZE)
+            if in_view:
+                if cell is None:
+                    continue
+                grid_x, grid_y = cell
                 if current_mode == 'R':
                     if robot_position:
-                        map_data[robot_position[1]][robot_position[0]] = 'U'  # Reset old robot position
+                        map_data.set(robot_position[0], robot_position[1], CellState.UNVISITED)  # Reset old robot position
                     robot_position = (grid_x, grid_y)
-                    map_data[grid_y][grid_x] = 'R'  # Set cell to robot position
+                    map_data.set(grid_x, grid_y, CellState.ROBOT)  # Set cell to robot position
                 else:
-                    map_data[grid_y][grid_x] = current_mode  # Set cell to current mode
+                    map_data.set(grid_x, grid_y, CHAR_TO_STATE[current_mode])  # Set cell to current mode
             else:
                 # Check if the start button is pressed
                 button_rect = pygame.Rect(WIDTH - 110, HEIGHT - 50, 100, 40)
-                if button_rect.collidepoint(event.pos) and not serial_comm:
+                if button_rect.collidepoint(event.pos) and not serial_comm and on_start is not None:
+                    on_start()
+                elif button_rect.collidepoint(event.pos) and not serial_comm:
                     # Initialize serial communication
-                    serial_comm = SerialCommunication(port='COM3', baudrate=9600)
+                    serial_comm = open_serial_connection(port=serial_port, baudrate=serial_baudrate, binary=serial_binary)
                     time.sleep(2)  # Wait for the serial connection to be established
                     start_time = time.time()  # Record the start time
                     print("Serial communication initialized.")
@@ -56,6 +92,16 @@ def handle_events(current_mode, robot_position, robot_direction, map_data, CELL_
                 current_mode = 'I'
             elif event.key == pygame.K_r:
                 current_mode = 'R'
+            elif viewport and event.key == pygame.K_HOME:
+                viewport.fit()
+            elif instrumentation and event.key == pygame.K_F3:
+                instrumentation.overlay_visible = not instrumentation.overlay_visible
+            elif renderer and event.key == pygame.K_h:
+                renderer.toggle_heatmap()
+            elif scheduler and event.key in TIME_SCALE_KEYS:
+                time_scale = TIME_SCALES[TIME_SCALE_KEYS.index(event.key)]
+                scheduler.set_time_scale(time_scale)
+                print(f"Time scale: {'max' if time_scale is None else f'{time_scale:g}x'}")
             elif event.key == pygame.K_LEFT or event.key == pygame.K_a:
                 if robot_position:
                     robot_direction = 'W'
@@ -0,0 +1,219 @@
+import queue
+import protocol
+from serial_utils import FrameBuffer, FRAME_DELIMITER, SEQUENCE_FLAG
+from swarm import FORWARD, TURN_LEFT, TURN_RIGHT, STOP
+
+# RAND_MAX of avr-libc
+RAND_MAX = 0x7FFF
+
+class AvrRand:
+    def __init__(self, seed=1):
+        """
+        Port of avr-libc's rand()/srand(), the Park-Miller "minimal standard" generator.
+
+        Args:
+            seed (int): The seed, as passed to srand(). The firmware never calls srand(), so it runs with 1.
+        """
+        self.srand(seed)
+
+    def srand(self, seed):
+        """
+        Reseeds the generator.
+
+        Args:
+            seed (int): The new seed.
+        """
+        self.next = seed & 0xFFFFFFFF
+
+    def rand(self):
+        """
+        Returns the next pseudo-random number.
+
+        Returns:
+            int: A number between 0 and RAND_MAX.
+        """
+        x = self.next
+        # The generator can't be seeded with 0, so avr-libc uses another value
+        if x == 0:
+            x = 123459876
+        # Schrage's method for 16807 * x mod (2**31 - 1), with C's truncating division
+        hi = x // 127773
+        lo = x % 127773
+        x = 16807 * lo - 2836 * hi
+        if x < 0:
+            x += 0x7FFFFFFF
+        self.next = x
+        return x % (RAND_MAX + 1)
+
+def parse_sensor_values_byte(byte):
+    """
+    Port of the firmware's parse_sensor_values_byte.
+
+    Args:
+        byte (int): The received sensor byte.
+
+    Returns:
+        dict: The 'front', 'left', 'right' and 'collision' values as 0 or 1.
+    """
+    return {
+        'front': (byte >> 3) & 0x01,
+        'left': (byte >> 2) & 0x01,
+        'right': (byte >> 1) & 0x01,
+        'collision': byte & 0x01,
+    }
+
+def decide_movement(values, rng):
+    """
+    Port of the firmware's decide_movement.
+
+    Args:
+        values (dict): The sensor values, see parse_sensor_values_byte.
+        rng (AvrRand): The generator that stands in for the firmware's rand().
+
+    Returns:
+        int: The movement code (FORWARD, TURN_LEFT, TURN_RIGHT or STOP).
+    """
+    if values['collision']:
+        # Collision detected, stop the robot
+        return STOP
+    if values['front']:
+        # Front is blocked, turn randomly left or right
+        if rng.rand() % 2 == 0:
+            return TURN_LEFT
+        return TURN_RIGHT
+    # Front is free, move forward
+    return FORWARD
+
+class FirmwareEmulator:
+    def __init__(self, seed=1, delimiter=FRAME_DELIMITER, framer=None):
+        """
+        In-process stand-in for the controller board with the same interface as SerialCommunication.
+
+        Bytes passed to send_data go through the same frame handling as the firmware's Timer1 ISR, and
+        the replies are formatted and split into frames exactly as they would arrive over the wire.
+
+        Args:
+            seed (int): The seed of the emulated rand().
+            delimiter (bytes): The byte that terminates each text reply.
+            framer (FrameBuffer or protocol.FrameDecoder): Splits the replies into frames; defaults to a
+                FrameBuffer for delimiter. Use a protocol.FrameDecoder for binary replies.
+        """
+        self.rng = AvrRand(seed)
+        self.delimiter = delimiter
+        self.frames = queue.Queue()
+        self.is_open = True
+        self._frame_buffer = framer if framer is not None else FrameBuffer(delimiter)
+        self._sequence_id = None
+        self._binary_frame = bytearray()  # Bytes of the binary frame received so far
+
+    def _process_byte(self, received_byte):
+        """
+        Handles one received byte like the firmware's Timer1 ISR.
+
+        Args:
+            received_byte (int): The received byte.
+
+        Returns:
+            bytes: The reply, or an empty string if the byte was a sequence ID or part of a binary frame.
+        """
+        frame = self._binary_frame
+        if frame or received_byte == protocol.SYNC:
+            frame.append(received_byte)
+            if len(frame) == protocol.HEADER_SIZE and (frame[1] != protocol.VERSION
+                                                       or not 1 <= frame[3] <= protocol.MAX_COUNT):
+                frame.clear()  # Unsupported version or count, wait for the next SYNC
+            elif len(frame) >= protocol.HEADER_SIZE and len(frame) == protocol.frame_size(frame[3]):
+                reply = self._handle_sensor_frame(bytes(frame))
+                frame.clear()
+                return reply
+            return b''
+        if received_byte & SEQUENCE_FLAG:
+            self._sequence_id = received_byte & ~SEQUENCE_FLAG
+            return b''
+        movement = decide_movement(parse_sensor_values_byte(received_byte), self.rng)
+        if self._sequence_id is not None:
+            reply = f"{self._sequence_id}:{movement}"
+            self._sequence_id = None
+        else:
+            reply = f"{movement}"
+        return reply.encode('ascii') + self.delimiter
+
+    def _handle_sensor_frame(self, frame):
+        """
+        Answers a complete binary frame like the firmware's handle_sensor_frame.
+
+        Args:
+            frame (bytes): The frame.
+
+        Returns:
+            bytes: The reply frame, or an empty string if the CRC does not match.
+        """
+        if protocol.crc8(frame[1:-1]) != frame[-1]:
+            return b''
+        readings = protocol.unpack_nibbles(frame[protocol.HEADER_SIZE:-1], frame[3])
+        movements = [decide_movement(parse_sensor_values_byte(reading), self.rng) for reading in readings.tolist()]
+        return protocol.encode_frame(frame[2], movements)
+
+    def alive(self):
+        """
+        Checks whether the emulator is open, like SerialCommunication.alive.
+
+        Returns:
+            bool: True until close() is called.
+        """
+        return self.is_open
+
+    def send_data(self, data):
+        """
+        Sends data to the emulated board, which answers immediately.
+
+        Args:
+            data (bytes): The data to send.
+        """
+        if not self.is_open:
+            print("Emulator is closed. Cannot send data.")
+            return
+        replies = b''.join(self._process_byte(received_byte) for received_byte in data)
+        for frame in self._frame_buffer.feed(replies):
+            self.frames.put(frame)
+
+    def receive_frame(self, timeout=None):
+        """
+        Takes the next reply frame.
+
+        Args:
+            timeout (float): How long to wait in seconds. 0 returns immediately, None waits forever.
+
+        Returns:
+            bytes: The frame without its delimiter, or None if no frame arrived in time.
+        """
+        try:
+            if timeout == 0:
+                return self.frames.get_nowait()
+            return self.frames.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    async def receive_data(self, timeout=None):
+        """
+        Asynchronously waits for the next reply frame.
+
+        Args:
+            timeout (float): How long to wait in seconds, or None to wait forever.
+
+        Returns:
+            bytes: The frame without its delimiter, or None if no frame arrived in time.
+        """
+        frame = self.receive_frame(timeout=0)
+        if frame is not None:
+            return frame
+        # asyncio is loaded anyway when a coroutine runs; importing it here keeps it out of headless startup
+        import asyncio
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.receive_frame, timeout)
+
+    def close(self):
+        """
+        Closes the emulator.
+        """
+        self.is_open = False
@@ -0,0 +1,274 @@
+from enum import IntEnum
+import numpy as np
+
+class CellState(IntEnum):
+    """The state of a single grid cell, stored as one uint8 per cell."""
+    UNVISITED = 0
+    VISITED = 1
+    OBSTACLE = 2
+    IDENTIFIED = 3
+    ROBOT = 4
+
+# Single-character codes used by the GUI modes and the legend, indexed by CellState
+CELL_CHARS = ('U', 'V', 'O', 'I', 'R')
+CHAR_TO_STATE = {char: CellState(code) for code, char in enumerate(CELL_CHARS)}
+
+# Lookup tables indexed by cell code
+OBSTACLE_TABLE = np.array([False, False, True, True, False])
+VISITED_TABLE = np.array([False, True, False, False, True])
+_OBSTACLE_LOOKUP = tuple(bool(value) for value in OBSTACLE_TABLE)
+
+class Grid:
+    def __init__(self, width, height, fill=CellState.UNVISITED, cells=None, counts=None):
+        """
+        Initializes the grid.
+
+        Args:
+            width (int): The number of columns.
+            height (int): The number of rows.
+            fill (CellState): The initial state of every cell.
+            cells (numpy.ndarray): An existing uint8 array of shape (height, width) to wrap instead of allocating.
+            counts (list of int): The known number of cells per state of `cells`. Passing them skips the scan over
+                all cells, so a memory-mapped array is not paged in.
+        """
+        if cells is None:
+            cells = np.full((height, width), fill, dtype=np.uint8)
+        elif cells.shape != (height, width) or cells.dtype != np.uint8:
+            raise ValueError(f"Expected a uint8 array of shape {(height, width)}, got {cells.dtype} {cells.shape}")
+        self.width = width
+        self.height = height
+        self.cells = cells
+        self._listeners = []
+        if counts is None:
+            self.recount()
+        else:
+            if len(counts) != len(CellState) or sum(counts) != width * height:
+                raise ValueError(f"Expected {len(CellState)} cell counts summing to {width * height}, got {counts}")
+            self._counts = [int(count) for count in counts]
+
+    @classmethod
+    def from_rows(cls, rows):
+        """
+        Creates a grid from a list of rows of single-character cell codes.
+
+        Args:
+            rows (list of list of str): The grid data where each cell is 'U', 'V', 'O', 'I' or 'R'.
+
+        Returns:
+            Grid: The new grid.
+        """
+        cells = np.array([[CHAR_TO_STATE[char] for char in row] for row in rows], dtype=np.uint8)
+        return cls(cells.shape[1], cells.shape[0], cells=cells)
+
+    def to_rows(self):
+        """
+        Converts the grid back to a list of rows of single-character cell codes.
+
+        Returns:
+            list of list of str: The grid data.
+        """
+        return [[CELL_CHARS[code] for code in row] for row in self.cells.tolist()]
+
+    def copy(self):
+        """
+        Returns an independent copy of the grid.
+
+        Returns:
+            Grid: The copy.
+        """
+        return Grid(self.width, self.height, cells=self.cells.copy())
+
+    def add_listener(self, listener):
+        """
+        Registers a callback that is told about changed cells.
+
+        The callback receives the columns and rows of the changed cells, as ints for a single cell or as
+        arrays for a bulk change, or (None, None) if any cell may have changed.
+
+        Args:
+            listener (callable): The callback.
+        """
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener):
+        """
+        Unregisters a callback added with add_listener.
+
+        Args:
+            listener (callable): The callback.
+        """
+        self._listeners.remove(listener)
+
+    def _notify(self, xs, ys):
+        for listener in self._listeners:
+            listener(xs, ys)
+
+    def recount(self):
+        """
+        Recomputes the per-state cell counts. Call this after writing to `cells` directly.
+        """
+        self._counts = np.bincount(self.cells.ravel(), minlength=len(CellState)).tolist()
+        self._notify(None, None)
+
+    def in_bounds(self, x, y):
+        """
+        Checks whether a position lies inside the grid.
+
+        Args:
+            x (int): The column.
+            y (int): The row.
+
+        Returns:
+            bool: True if the position is inside the grid.
+        """
+        return 0 <= x < self.width and 0 <= y < self.height
+
+    def get(self, x, y):
+        """
+        Gets the state of a cell.
+
+        Args:
+            x (int): The column.
+            y (int): The row.
+
+        Returns:
+            CellState: The state of the cell.
+        """
+        return CellState(self.cells[y, x])
+
+    def set(self, x, y, state):
+        """
+        Sets the state of a cell and keeps the per-state counts up to date.
+
+        Args:
+            x (int): The column.
+            y (int): The row.
+            state (CellState): The new state of the cell.
+        """
+        state = int(state)
+        old_state = int(self.cells[y, x])
+        if old_state == state:
+            return
+        self._counts[old_state] -= 1
+        self._counts[state] += 1
+        self.cells[y, x] = state
+        if self._listeners:
+            self._notify(x, y)
+
+    def set_many(self, xs, ys, state):
+        """
+        Sets many cells to the same state in one vectorized operation.
+
+        Args:
+            xs (numpy.ndarray): The columns of the cells.
+            ys (numpy.ndarray): The rows of the cells. Repeated positions are allowed.
+            state (CellState): The new state of the cells.
+        """
+        state = int(state)
+        flat = np.asarray(ys) * self.width + np.asarray(xs)
+        # Only sort the cells that actually change, which is usually a small subset
+        flat = np.unique(flat[self.cells.take(flat) != state])
+        old_counts = np.bincount(self.cells.take(flat), minlength=len(CellState))
+        for old_state, count in enumerate(old_counts.tolist()):
+            self._counts[old_state] -= count
+        self._counts[state] += len(flat)
+        self.cells.put(flat, state)
+        if self._listeners and len(flat):
+            ys, xs = np.divmod(flat, self.width)
+            self._notify(xs, ys)
+
+    def fill(self, state):
+        """
+        Sets every cell to the same state.
+
+        Args:
+            state (CellState): The new state of all cells.
+        """
+        self.cells.fill(state)
+        self.recount()
+
+    def is_obstacle(self, x, y):
+        """
+        Checks whether a cell holds an obstacle ('O' or 'I').
+
+        Args:
+            x (int): The column.
+            y (int): The row.
+
+        Returns:
+            bool: True if the cell is an obstacle.
+        """
+        return _OBSTACLE_LOOKUP[self.cells[y, x]]
+
+    def obstacle_mask_at(self, xs, ys):
+        """
+        Checks many cells for obstacles at once.
+
+        Args:
+            xs (numpy.ndarray): The columns.
+            ys (numpy.ndarray): The rows.
+
+        Returns:
+            numpy.ndarray: A bool array that is True where the cell is an obstacle.
+        """
+        return OBSTACLE_TABLE[self.cells[ys, xs]]
+
+    def obstacle_mask(self):
+        """
+        Returns a boolean mask of all obstacle cells.
+
+        Returns:
+            numpy.ndarray: A bool array of shape (height, width).
+        """
+        return OBSTACLE_TABLE[self.cells]
+
+    def visited_mask(self):
+        """
+        Returns a boolean mask of all visited cells, including the robot's cell.
+
+        Returns:
+            numpy.ndarray: A bool array of shape (height, width).
+        """
+        return VISITED_TABLE[self.cells]
+
+    def count(self, state):
+        """
+        Returns the number of cells in a state.
+
+        Args:
+            state (CellState): The state to count.
+
+        Returns:
+            int: The number of cells.
+        """
+        return self._counts[state]
+
+    def counts(self):
+        """
+        Returns the number of cells per state.
+
+        Returns:
+            dict: A mapping from CellState to the number of cells.
+        """
+        return {state: self._counts[state] for state in CellState}
+
+    def free_cell_count(self):
+        """
+        Returns the number of cells that are not obstacles.
+
+        Returns:
+            int: The number of free cells.
+        """
+        return self.width * self.height - self._counts[CellState.OBSTACLE] - self._counts[CellState.IDENTIFIED]
+
+    def coverage_ratio(self):
+        """
+        Computes the fraction of free cells that have been visited.
+
+        Returns:
+            float: The coverage between 0.0 and 1.0.
+        """
+        free_cells = self.free_cell_count()
+        if free_cells == 0:
+            return 0.0
+        return (self._counts[CellState.VISITED] + self._counts[CellState.ROBOT]) / free_cells
@@ -0,0 +1,130 @@
+import numpy as np
+
+MAX_COUNT = np.iinfo(np.uint16).max  # Counts saturate here; two bytes per cell keep large maps cheap
+
+# Viridis, from yellow for cells entered once to dark purple for the most visited cell; it stays apart from
+# the red and blue obstacle colors
+HEAT_STOPS = [(253, 231, 37), (94, 201, 98), (33, 145, 140), (59, 82, 139), (68, 1, 84)]
+
+def _heat_palette():
+    stops = np.array(HEAT_STOPS, dtype=float)
+    positions = np.linspace(0.0, 1.0, len(stops))
+    levels = np.linspace(0.0, 1.0, 256)
+    return np.stack([np.interp(levels, positions, stops[:, channel]) for channel in range(3)], axis=1).astype(np.uint8)
+
+HEAT_PALETTE = _heat_palette()
+
+class VisitCounter:
+    def __init__(self, width, height):
+        """
+        Counts how often the robot entered each cell, to measure redundant travel.
+
+        Counting a visit and every summary statistic are O(1); the totals are kept up to date by visit and
+        visit_many rather than computed from the array.
+
+        Args:
+            width (int): The number of columns.
+            height (int): The number of rows.
+        """
+        self.width = width
+        self.height = height
+        self.counts = np.zeros((height, width), dtype=np.uint16)
+        self.visits = 0  # All visits, including the first one of each cell
+        self.cells_visited = 0
+        self.max_visits = 0
+        self.version = 0  # Incremented on every change, so renderers know when to redraw
+        self._levels = None  # Palette index per count, for the max_visits it was built for
+
+    def visit(self, x, y):
+        """
+        Counts one visit of a cell.
+
+        Args:
+            x (int): The column.
+            y (int): The row.
+        """
+        count = int(self.counts[y, x])
+        if count == 0:
+            self.cells_visited += 1
+        if count < MAX_COUNT:
+            count += 1
+            self.counts[y, x] = count
+            if count > self.max_visits:
+                self.max_visits = count
+        self.visits += 1
+        self.version += 1
+
+    def visit_many(self, xs, ys):
+        """
+        Counts one visit per entry, e.g. of all robots of a swarm that moved; a cell may appear several times.
+
+        Args:
+            xs (numpy.ndarray): The columns.
+            ys (numpy.ndarray): The rows.
+        """
+        if len(xs) == 0:
+            return
+        cells, repeats = np.unique(np.asarray(ys) * self.width + np.asarray(xs), return_counts=True)
+        flat = self.counts.reshape(-1)
+        before = flat[cells].astype(np.int64)
+        after = np.minimum(before + repeats, MAX_COUNT)
+        flat[cells] = after
+        self.cells_visited += int(np.count_nonzero(before == 0))
+        self.max_visits = max(self.max_visits, int(after.max()))
+        self.visits += int(repeats.sum())
+        self.version += 1
+
+    def reset(self):
+        """Clears all counts."""
+        self.counts[:] = 0
+        self.visits = self.cells_visited = self.max_visits = 0
+        self.version += 1
+
+    def stats(self):
+        """
+        Returns the summary statistics.
+
+        Returns:
+            dict: 'visits', 'cells_visited', 'revisits' (visits of cells entered before), 'revisit_ratio'
+            (revisits per visit), 'max_visits' and 'mean_visits' (per visited cell).
+        """
+        revisits = self.visits - self.cells_visited
+        return {
+            'visits': self.visits,
+            'cells_visited': self.cells_visited,
+            'revisits': revisits,
+            'revisit_ratio': revisits / self.visits if self.visits else 0.0,
+            'max_visits': self.max_visits,
+            'mean_visits': self.visits / self.cells_visited if self.cells_visited else 0.0,
+        }
+
+    def levels(self, counts):
+        """
+        Maps visit counts to indices into HEAT_PALETTE on a logarithmic scale up to the current maximum.
+
+        Args:
+            counts (numpy.ndarray): Counts, e.g. a window of self.counts.
+
+        Returns:
+            numpy.ndarray: The uint8 palette index per count; 0 for one visit (and for none, which callers
+            usually draw in their cell color instead) and 255 for max_visits.
+        """
+        # A table lookup per cell instead of a logarithm; the table only changes with the maximum
+        if self._levels is None or len(self._levels) != self.max_visits + 1:
+            counts_range = np.arange(self.max_visits + 1, dtype=np.float64)
+            scale = 255 / np.log(self.max_visits) if self.max_visits > 1 else 0.0
+            # Rounded, so rounding errors cannot turn max_visits into 254
+            self._levels = np.rint(np.log(np.maximum(counts_range, 1)) * scale).astype(np.uint8)
+        return self._levels[counts]
+
+    def colorize(self, counts):
+        """
+        Maps visit counts to heatmap colors, see levels.
+
+        Args:
+            counts (numpy.ndarray): Counts, e.g. a window of self.counts.
+
+        Returns:
+            numpy.ndarray: The RGB colors, shape counts.shape + (3,).
+        """
+        return np.take(HEAT_PALETTE, self.levels(counts), axis=0)
@@ -0,0 +1,224 @@
+import csv
+import json
+import time
+from contextlib import contextmanager
+
+# Percentiles reported by summaries and exports
+REPORTED_PERCENTILES = (50, 90, 99, 99.9)
+
+class LatencyHistogram:
+    def __init__(self, unit=1e-6, significant_digits=2):
+        """
+        HDR-style histogram with a fixed relative precision over any range of values.
+
+        Values are counted in integer units. Up to sub_bucket_count units every value has its own bucket;
+        above that each power of two is split into the same number of linear sub-buckets, so a bucket is never
+        wider than 10**-significant_digits of its value. Recording is O(1) and the memory grows with the
+        logarithm of the largest value.
+
+        Args:
+            unit (float): The resolution in seconds.
+            significant_digits (int): The number of significant decimal digits kept.
+        """
+        self.unit = unit
+        self.sub_bucket_bits = (2 * 10 ** significant_digits - 1).bit_length()
+        self.sub_bucket_count = 1 << self.sub_bucket_bits
+        self.sub_bucket_half = self.sub_bucket_count // 2
+        self.counts = [0] * self.sub_bucket_count
+        self.total = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+
+    def _index(self, units):
+        if units < self.sub_bucket_count:
+            return units
+        shift = units.bit_length() - self.sub_bucket_bits
+        return self.sub_bucket_count + (shift - 1) * self.sub_bucket_half + (units >> shift) - self.sub_bucket_half
+
+    def _lower_bound(self, index):
+        if index < self.sub_bucket_count:
+            return index
+        shift, offset = divmod(index - self.sub_bucket_count, self.sub_bucket_half)
+        return (offset + self.sub_bucket_half) << (shift + 1)
+
+    def record(self, seconds):
+        """
+        Records one value.
+
+        Args:
+            seconds (float): The value in seconds; negative values count as 0.
+        """
+        index = self._index(max(int(seconds / self.unit), 0))
+        if index >= len(self.counts):
+            self.counts.extend([0] * (index + 1 - len(self.counts)))
+        self.counts[index] += 1
+        self.total += 1
+        self.sum += seconds
+        if self.min is None or seconds < self.min:
+            self.min = seconds
+        if self.max is None or seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, percentile):
+        """
+        Returns the value below which a percentage of the recorded values fall.
+
+        Args:
+            percentile (float): The percentage, between 0 and 100.
+
+        Returns:
+            float: The lower bound of the bucket holding the percentile in seconds, or None without values.
+        """
+        if self.total == 0:
+            return None
+        rank = max(1, round(percentile / 100 * self.total))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return self._lower_bound(index) * self.unit
+        return self.max
+
+    def mean(self):
+        """
+        Returns the mean of the recorded values.
+
+        Returns:
+            float: The mean in seconds, or None without values.
+        """
+        return self.sum / self.total if self.total else None
+
+    def summary(self):
+        """
+        Summarizes the histogram.
+
+        Returns:
+            dict: 'count', 'mean', 'min', 'max' and 'p<percentile>' for REPORTED_PERCENTILES, in seconds.
+        """
+        summary = {'count': self.total, 'mean': self.mean(), 'min': self.min, 'max': self.max}
+        for percentile in REPORTED_PERCENTILES:
+            summary[f"p{percentile:g}"] = self.percentile(percentile)
+        return summary
+
+class Instrumentation:
+    def __init__(self, clock=time.perf_counter):
+        """
+        Collects per-stage timings, latency histograms and event counters of the main loop.
+
+        Args:
+            clock (callable): Returns the current time in seconds.
+        """
+        self.clock = clock
+        self.histograms = {}
+        self.counters = {}
+        self.rates = {}  # Counter increments per second over the last full second
+        self.overlay_visible = False
+        self.start_time = clock()
+        self._window_start = self.start_time
+        self._window_counters = {}
+
+    def histogram(self, name):
+        """
+        Returns the histogram of a stage, creating it on first use.
+
+        Args:
+            name (str): The stage name.
+
+        Returns:
+            LatencyHistogram: The histogram.
+        """
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = LatencyHistogram()
+        return histogram
+
+    def record(self, name, seconds):
+        """
+        Records a measured duration, e.g. a serial round trip.
+
+        Args:
+            name (str): The stage name.
+            seconds (float): The duration.
+        """
+        self.histogram(name).record(seconds)
+
+    @contextmanager
+    def stage(self, name):
+        """
+        Times the body of a with statement as one sample of a stage.
+
+        Args:
+            name (str): The stage name.
+        """
+        start = self.clock()
+        try:
+            yield
+        finally:
+            self.histogram(name).record(self.clock() - start)
+
+    def count(self, name, increment=1):
+        """
+        Increments a counter and updates the per-second rates once a second has passed.
+
+        Args:
+            name (str): The counter name.
+            increment (int): The amount to add.
+        """
+        self.counters[name] = self.counters.get(name, 0) + increment
+        self._window_counters[name] = self._window_counters.get(name, 0) + increment
+        now = self.clock()
+        if now - self._window_start >= 1.0:
+            elapsed = now - self._window_start
+            self.rates = {counter: value / elapsed for counter, value in self._window_counters.items()}
+            self._window_counters = {}
+            self._window_start = now
+
+    def summary(self):
+        """
+        Summarizes everything collected.
+
+        Returns:
+            dict: 'elapsed' seconds, 'counters', 'rates' and a summary per stage under 'stages'.
+        """
+        return {
+            'elapsed': self.clock() - self.start_time,
+            'counters': dict(self.counters),
+            'rates': dict(self.rates),
+            'stages': {name: histogram.summary() for name, histogram in self.histograms.items()},
+        }
+
+    def overlay_lines(self):
+        """
+        Formats the most important numbers for the on-screen overlay.
+
+        Returns:
+            list of str: One line per rate and stage.
+        """
+        lines = [f"{name}: {rate:.0f}/s" for name, rate in sorted(self.rates.items())]
+        for name, histogram in sorted(self.histograms.items()):
+            p50, p99 = histogram.percentile(50), histogram.percentile(99)
+            if p50 is not None:
+                lines.append(f"{name}: p50 {p50 * 1000:.2f} ms  p99 {p99 * 1000:.2f} ms  max {histogram.max * 1000:.2f} ms")
+        return lines
+
+    def export(self, path):
+        """
+        Writes the summary to a file: JSON, or one row per stage and counter if the path ends with .csv.
+
+        Args:
+            path (str): The file to write.
+        """
+        summary = self.summary()
+        if not path.lower().endswith('.csv'):
+            with open(path, 'w') as file:
+                json.dump(summary, file, indent=2)
+            return
+        columns = ['count', 'mean', 'min', 'max'] + [f"p{percentile:g}" for percentile in REPORTED_PERCENTILES]
+        with open(path, 'w', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(['name'] + columns)
+            for name, stage in summary['stages'].items():
+                writer.writerow([name] + [stage[column] for column in columns])
+            for name, value in summary['counters'].items():
+                writer.writerow([name, value] + [''] * (len(columns) - 1))
@@ -1,123 +1,308 @@
 import pygame
 import pygame_gui
-from robot import Robot
+from robot import Robot, HEADING_INDEX
 from robot_controller import RobotController
-from serial_utils import SerialCommunication, send_sensor_data, wait_for_data  # Import necessary functions
-from gui_utils import draw_grid, draw_legend, draw_elapsed_time
+from grid import Grid, CellState
+from sensor_cache import SensorCache
+from serial_utils import PipelinedExchange, format_sensor_data_as_bits, DEFAULT_PORT, DEFAULT_BAUDRATE  # Import necessary functions
+from trajectory import TrajectoryRecorder, NO_COMMAND
+from gui_utils import draw_legend, draw_elapsed_time, draw_stats_overlay
+from assets import load_robot_image
+from instrumentation import Instrumentation
+from heatmap import VisitCounter
+from viewport import Viewport, ViewportRenderer
+from map_file import open_map, import_png
+from scheduler import Scheduler
 from event_handler import handle_events
+from connection_manager import open_connection
 import time
 import asyncio
-
-# Initialize Pygame
-pygame.init()
+import argparse
 
 # Constants
 GRID_SIZE = 10
 CELL_SIZE = 50
 WIDTH, HEIGHT = GRID_SIZE * CELL_SIZE, GRID_SIZE * CELL_SIZE + 160  # Extra space for the legend
 
-# Initialize screen
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-manager = pygame_gui.UIManager((WIDTH, HEIGHT))
-
-# Load robot image with transparency
-robot_image = pygame.image.load('./simulation/vacuum-robot-simulator/src/img/cleaning-robot.png').convert_alpha()
-robot_image = pygame.transform.scale(robot_image, (CELL_SIZE, CELL_SIZE))
-
-# Set the background color of the robot image to (200, 200, 200)
-background_color = (200, 200, 200)
-robot_image.fill(background_color, special_flags=pygame.BLEND_RGBA_MIN)
-
-# Create the start button
-start_button = pygame_gui.elements.UIButton(relative_rect=pygame.Rect((WIDTH - 110, HEIGHT - 50), (100, 40)),
-                                            text='Start',
-                                            manager=manager)
+# Window, UI manager, robot image and start button, created by init_display so that importing this module
+# does not open a window
+screen = None
+manager = None
+robot_image = None
+start_button = None
 
 # Global variables
 current_mode = 'U'  # Start with 'Unvisited' mode
 robot_position = None  # Track the current robot position
 robot_direction = 'N'  # Track the current robot direction
-map_data = [['U' for _ in range(GRID_SIZE)] for _ in range(GRID_SIZE)]  # Initialize grid with 'U' for unvisited
+map_data = Grid(GRID_SIZE, GRID_SIZE)  # Initialize grid with all cells unvisited
 serial_initialized = False  # Flag to track if serial communication is initialized
 start_time = None  # Variable to track the start time
+serial_port = DEFAULT_PORT  # Serial port of the controller board, set with --port
+serial_baudrate = DEFAULT_BAUDRATE  # Baud rate of the controller board, set with --baudrate
+pipeline_window = 0  # Frames in flight with sequence IDs, set with --pipeline; 0 uses the plain one-byte protocol
+binary_protocol = False  # Use the binary frame protocol (protocol.py), set with --binary
+REPLY_TIMEOUT = 1.0  # Seconds to wait for a command before the sensor data is sent again
+record_path = None  # Trajectory file to record the session to, set with --record
+tick_rate = 30  # Serial exchange ticks per second at 1x speed, set with --tick-rate
+max_fps = 30  # Frame rate cap of the display, set with --fps
+stats_path = None  # File the instrumentation summary is exported to at shutdown (.json or .csv), set with --stats
+
+def init_display():
+    """
+    Initializes Pygame, opens the window and creates the start button.
+    """
+    global screen, manager, robot_image, start_button
+    pygame.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    manager = pygame_gui.UIManager((WIDTH, HEIGHT))
+
+    # Load robot image with transparency, with its background set to the color (200, 200, 200) of unvisited cells
+    robot_image = load_robot_image(CELL_SIZE, background=(200, 200, 200))
+
+    # Create the start button
+    start_button = pygame_gui.elements.UIButton(relative_rect=pygame.Rect((WIDTH - 110, HEIGHT - 50), (100, 40)),
+                                                text='Start',
+                                                manager=manager)
+
+def heatmap_line(heatmap):
+    """
+    Formats the visit statistics for the console and the stats overlay.
+
+    Args:
+        heatmap (VisitCounter): The visit counts.
+
+    Returns:
+        str: The line.
+    """
+    stats = heatmap.stats()
+    return (f"visits: {stats['visits']}  revisits {stats['revisit_ratio']:.0%}  max {stats['max_visits']}  "
+            f"mean {stats['mean_visits']:.2f}")
+
+def shutdown(recorder, instrumentation, exchange, heatmap, controller, tick):
+    """
+    Ends the recording with the final pose, prints the visit statistics and exports the instrumentation summary.
+
+    Args:
+        recorder (TrajectoryRecorder): The open recording, or None.
+        instrumentation (Instrumentation): The collected timings.
+        exchange (PipelinedExchange): The serial exchange, or None if the session never started.
+        heatmap (VisitCounter): The visit counts of the session.
+        controller (RobotController): The controller of the robot.
+        tick (int): The state version of the final pose.
+    """
+    if recorder:
+        # Each record holds the pose a command was given for, so the pose after the last command is added
+        robot = controller.robot
+        sensors = format_sensor_data_as_bits(controller.get_sensor_data())[0]
+        recorder.record(tick, robot.position[0], robot.position[1], HEADING_INDEX[robot.direction], sensors,
+                        NO_COMMAND)
+        recorder.close()
+    if heatmap.visits:
+        print(heatmap_line(heatmap))
+    if stats_path:
+        if exchange:
+            instrumentation.counters['serial_timeouts'] = exchange.timeouts
+            instrumentation.counters['serial_unmatched'] = exchange.unmatched
+        instrumentation.counters.update({f"heatmap_{name}": value for name, value in heatmap.stats().items()})
+        instrumentation.export(stats_path)
+        print(f"Instrumentation written to {stats_path}")
 
 async def test_robot_sensors_in_gui():
     """
     Test function to run the GUI and print sensor data based on the robot's position and obstacles.
     """
     global robot_position, robot_direction, map_data, screen, current_mode, serial_initialized, start_time
-    clock = pygame.time.Clock()
+    if screen is None:
+        init_display()
+    scheduler = Scheduler(tick_rate=tick_rate, max_fps=max_fps)
+    instrumentation = Instrumentation()  # F3 toggles the overlay
     
-    robot = Robot(initial_position=(0, 0), initial_direction='N', grid=map_data)
+    # Edits made through handle_events only recompute the sensor readings around the edited cell
+    robot = Robot(initial_position=(0, 0), initial_direction='N', grid=map_data, sensor_cache=SensorCache(map_data))
     controller = RobotController(robot)
     serial_comm = None  # Initialize serial communication variable
-    
+    exchange = None  # Matches replies to the sensor frames in flight
+    state_version = 0  # Incremented on every applied command, so replies to older sensor data can be told apart
+    # The camera starts at the original 50 px cells; larger maps are explored with zoom and pan
+    viewport = Viewport(pygame.Rect(0, 0, WIDTH, GRID_SIZE * CELL_SIZE), map_data.width, map_data.height, CELL_SIZE)
+    heatmap = VisitCounter(map_data.width, map_data.height)  # H shows it over the grid
+    renderer = ViewportRenderer(screen, map_data, robot_image, viewport, heatmap=heatmap)
+    recorder = None  # Opened when the session starts, so the recording begins with the finished map
+    connect_task = None  # Opens the serial connection in the background, so the GUI keeps running meanwhile
+
+    def request_start():
+        # Called by the Start button; connecting and reconnecting retry with backoff until the board answers
+        nonlocal connect_task
+        if serial_comm is None and connect_task is None:
+            print("Connecting...")
+            connect_task = asyncio.create_task(open_connection(serial_port, serial_baudrate, binary_protocol))
+
+    # The legend is static, so it is drawn once and only the changed areas are updated afterwards
+    screen.fill((255, 255, 255))
+    draw_legend(screen, GRID_SIZE, CELL_SIZE)
+    pygame.display.flip()
+
     while True:
-        time_delta = clock.tick(30) / 1000.0
-        current_mode, robot_position, robot_direction, serial_comm, start_time = handle_events(current_mode, robot_position, robot_direction, map_data, CELL_SIZE, GRID_SIZE, serial_comm, start_time, WIDTH, HEIGHT)
+        instrumentation.count('loops')
+        with instrumentation.stage('handle_events'):
+            current_mode, robot_position, robot_direction, serial_comm, start_time = handle_events(
+                current_mode, robot_position, robot_direction, map_data, CELL_SIZE, GRID_SIZE, serial_comm, start_time,
+                WIDTH, HEIGHT, serial_port=serial_port, serial_baudrate=serial_baudrate, viewport=viewport,
+                scheduler=scheduler, instrumentation=instrumentation, serial_binary=binary_protocol,
+                on_start=request_start, renderer=renderer)
         if current_mode is None:
+            shutdown(recorder, instrumentation, exchange, heatmap, controller, state_version)
             return
 
+        if connect_task is not None and connect_task.done():
+            serial_comm = connect_task.result()
+            connect_task = None
+            if start_time is None:
+                start_time = time.time()  # Record the start time
+                if robot_position:
+                    heatmap.visit(robot_position[0], robot_position[1])
+                if record_path:
+                    recorder = TrajectoryRecorder(record_path, map_data)
+            print("Serial communication initialized.")
+        elif serial_comm is not None and not serial_comm.alive():
+            print("Serial connection lost. Reconnecting...")
+            serial_comm.close()
+            serial_comm = None
+            exchange = None  # Frames in flight are lost with the connection
+            request_start()
+
         # Update robot position in the robot object
         if robot_position:
             robot.position = robot_position
             robot.direction = robot_direction
 
-        draw_grid(screen, map_data, robot_image, robot_direction, CELL_SIZE, GRID_SIZE)
-        draw_legend(screen, GRID_SIZE, CELL_SIZE)
-        draw_elapsed_time(screen, start_time, HEIGHT)  # Draw the elapsed time
+        if robot_position and serial_comm:
+            if exchange is None:
+                exchange = PipelinedExchange(serial_comm, window=max(1, pipeline_window), timeout=REPLY_TIMEOUT,
+                                             sequenced=pipeline_window > 0, binary=binary_protocol)
+            # Console output only at real time; at higher speeds it would dominate the run
+            verbose = not recorder and scheduler.time_scale == 1.0
 
-        manager.update(time_delta)
-        manager.draw_ui(screen)
-        pygame.display.flip()
-        
-        if robot_position:
-            sensors = controller.get_sensor_data()
-            print(f"Robot position: {robot.position}, direction: {robot.direction}")
-            print(f"Sensors: {sensors}")
-
-            # Send sensor data
-            if serial_comm:
-                send_sensor_data(serial_comm, sensors)
-
-                # Wait for motor movement command
-                received_data = await wait_for_data(serial_comm)
-                if received_data:
-                    command = received_data.decode('utf-8').strip()
-                    print(f"Received command: {command}")
+            for _ in scheduler.ticks():
+                tick_start = time.perf_counter()
+                instrumentation.count('ticks')
+                # Apply the motor movement commands that have arrived, without blocking the frame.
+                # Replies to sensor data of an older robot state are dropped.
+                for command, state, latency in exchange.poll():
+                    instrumentation.record('serial_round_trip', latency)
+                    if state != (state_version, robot.position, robot.direction):
+                        instrumentation.count('stale_replies')
+                        continue
+                    instrumentation.count('commands')
+                    if recorder:
+                        # The recording replaces the per-step console output, which is slow at high step rates
+                        sensors = format_sensor_data_as_bits(controller.get_sensor_data())[0]
+                        command_code = int(command) if command.isdigit() else NO_COMMAND
+                        recorder.record(state_version, robot.position[0], robot.position[1],
+                                        HEADING_INDEX[robot.direction], sensors, command_code, latency)
+                    elif verbose:
+                        print(f"Received command: {command} after {latency * 1000:.1f} ms")
                     if command == '1':
                         # Update map_data to reflect the robot's movement
-                        map_data[robot_position[1]][robot_position[0]] = 'V'  # Mark the old position as visited
+                        map_data.set(robot_position[0], robot_position[1], CellState.VISITED)  # Mark the old position as visited
                         robot.move_forward()
+                        if robot.position != robot_position:
+                            heatmap.visit(robot.position[0], robot.position[1])
                         robot_position = robot.position
-                        map_data[robot_position[1]][robot_position[0]] = 'R'  # Mark the new position as robot
+                        map_data.set(robot_position[0], robot_position[1], CellState.ROBOT)  # Mark the new position as robot
                     elif command == '2':
                         robot.turn_left()
                     elif command == '3':
                         robot.turn_right()
+                    state_version += 1
 
-                    # Update robot direction
+                    # Update robot direction, the renderer picks up the change on the next frame
                     robot_direction = robot.direction
 
-                    # Redraw the grid to update the robot's position
-                    draw_grid(screen, map_data, robot_image, robot_direction, CELL_SIZE, GRID_SIZE)
-                    draw_legend(screen, GRID_SIZE, CELL_SIZE)
-                    draw_elapsed_time(screen, start_time, HEIGHT)  # Draw the elapsed time
+                # Send the sensor data of the current state unless it is already in flight.
+                # Frames that time out leave the window, so the data is sent again.
+                state = (state_version, robot.position, robot.direction)
+                if state not in exchange.contexts() and exchange.can_send():
+                    sensors = controller.get_sensor_data()
+                    sequence_id = exchange.send(sensors, context=state)
+                    if verbose:
+                        print(f"Robot position: {robot.position}, direction: {robot.direction}")
+                        print(f"Sensors: {sensors}")
+                        print(f"Sent sensor frame {sequence_id}")
+                instrumentation.record('tick', time.perf_counter() - tick_start)
+
+        # Rendering runs at its own capped rate, independent of how many ticks ran
+        if scheduler.should_render():
+            instrumentation.count('frames')
+            instrumentation.counters['frames_skipped'] = scheduler.frames_skipped
+            if instrumentation.overlay_visible:
+                renderer.invalidate()  # The overlay covers the grid, so the grid is redrawn underneath it
+            with instrumentation.stage('render'):
+                dirty_rects = renderer.draw(robot_direction)
+                time_rect = draw_elapsed_time(screen, start_time, HEIGHT)  # Draw the elapsed time
+                if time_rect:
+                    dirty_rects.append(time_rect)
+                if instrumentation.overlay_visible:
+                    overlay_rect = draw_stats_overlay(screen, instrumentation.overlay_lines() + [heatmap_line(heatmap)])
+                    if overlay_rect:
+                        dirty_rects.append(overlay_rect)
+
+            with instrumentation.stage('ui'):
+                manager.update(scheduler.frame_delta)
+                manager.draw_ui(screen)
+            dirty_rects.append(start_button.rect)
+            with instrumentation.stage('display_update'):
+                pygame.display.update(dirty_rects)
 
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
+                shutdown(recorder, instrumentation, exchange, heatmap, controller, state_version)
                 pygame.quit()
                 return
             if event.type == pygame.USEREVENT:
                 if event.user_type == pygame_gui.UI_BUTTON_PRESSED:
                     if event.ui_element == start_button:
-                        if not serial_comm:
-                            # Initialize serial communication
-                            serial_comm = SerialCommunication(port='COM3', baudrate=9600)
-                            await asyncio.sleep(2)  # Wait for the serial connection to be established
-                            start_time = time.time()  # Record the start time
-                            print("Serial communication initialized.")
+                        request_start()
             manager.process_events(event)
 
+        await scheduler.wait()
+
+def main(argv=None, prog=None):
+    """
+    Parses the command line, opens the window and runs the simulator until it is closed.
+
+    Args:
+        argv (list of str): The command line arguments; None uses sys.argv.
+        prog (str): The program name shown in the usage, e.g. 'cli.py gui'.
+    """
+    global stats_path, tick_rate, max_fps, map_data, record_path, serial_port, serial_baudrate, pipeline_window, \
+        binary_protocol
+    parser = argparse.ArgumentParser(prog=prog, description="Vacuum robot simulator")
+    parser.add_argument('--port', default=DEFAULT_PORT,
+                        help="Serial port of the controller board, or 'emulator' to run the firmware in-process")
+    parser.add_argument('--baudrate', type=int, default=DEFAULT_BAUDRATE, help="Baud rate of the controller board")
+    parser.add_argument('--pipeline', type=int, default=0, metavar='WINDOW',
+                        help="Use sequence-numbered frames with up to WINDOW frames in flight")
+    parser.add_argument('--binary', action='store_true',
+                        help="Use the binary frame protocol with sequence numbers and CRC (combine with --pipeline)")
+    parser.add_argument('--record', metavar='PATH', help="Record the session to a trajectory file for replay.py")
+    parser.add_argument('--map', metavar='PATH', help="Map file (.map) or PNG floor plan to start with")
+    parser.add_argument('--tick-rate', type=float, default=30, help="Simulation ticks per second at 1x speed")
+    parser.add_argument('--fps', type=float, default=30, help="Maximum frames per second of the display")
+    parser.add_argument('--stats', metavar='PATH', help="Export stage timings at shutdown (.json or .csv)")
+    args = parser.parse_args(argv)
+    stats_path = args.stats
+    tick_rate = args.tick_rate
+    max_fps = args.fps
+    if args.map:
+        map_data = import_png(args.map) if args.map.lower().endswith('.png') else open_map(args.map)
+    record_path = args.record
+    serial_port = args.port
+    serial_baudrate = args.baudrate
+    pipeline_window = args.pipeline
+    binary_protocol = args.binary
+    asyncio.run(test_robot_sensors_in_gui())
+
 if __name__ == "__main__":
-    asyncio.run(test_robot_sensors_in_gui())
\ No newline at end of file
+    main()
@@ -0,0 +1,148 @@
+import os
+import struct
+import numpy as np
+from grid import Grid, CellState
+
+# File layout: header, then height * width uint8 cell codes in row-major order
+MAP_MAGIC = b'RMAP'
+MAP_VERSION = 1
+# magic, version, header size, width, height, then the number of cells per CellState
+HEADER = struct.Struct('<4sHHII' + 'Q' * len(CellState))
+# The cell array starts on a page-friendly boundary, so it can be mapped without copying
+DATA_OFFSET = 64
+
+# Colors used for PNG export, and matched exactly on import
+PNG_COLORS = {
+    CellState.UNVISITED: (200, 200, 200),
+    CellState.VISITED: (0, 255, 0),
+    CellState.OBSTACLE: (255, 0, 0),
+    CellState.IDENTIFIED: (0, 0, 255),
+    CellState.ROBOT: (255, 255, 0),
+}
+
+def _write_header(file, width, height, counts):
+    file.seek(0)
+    file.write(HEADER.pack(MAP_MAGIC, MAP_VERSION, DATA_OFFSET, width, height, *counts).ljust(DATA_OFFSET, b'\0'))
+
+def save_map(path, grid):
+    """
+    Writes a grid to a map file.
+
+    Args:
+        path (str): The file to write.
+        grid (Grid): The grid to save.
+    """
+    with open(path, 'wb') as file:
+        _write_header(file, grid.width, grid.height, [grid.count(state) for state in CellState])
+        file.write(np.ascontiguousarray(grid.cells).tobytes())
+
+def create_map(path, width, height):
+    """
+    Creates a map file with every cell unvisited and opens it.
+
+    The file is extended without writing the cells, so even very large maps are created instantly on file
+    systems with sparse files.
+
+    Args:
+        path (str): The file to create.
+        width (int): The number of columns.
+        height (int): The number of rows.
+
+    Returns:
+        MapFile: The opened map.
+    """
+    counts = [0] * len(CellState)
+    counts[CellState.UNVISITED] = width * height
+    with open(path, 'wb') as file:
+        _write_header(file, width, height, counts)
+        file.truncate(DATA_OFFSET + width * height)
+    return MapFile(path, mode='r+')
+
+class MapFile:
+    def __init__(self, path, mode='c'):
+        """
+        Opens a map file as a grid backed by a memory map.
+
+        Nothing but the header is read: the operating system pages cells in when they are first touched.
+
+        Args:
+            path (str): The map file.
+            mode (str): 'r' for read-only, 'r+' to write changes back to the file, or 'c' to keep changes in
+                memory only.
+        """
+        with open(path, 'rb') as file:
+            fields = HEADER.unpack(file.read(HEADER.size))
+        magic, version, data_offset, width, height = fields[:5]
+        if magic != MAP_MAGIC or version != MAP_VERSION:
+            raise ValueError(f"{path} is not a version {MAP_VERSION} map file")
+        if os.path.getsize(path) < data_offset + width * height:
+            raise ValueError(f"{path} is truncated")
+        self.path = path
+        self.mode = mode
+        self.cells = np.memmap(path, dtype=np.uint8, mode=mode, offset=data_offset, shape=(height, width))
+        self.grid = Grid(width, height, cells=self.cells, counts=fields[5:])
+
+    def flush(self):
+        """Writes changed cells and the current cell counts back to the file. Only valid in 'r+' mode."""
+        if self.mode != 'r+':
+            raise ValueError(f"Map opened in mode {self.mode!r} can't be written back")
+        self.cells.flush()
+        with open(self.path, 'r+b') as file:
+            _write_header(file, self.grid.width, self.grid.height, [self.grid.count(state) for state in CellState])
+
+    def close(self):
+        """Flushes a writable map. The memory map itself is released once the grid is no longer referenced."""
+        if self.mode == 'r+':
+            self.flush()
+
+def open_map(path, mode='c'):
+    """
+    Opens a map file as a memory-mapped grid.
+
+    Args:
+        path (str): The map file.
+        mode (str): See MapFile.
+
+    Returns:
+        Grid: The grid. Its cells stay valid for as long as the grid is referenced.
+    """
+    return MapFile(path, mode=mode).grid
+
+def import_png(path, threshold=128):
+    """
+    Converts a PNG floor plan into a grid.
+
+    Pixels in one of the PNG_COLORS become that state; any other pixel darker than the threshold becomes an
+    obstacle and everything else is unvisited. Each pixel is one cell.
+
+    Args:
+        path (str): The image file.
+        threshold (int): The brightness (0-255) below which a pixel is an obstacle.
+
+    Returns:
+        Grid: The new grid.
+    """
+    # pygame is only needed for PNG conversion, so headless users of map files don't have to install it
+    import pygame
+    pixels = pygame.surfarray.array3d(pygame.image.load(path)).transpose(1, 0, 2).astype(np.int32)
+    brightness = pixels @ np.array([299, 587, 114]) // 1000
+    cells = np.where(brightness < threshold, CellState.OBSTACLE, CellState.UNVISITED).astype(np.uint8)
+    packed = pixels[..., 0] << 16 | pixels[..., 1] << 8 | pixels[..., 2]
+    for state, (red, green, blue) in PNG_COLORS.items():
+        cells[packed == (red << 16 | green << 8 | blue)] = state
+    return Grid(cells.shape[1], cells.shape[0], cells=cells)
+
+def export_png(path, grid):
+    """
+    Saves a grid as a PNG image with one pixel per cell, colored with PNG_COLORS.
+
+    Args:
+        path (str): The image file to write.
+        grid (Grid): The grid to save.
+    """
+    import pygame
+    palette = np.zeros((len(CellState), 3), dtype=np.uint8)
+    for state, color in PNG_COLORS.items():
+        palette[state] = color
+    pixels = palette[np.asarray(grid.cells)]
+    pygame.image.save(pygame.surfarray.make_surface(pixels.transpose(1, 0, 2)), path)
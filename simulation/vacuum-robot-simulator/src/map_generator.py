@@ -0,0 +1,295 @@
+import argparse
+import hashlib
+import json
+import os
+import random
+import numpy as np
+from grid import Grid, CellState
+from map_file import save_map, open_map
+
+# Bumped whenever a generator produces different maps for the same parameters, so old cache entries are unused
+GENERATOR_VERSION = 1
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'vacuum-robot-simulator', 'maps')
+
+class _FloorPlan:
+    def __init__(self, width, height, rng, min_room, max_room, door_width, corridor_width, corridor_span):
+        self.obstacle = np.zeros((height, width), dtype=bool)
+        self.width = width
+        self.height = height
+        self.rng = rng
+        self.min_room = min_room
+        self.max_room = max_room
+        self.door_width = door_width
+        self.corridor_width = corridor_width
+        self.corridor_span = corridor_span
+        self.rooms = []
+
+    def _wall_positions(self, x0, y0, x1, y1, vertical, thickness):
+        """
+        Returns the positions where a split of the region may start.
+
+        A wall may only end against another wall or the map border, never in a doorway, so earlier doorways
+        stay open. thickness is 1 for a wall and corridor_width + 2 for a corridor with its two walls.
+        """
+        if vertical:
+            low, high, start, end, size = x0, x1, y0, y1, self.height
+        else:
+            low, high, start, end, size = y0, y1, x0, x1, self.width
+        candidates = np.arange(low + self.min_room, high - self.min_room - thickness + 1)
+        if len(candidates) == 0:
+            return candidates
+
+        def closed(line):
+            # Wall cells just outside the region, at every candidate start, for both walls of a corridor
+            if line < 0 or line >= size:
+                return np.ones(len(candidates), dtype=bool)
+            row = self.obstacle[:, line] if not vertical else self.obstacle[line]
+            ends = row[candidates]
+            if thickness > 1:
+                ends = ends & row[candidates + thickness - 1]
+            return ends
+
+        return candidates[closed(start - 1) & closed(end)]
+
+    def _door(self, x0, y0, x1, y1, vertical, position):
+        """Cuts one doorway into the wall at position for every max_room cells of its length."""
+        start, end = (y0, y1) if vertical else (x0, x1)
+        length = end - start
+        doors = max(1, length // self.max_room)
+        segment = length / doors
+        for door in range(doors):
+            low = start + int(door * segment)
+            high = max(low, start + int((door + 1) * segment) - self.door_width)
+            offset = self.rng.randint(low, high)
+            if vertical:
+                self.obstacle[offset:offset + self.door_width, position] = False
+            else:
+                self.obstacle[position, offset:offset + self.door_width] = False
+
+    def split(self):
+        """Partitions the map into rooms and corridors."""
+        stack = [(0, 0, self.width, self.height)]
+        while stack:
+            x0, y0, x1, y1 = stack.pop()
+            width, height = x1 - x0, y1 - y0
+            if max(width, height) <= self.max_room:
+                self.rooms.append((x0, y0, x1, y1))
+                continue
+            vertical = width > height if width != height else self.rng.random() < 0.5
+            span = width if vertical else height
+            thickness = self.corridor_width + 2 if span >= self.corridor_span else 1
+            positions = self._wall_positions(x0, y0, x1, y1, vertical, thickness)
+            if len(positions) == 0 and thickness > 1:
+                thickness = 1
+                positions = self._wall_positions(x0, y0, x1, y1, vertical, thickness)
+            if len(positions) == 0:
+                self.rooms.append((x0, y0, x1, y1))
+                continue
+            position = int(positions[self.rng.randrange(len(positions))])
+            last = position + thickness - 1
+            for wall in (position, last) if last != position else (position,):
+                if vertical:
+                    self.obstacle[y0:y1, wall] = True
+                else:
+                    self.obstacle[wall, x0:x1] = True
+                self._door(x0, y0, x1, y1, vertical, wall)
+            if vertical:
+                stack.append((last + 1, y0, x1, y1))
+                stack.append((x0, y0, position, y1))
+            else:
+                stack.append((x0, last + 1, x1, y1))
+                stack.append((x0, y0, x1, position))
+
+    def _place(self, x, y, width, height):
+        """Places a piece of furniture unless it would touch another one, diagonals included."""
+        if self.obstacle[y - 1:y + height + 1, x - 1:x + width + 1].any():
+            return False
+        self.obstacle[y:y + height, x:x + width] = True
+        return True
+
+    def furnish(self, pieces, piece_size):
+        """
+        Places furniture clusters, a table with chairs around it, in every room.
+
+        Pieces keep one free cell to the room's walls and to each other, so none of them can close off any
+        free space: the map stays connected and the cells along the walls stay free.
+        """
+        rng = self.rng
+        for x0, y0, x1, y1 in self.rooms:
+            for _ in range(pieces):
+                width, height = rng.randint(*piece_size), rng.randint(*piece_size)
+                if x1 - x0 < width + 2 or y1 - y0 < height + 2:
+                    continue
+                x, y = rng.randint(x0 + 1, x1 - 1 - width), rng.randint(y0 + 1, y1 - 1 - height)
+                if not self._place(x, y, width, height):
+                    continue
+                # Chairs one cell away from the table, every other cell along each side
+                for chair_x in range(x, x + width, 2):
+                    for chair_y in (y - 2, y + height + 1):
+                        if y0 + 1 <= chair_y < y1 - 1 and rng.random() < 0.5:
+                            self._place(chair_x, chair_y, 1, 1)
+                for chair_y in range(y, y + height, 2):
+                    for chair_x in (x - 2, x + width + 1):
+                        if x0 + 1 <= chair_x < x1 - 1 and rng.random() < 0.5:
+                            self._place(chair_x, chair_y, 1, 1)
+
+def generate_floor_plan(width, height, seed, min_room=5, max_room=16, door_width=2, corridor_width=3,
+                        corridor_span=64, furniture=2, furniture_size=(2, 4)):
+    """
+    Generates a floor plan: rooms with doorways, corridors through large areas and furniture clusters.
+
+    The map is split recursively (binary space partitioning) by one-cell walls, or by a corridor between two
+    walls where a region spans corridor_span cells. Every wall has doorways and only ends against another
+    wall, so all free cells are connected. Cells are written as array slices, so the Python work grows with
+    the number of rooms, not cells: a 1000x1000 map takes a fraction of a second.
+
+    Args:
+        width (int): The number of columns.
+        height (int): The number of rows.
+        seed (int): The seed; the same seed and parameters always give the same map.
+        min_room (int): The smallest room width or height in cells.
+        max_room (int): Regions larger than this in either direction are split further.
+        door_width (int): The width of a doorway in cells.
+        corridor_width (int): The width of a corridor in cells.
+        corridor_span (int): Regions at least this long are split by a corridor instead of a wall.
+        furniture (int): The number of furniture clusters tried per room.
+        furniture_size (tuple): The smallest and largest table side in cells.
+
+    Returns:
+        Grid: The map. The cells along the map border are free, e.g. the start cell (0, 0).
+    """
+    plan = _FloorPlan(width, height, random.Random(seed), min_room, max_room, door_width, corridor_width,
+                      corridor_span)
+    plan.split()
+    plan.furnish(furniture, tuple(furniture_size))
+    cells = np.where(plan.obstacle, CellState.OBSTACLE, CellState.UNVISITED).astype(np.uint8)
+    return Grid(width, height, cells=cells)
+
+def generate_scatter(width, height, seed, obstacle_ratio=0.1):
+    """
+    Generates a map with randomly scattered obstacle cells, which is not necessarily connected.
+
+    Args:
+        width (int): The number of columns.
+        height (int): The number of rows.
+        seed (int): The seed for the random number generator.
+        obstacle_ratio (float): The probability of a cell being an obstacle.
+
+    Returns:
+        Grid: The map; cell (0, 0) is always free.
+    """
+    rng = np.random.default_rng(seed)
+    cells = np.where(rng.random((height, width)) < obstacle_ratio, CellState.OBSTACLE, CellState.UNVISITED)
+    cells = cells.astype(np.uint8)
+    cells[0, 0] = CellState.UNVISITED
+    return Grid(width, height, cells=cells)
+
+GENERATORS = {
+    'floor_plan': generate_floor_plan,
+    'scatter': generate_scatter,
+}
+
+def cache_path(generator, width, height, seed, params, cache_dir=DEFAULT_CACHE_DIR):
+    """
+    Returns the cache file of a generated map.
+
+    Args:
+        generator (str): A key of GENERATORS.
+        width (int): The number of columns.
+        height (int): The number of rows.
+        seed (int): The seed.
+        params (dict): The generator's keyword arguments.
+        cache_dir (str): The cache directory.
+
+    Returns:
+        str: The path of the map file.
+    """
+    key = json.dumps([generator, GENERATOR_VERSION, width, height, seed, sorted(params.items())])
+    digest = hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+    return os.path.join(cache_dir, f"{generator}-{width}x{height}-{seed}-{digest}.map")
+
+def load_or_generate(generator, width, height, seed, cache_dir=DEFAULT_CACHE_DIR, **params):
+    """
+    Returns a generated map from the disk cache, generating and caching it on the first request.
+
+    Maps are stored in the map file format and opened memory-mapped in copy-on-write mode, so a simulation
+    may change the returned grid without touching the cache. Files are written under a temporary name and
+    renamed, so parallel workers can fill the cache at the same time.
+
+    Args:
+        generator (str): A key of GENERATORS.
+        width (int): The number of columns.
+        height (int): The number of rows.
+        seed (int): The seed.
+        cache_dir (str): The cache directory, or None to generate without caching.
+        **params: Keyword arguments of the generator.
+
+    Returns:
+        Grid: The map.
+    """
+    if cache_dir is None:
+        return GENERATORS[generator](width, height, seed, **params)
+    path = cache_path(generator, width, height, seed, params, cache_dir)
+    if not os.path.exists(path):
+        grid = GENERATORS[generator](width, height, seed, **params)
+        os.makedirs(cache_dir, exist_ok=True)
+        temporary = f"{path}.{os.getpid()}.tmp"
+        save_map(temporary, grid)
+        os.replace(temporary, path)
+    return open_map(path)
+
+def benchmark_corpus(sizes, seeds, generator='floor_plan', cache_dir=DEFAULT_CACHE_DIR, **params):
+    """
+    Returns a reproducible set of maps, one per size and seed, from the disk cache.
+
+    Args:
+        sizes (iterable of tuple): The (width, height) of the maps.
+        seeds (iterable of int): The seeds.
+        generator (str): A key of GENERATORS.
+        cache_dir (str): The cache directory, or None to generate without caching.
+        **params: Keyword arguments of the generator.
+
+    Returns:
+        list of Grid: The maps, ordered by size, then seed.
+    """
+    seeds = list(seeds)
+    return [load_or_generate(generator, width, height, seed, cache_dir=cache_dir, **params)
+            for width, height in sizes for seed in seeds]
+
+def main(argv=None, prog=None):
+    """
+    Generates a map from the command line and saves it as a map file or PNG.
+
+    Args:
+        argv (list of str): The command line arguments; None uses sys.argv.
+        prog (str): The program name shown in the usage, e.g. 'cli.py maps'.
+    """
+    parser = argparse.ArgumentParser(prog=prog, description="Generate a map")
+    parser.add_argument('width', type=int)
+    parser.add_argument('height', type=int)
+    parser.add_argument('--generator', choices=sorted(GENERATORS), default='floor_plan')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--min-room', type=int, help="Smallest room side (floor_plan)")
+    parser.add_argument('--max-room', type=int, help="Largest room side before it is split (floor_plan)")
+    parser.add_argument('--obstacles', type=float, help="Obstacle ratio (scatter)")
+    parser.add_argument('--out', metavar='PATH', help="Write the map to a .map or .png file")
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR)
+    parser.add_argument('--no-cache', action='store_true', help="Generate without reading or filling the cache")
+    args = parser.parse_args(argv)
+
+    names = {'min_room': args.min_room, 'max_room': args.max_room, 'obstacle_ratio': args.obstacles}
+    params = {name: value for name, value in names.items() if value is not None}
+    grid = load_or_generate(args.generator, args.width, args.height, args.seed,
+                            cache_dir=None if args.no_cache else args.cache_dir, **params)
+    print(f"{args.generator} {args.width}x{args.height} seed {args.seed}: "
+          f"{grid.count(CellState.OBSTACLE) / (args.width * args.height):.1%} obstacles")
+    if args.out:
+        if args.out.lower().endswith('.png'):
+            from map_file import export_png
+            export_png(args.out, grid)
+        else:
+            save_map(args.out, grid)
+        print(f"Map written to {args.out}")
+
+if __name__ == "__main__":
+    main()
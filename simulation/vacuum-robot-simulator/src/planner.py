@@ -0,0 +1,281 @@
+import abc
+from collections import deque
+from grid import Grid, CellState
+from frontier import FrontierIndex
+from robot import HEADING_INDEX, DIRECTION_OFFSETS
+
+def path_to_commands(path, direction):
+    """
+    Converts a path of 4-connected positions into robot commands.
+
+    Args:
+        path (list of tuple): The positions (x, y) to visit, starting with the current position.
+        direction (str): The direction the robot is facing at the start ('N', 'E', 'S', 'W').
+
+    Returns:
+        list of str: The commands ('F', 'L', 'R') that drive the robot along the path.
+    """
+    commands = []
+    heading = HEADING_INDEX[direction]
+    for (x0, y0), (x1, y1) in zip(path, path[1:]):
+        target = DIRECTION_OFFSETS.index((x1 - x0, y1 - y0))
+        turn = (target - heading) % 4
+        if turn == 1:
+            commands.append('R')
+        elif turn == 2:
+            commands.extend(('R', 'R'))
+        elif turn == 3:
+            commands.append('L')
+        heading = target
+        commands.append('F')
+    return commands
+
+def shortest_path(free, start, is_goal):
+    """
+    Finds the shortest 4-connected path from a start to the nearest goal cell with a breadth-first search.
+
+    Args:
+        free (list of list of bool): Whether each cell [y][x] can be driven on.
+        start (tuple): The start position (x, y).
+        is_goal (callable): Returns True for a goal position (x, y).
+
+    Returns:
+        list of tuple: The positions from start to the goal, or None if no goal is reachable.
+    """
+    height, width = len(free), len(free[0])
+    parents = {start: None}
+    queue = deque([start])
+    while queue:
+        position = queue.popleft()
+        if is_goal(position):
+            path = []
+            while position is not None:
+                path.append(position)
+                position = parents[position]
+            return path[::-1]
+        x, y = position
+        for dx, dy in DIRECTION_OFFSETS:
+            neighbour = (x + dx, y + dy)
+            if 0 <= neighbour[0] < width and 0 <= neighbour[1] < height and free[neighbour[1]][neighbour[0]] \
+                    and neighbour not in parents:
+                parents[neighbour] = position
+                queue.append(neighbour)
+    return None
+
+def _walk_column(path, x, y_from, y_to):
+    """Appends the positions from y_from (exclusive) to y_to (inclusive) in column x to the path."""
+    step = 1 if y_to > y_from else -1
+    for y in range(y_from + step, y_to + step, step):
+        path.append((x, y))
+
+class CoveragePlanner(abc.ABC):
+    def __init__(self, grid):
+        """
+        Base class of the coverage planners; subclasses implement plan_path.
+
+        Args:
+            grid (Grid): The grid to cover. Obstacles are read once when the planner is created.
+        """
+        self.grid = grid
+        self.free = (~grid.obstacle_mask()).tolist()
+
+    def check_start(self, start):
+        """
+        Checks that a start position is a free cell of the grid.
+
+        Args:
+            start (tuple): The start position (x, y).
+
+        Raises:
+            ValueError: If the start is outside the grid or an obstacle.
+        """
+        x, y = start
+        if not (0 <= x < self.grid.width and 0 <= y < self.grid.height):
+            raise ValueError(f"Start {start} is outside the {self.grid.width}x{self.grid.height} grid")
+        if not self.free[y][x]:
+            raise ValueError(f"Start {start} is an obstacle")
+
+    @abc.abstractmethod
+    def plan_path(self, start):
+        """
+        Computes the sequence of positions that covers every free cell reachable from the start.
+
+        Args:
+            start (tuple): The start position (x, y).
+
+        Returns:
+            list of tuple: The positions to visit, starting with the start position.
+
+        Raises:
+            ValueError: If the start is outside the grid or an obstacle.
+        """
+
+    def plan(self, start, direction):
+        """
+        Computes the commands that cover every free cell reachable from the start.
+
+        Args:
+            start (tuple): The start position (x, y).
+            direction (str): The direction the robot is facing at the start ('N', 'E', 'S', 'W').
+
+        Returns:
+            list of str: The commands ('F', 'L', 'R') for RobotController.process_command.
+        """
+        return path_to_commands(self.plan_path(start), direction)
+
+    def make_policy(self, start, direction):
+        """
+        Wraps a plan as a policy for the headless simulation.
+
+        The plan is computed up front from the map, so the sensor readings are not used.
+
+        Args:
+            start (tuple): The start position (x, y).
+            direction (str): The direction the robot is facing at the start ('N', 'E', 'S', 'W').
+
+        Returns:
+            callable: A policy returning the next planned command, or None when the plan is done.
+        """
+        commands = iter(self.plan(start, direction))
+
+        def policy(sensors):
+            return next(commands, None)
+
+        return policy
+
+class FrontierPlanner(CoveragePlanner):
+    """Greedy exploration that always drives to the nearest cell not covered yet, found with a FrontierIndex."""
+
+    def plan_path(self, start):
+        self.check_start(start)
+        # Plan on a scratch copy so covering cells does not touch the caller's grid
+        scratch = Grid(self.grid.width, self.grid.height, fill=CellState.VISITED)
+        scratch.cells[self.grid.obstacle_mask()] = CellState.OBSTACLE
+        scratch.cells[~self.grid.obstacle_mask()] = CellState.UNVISITED
+        scratch.recount()
+        index = FrontierIndex(scratch)
+        scratch.set(start[0], start[1], CellState.VISITED)
+        path = [start]
+        while True:
+            leg = index.nearest_frontier(*path[-1])
+            if leg is None:
+                return path
+            for x, y in leg[1:]:
+                scratch.set(x, y, CellState.VISITED)
+            path.extend(leg[1:])
+
+class BoustrophedonPlanner(CoveragePlanner):
+    """
+    Boustrophedon cell decomposition: free space is split into cells that can each be covered by
+    back-and-forth sweeps along the columns, and the cells are visited in depth-first order.
+    """
+
+    def decompose(self):
+        """
+        Splits the free space into boustrophedon cells by sweeping a vertical line from left to right.
+
+        A cell continues into the next column while exactly one free segment there overlaps exactly one
+        segment of the cell; splits, merges and new segments start new cells.
+
+        Returns:
+            tuple: The cells as lists of (x, top, bottom) column segments, and the set of adjacent cell
+            index pairs.
+        """
+        height = len(self.free)
+        width = len(self.free[0])
+        cells = []
+        adjacency = set()
+        previous = []  # (top, bottom, cell index) of the segments in the previous column
+        for x in range(width):
+            segments = []
+            y = 0
+            while y < height:
+                if self.free[y][x]:
+                    top = y
+                    while y < height and self.free[y][x]:
+                        y += 1
+                    segments.append((top, y - 1))
+                else:
+                    y += 1
+
+            current = []
+            for top, bottom in segments:
+                overlapping = [entry for entry in previous if entry[0] <= bottom and top <= entry[1]]
+                cell = None
+                if len(overlapping) == 1:
+                    prev_top, prev_bottom, prev_cell = overlapping[0]
+                    shared = [segment for segment in segments if segment[0] <= prev_bottom and prev_top <= segment[1]]
+                    if len(shared) == 1:
+                        cell = prev_cell
+                if cell is None:
+                    cell = len(cells)
+                    cells.append([])
+                    for _, _, prev_cell in overlapping:
+                        adjacency.add((prev_cell, cell))
+                cells[cell].append((x, top, bottom))
+                current.append((top, bottom, cell))
+            previous = current
+        return cells, adjacency
+
+    def _sweep_cell(self, path, segments):
+        """
+        Appends a back-and-forth sweep over the column segments of one cell to the path.
+
+        Args:
+            path (list of tuple): The path so far; its last position is on the first segment.
+            segments (list of tuple): The (x, top, bottom) segments in sweep order.
+        """
+        x, y = path[-1]
+        for index, (column, top, bottom) in enumerate(segments):
+            if index > 0:
+                # Move along the covered column to a row shared with the next one, then step across
+                _, prev_top, prev_bottom = segments[index - 1]
+                target = min(max(y, top, prev_top), bottom, prev_bottom)
+                _walk_column(path, x, y, target)
+                x, y = column, target
+                path.append((x, y))
+            # Sweep to the nearer end first, then to the far end
+            near, far = (top, bottom) if y - top <= bottom - y else (bottom, top)
+            _walk_column(path, x, y, near)
+            _walk_column(path, x, near, far)
+            y = far
+
+    def plan_path(self, start):
+        self.check_start(start)
+        cells, adjacency = self.decompose()
+        neighbours = {index: set() for index in range(len(cells))}
+        for a, b in adjacency:
+            neighbours[a].add(b)
+            neighbours[b].add(a)
+        cell_of = {}
+        for index, segments in enumerate(cells):
+            for x, top, bottom in segments:
+                for y in range(top, bottom + 1):
+                    cell_of[(x, y)] = index
+
+        # Depth-first order over the cell adjacency graph, starting at the start cell
+        order = []
+        seen = set()
+        stack = [cell_of[start]]
+        while stack:
+            index = stack.pop()
+            if index in seen:
+                continue
+            seen.add(index)
+            order.append(index)
+            stack.extend(sorted(neighbours[index] - seen, reverse=True))
+
+        path = [start]
+        for index in order:
+            segments = cells[index]
+            # Sweep from the side closer to the robot
+            if abs(path[-1][0] - segments[-1][0]) < abs(path[-1][0] - segments[0][0]):
+                segments = segments[::-1]
+            first_column = segments[0][0]
+            leg = shortest_path(self.free, path[-1], lambda position: position[0] == first_column
+                                and cell_of.get(position) == index)
+            if leg is None:
+                continue
+            path.extend(leg[1:])
+            self._sweep_cell(path, segments)
+        return path
@@ -0,0 +1,145 @@
+import numpy as np
+
+# Binary frame: SYNC, VERSION, sequence number, reading count, the readings packed two per byte, CRC-8.
+# Sensor frames carry the nibbles of format_sensor_data_as_bits, reply frames the movement codes. SYNC can
+# neither be a sensor byte (0x00-0x0F) nor a sequence ID byte (SEQUENCE_FLAG set) of the older protocols,
+# so the firmware accepts all of them on the same link.
+SYNC = 0x5A
+VERSION = 1
+HEADER_SIZE = 4
+MAX_COUNT = 64  # Readings per frame; keeps a frame within the firmware's receive buffer
+SEQUENCE_MODULO = 256
+CRC_POLYNOMIAL = 0x07  # CRC-8 (SMBus): x^8 + x^2 + x + 1, initial value 0
+
+def _crc_table():
+    table = []
+    for byte in range(256):
+        crc = byte
+        for _ in range(8):
+            crc = ((crc << 1) ^ CRC_POLYNOMIAL) & 0xFF if crc & 0x80 else (crc << 1) & 0xFF
+        table.append(crc)
+    return bytes(table)
+
+CRC_TABLE = _crc_table()
+
+def crc8(data):
+    """
+    Computes the CRC-8 of a frame, the same as the firmware's crc8.
+
+    Args:
+        data (bytes): The bytes to check.
+
+    Returns:
+        int: The CRC between 0 and 255.
+    """
+    crc = 0
+    for byte in data:
+        crc = CRC_TABLE[crc ^ byte]
+    return crc
+
+def frame_size(count):
+    """
+    Returns the size of a frame in bytes.
+
+    Args:
+        count (int): The number of readings in the frame.
+
+    Returns:
+        int: The size including header and CRC.
+    """
+    return HEADER_SIZE + (count + 1) // 2 + 1
+
+def pack_nibbles(values):
+    """
+    Packs 4-bit values two per byte, the first value in the high nibble.
+
+    Args:
+        values (sequence of int): The values between 0 and 15.
+
+    Returns:
+        bytes: The packed values; an odd count leaves the last low nibble 0.
+    """
+    values = np.asarray(values, dtype=np.uint8)
+    if len(values) % 2:
+        values = np.append(values, np.uint8(0))
+    return ((values[0::2] << 4) | (values[1::2] & 0x0F)).tobytes()
+
+def unpack_nibbles(data, count):
+    """
+    Unpacks 4-bit values packed by pack_nibbles.
+
+    Args:
+        data (bytes): The packed values.
+        count (int): The number of values.
+
+    Returns:
+        numpy.ndarray: The values as uint8.
+    """
+    packed = np.frombuffer(data, dtype=np.uint8)
+    values = np.empty(len(packed) * 2, dtype=np.uint8)
+    values[0::2] = packed >> 4
+    values[1::2] = packed & 0x0F
+    return values[:count]
+
+def encode_frame(sequence_id, values):
+    """
+    Builds a frame.
+
+    Args:
+        sequence_id (int): The sequence number, between 0 and 255. Replies echo it.
+        values (sequence of int): 1 to MAX_COUNT sensor nibbles or movement codes.
+
+    Returns:
+        bytes: The frame.
+    """
+    if not 1 <= len(values) <= MAX_COUNT:
+        raise ValueError(f"a frame holds 1 to {MAX_COUNT} readings, not {len(values)}")
+    body = bytes([VERSION, sequence_id, len(values)]) + pack_nibbles(values)
+    return bytes([SYNC]) + body + bytes([crc8(body)])
+
+class FrameDecoder:
+    def __init__(self):
+        """
+        Splits a byte stream into binary frames, the counterpart of FrameBuffer for the binary protocol.
+
+        Bytes before a SYNC byte are skipped. A frame with an unknown version, an invalid count or a wrong CRC
+        is dropped by skipping its SYNC byte only, so a frame starting inside the damaged one is still found.
+        """
+        self._buffer = bytearray()
+        self.errors = 0  # Dropped frames
+
+    def feed(self, chunk):
+        """
+        Appends received bytes and returns every valid frame they complete.
+
+        Args:
+            chunk (bytes): The received bytes.
+
+        Returns:
+            list of tuple: (sequence ID, numpy.ndarray of values) per frame.
+        """
+        buffer = self._buffer
+        buffer.extend(chunk)
+        frames = []
+        while True:
+            start = buffer.find(SYNC)
+            if start < 0:
+                buffer.clear()
+                return frames
+            del buffer[:start]
+            if len(buffer) < HEADER_SIZE:
+                return frames
+            version, sequence_id, count = buffer[1], buffer[2], buffer[3]
+            if version != VERSION or not 1 <= count <= MAX_COUNT:
+                self.errors += 1
+                del buffer[:1]
+                continue
+            size = frame_size(count)
+            if len(buffer) < size:
+                return frames
+            if crc8(buffer[1:size - 1]) != buffer[size - 1]:
+                self.errors += 1
+                del buffer[:1]
+                continue
+            frames.append((sequence_id, unpack_nibbles(bytes(buffer[HEADER_SIZE:size - 1]), count)))
+            del buffer[:size]
@@ -0,0 +1,112 @@
+import numpy as np
+from robot import HEADING_INDEX
+
+# Beam angles in degrees relative to the heading, clockwise; -90 looks left, 0 straight ahead
+DEFAULT_BEAM_ANGLES = (-90, -45, 0, 45, 90)
+DEFAULT_MAX_RANGE = 10.0  # In cells
+
+class RangeSensor:
+    def __init__(self, angles=DEFAULT_BEAM_ANGLES, max_range=DEFAULT_MAX_RANGE):
+        """
+        Distance sensor with several beams, simulated by ray marching through the grid (DDA).
+
+        Beams start at the center of the robot's cell and end at the edge of the first obstacle cell or at the
+        grid border. From a cell center a beam crosses the same sequence of cells wherever the robot stands, so
+        the sequences are traced once per heading here; a measurement then checks all cells of all beams of
+        all robots with a few array operations.
+
+        Args:
+            angles (sequence of float): The beam angles in degrees relative to the heading, clockwise.
+            max_range (float): The longest distance reported, in cells.
+        """
+        self.angles = tuple(angles)
+        self.max_range = float(max_range)
+        traces = [[self._trace(heading * 90.0 + angle) for angle in self.angles] for heading in range(4)]
+        length = max(len(trace) for beams in traces for trace in beams)
+        # Per heading, beam and crossing: the cell offset from the robot and the distance at which it is
+        # entered. Unused entries are marked invalid.
+        self._offset_x = np.zeros((4, len(self.angles), length), dtype=np.int64)
+        self._offset_y = np.zeros((4, len(self.angles), length), dtype=np.int64)
+        self._distance = np.full((4, len(self.angles), length), self.max_range)
+        self._valid = np.zeros((4, len(self.angles), length), dtype=bool)
+        for heading, beams in enumerate(traces):
+            for beam, trace in enumerate(beams):
+                if not trace:
+                    continue
+                offsets_x, offsets_y, distances = zip(*trace)
+                self._offset_x[heading, beam, :len(trace)] = offsets_x
+                self._offset_y[heading, beam, :len(trace)] = offsets_y
+                self._distance[heading, beam, :len(trace)] = distances
+                self._valid[heading, beam, :len(trace)] = True
+
+    def _trace(self, angle):
+        """
+        Walks one beam from the center of cell (0, 0) with DDA.
+
+        Args:
+            angle (float): The absolute beam angle in degrees, clockwise from north.
+
+        Returns:
+            list of tuple: (x offset, y offset, distance) of every cell entered within max_range.
+        """
+        radians = np.radians(angle)
+        # y grows downwards, so north is (0, -1); rounding noise would make axis-aligned beams very steep
+        dx = float(np.sin(radians)) if abs(np.sin(radians)) > 1e-12 else 0.0
+        dy = float(-np.cos(radians)) if abs(np.cos(radians)) > 1e-12 else 0.0
+        step_x, step_y = (dx > 0) - (dx < 0), (dy > 0) - (dy < 0)
+        # Distance between two crossings of a vertical or horizontal cell boundary; the first is half a cell away
+        delta_x = abs(1 / dx) if dx else float('inf')
+        delta_y = abs(1 / dy) if dy else float('inf')
+        next_x, next_y = delta_x / 2, delta_y / 2
+        x = y = 0
+        trace = []
+        while min(next_x, next_y) <= self.max_range:
+            if next_x < next_y:
+                x += step_x
+                trace.append((x, y, next_x))
+                next_x += delta_x
+            else:
+                y += step_y
+                trace.append((x, y, next_y))
+                next_y += delta_y
+        return trace
+
+    def cast(self, grid, xs, ys, headings):
+        """
+        Measures the distances of all beams of several robots.
+
+        Args:
+            grid (Grid or ChunkedGrid): The map.
+            xs (numpy.ndarray): The column of each robot.
+            ys (numpy.ndarray): The row of each robot.
+            headings (numpy.ndarray): The heading index of each robot, see robot.DIRECTIONS.
+
+        Returns:
+            numpy.ndarray: The distance in cells per robot and beam, shape (robots, beams); max_range where a
+            beam hits nothing within range.
+        """
+        headings = np.asarray(headings, dtype=np.intp)
+        cells_x = np.asarray(xs, dtype=np.int64)[:, np.newaxis, np.newaxis] + self._offset_x[headings]
+        cells_y = np.asarray(ys, dtype=np.int64)[:, np.newaxis, np.newaxis] + self._offset_y[headings]
+        inside = (cells_x >= 0) & (cells_x < grid.width) & (cells_y >= 0) & (cells_y < grid.height)
+        hit = ~inside
+        hit[inside] = grid.obstacle_mask_at(cells_x[inside], cells_y[inside])
+        hit &= self._valid[headings]
+        first = hit.argmax(axis=2)[..., np.newaxis]
+        distances = np.take_along_axis(self._distance[headings], first, axis=2)[..., 0]
+        return np.where(hit.any(axis=2), distances, self.max_range)
+
+    def measure(self, grid, x, y, direction):
+        """
+        Measures the distances of all beams of one robot.
+
+        Args:
+            grid (Grid or ChunkedGrid): The map.
+            x (int): The column of the robot.
+            y (int): The row of the robot.
+            direction (str): The direction the robot is facing ('N', 'E', 'S', 'W').
+
+        Returns:
+            list of float: The distance per beam in cells, in the order of angles.
+        """
+        return self.cast(grid, [x], [y], [HEADING_INDEX[direction]])[0].tolist()
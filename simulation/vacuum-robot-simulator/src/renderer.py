@@ -0,0 +1,105 @@
+import numpy as np
+import pygame
+from grid import CellState
+
+# Fill colors for the non-robot cell states
+CELL_COLORS = {
+    CellState.UNVISITED: (200, 200, 200),
+    CellState.VISITED: (0, 255, 0),
+    CellState.OBSTACLE: (255, 0, 0),  # Obstacle Unidentified
+    CellState.IDENTIFIED: (0, 0, 255),  # Obstacle Identified
+}
+
+# Rotation of the robot sprite for each direction, in degrees counter-clockwise
+ROBOT_ROTATIONS = {'N': 0, 'E': -90, 'S': 180, 'W': 90}
+ROBOT_BACKGROUND = (255, 255, 255)
+
+class GridRenderer:
+    def __init__(self, screen, grid, robot_image, cell_size):
+        """
+        Initializes an incremental renderer that only redraws the cells that changed.
+
+        Args:
+            screen (pygame.Surface): The Pygame screen to draw on.
+            grid (Grid): The grid to draw.
+            robot_image (pygame.Surface): The image of the robot facing north.
+            cell_size (int): The size of each cell in pixels.
+        """
+        self.screen = screen
+        self.grid = grid
+        self.cell_size = cell_size
+        self.robot_sprites = {direction: pygame.transform.rotate(robot_image, angle)
+                              for direction, angle in ROBOT_ROTATIONS.items()}
+        self.background = pygame.Surface((grid.width * cell_size, grid.height * cell_size))
+        self._drawn_cells = None
+        self._robot_cells = set()
+        self._robot_direction = None
+
+    def invalidate(self):
+        """Forces a full redraw on the next call to draw."""
+        self._drawn_cells = None
+
+    def cell_rect(self, x, y):
+        """
+        Returns the screen rectangle of a cell.
+
+        Args:
+            x (int): The column.
+            y (int): The row.
+
+        Returns:
+            pygame.Rect: The rectangle covered by the cell.
+        """
+        return pygame.Rect(x * self.cell_size, y * self.cell_size, self.cell_size, self.cell_size)
+
+    def _paint_background(self, x, y, cell):
+        color = ROBOT_BACKGROUND if cell == CellState.ROBOT else CELL_COLORS[cell]
+        self.background.fill(color, self.cell_rect(x, y))
+
+    def draw(self, robot_direction):
+        """
+        Draws the cells that changed since the last call and the robot sprite.
+
+        Args:
+            robot_direction (str): The direction the robot is facing ('N', 'E', 'S', 'W').
+
+        Returns:
+            list of pygame.Rect: The screen areas that were redrawn, for pygame.display.update.
+        """
+        cells = self.grid.cells
+        if self._drawn_cells is None or self._drawn_cells.shape != cells.shape:
+            for y, row in enumerate(cells.tolist()):
+                for x, cell in enumerate(row):
+                    self._paint_background(x, y, cell)
+            self._robot_cells = {(int(x), int(y)) for y, x in np.argwhere(cells == CellState.ROBOT)}
+            self._drawn_cells = cells.copy()
+            self._robot_direction = robot_direction
+            self.screen.blit(self.background, (0, 0))
+            for x, y in self._robot_cells:
+                self.screen.blit(self.robot_sprites[robot_direction], self.cell_rect(x, y))
+            return [self.background.get_rect()]
+
+        changed = set()
+        ys, xs = np.nonzero(cells != self._drawn_cells)
+        for x, y in zip(xs.tolist(), ys.tolist()):
+            cell = int(cells[y, x])
+            self._paint_background(x, y, cell)
+            if cell == CellState.ROBOT:
+                self._robot_cells.add((x, y))
+            else:
+                self._robot_cells.discard((x, y))
+            changed.add((x, y))
+        self._drawn_cells[ys, xs] = cells[ys, xs]
+
+        if robot_direction != self._robot_direction:
+            changed.update(self._robot_cells)
+            self._robot_direction = robot_direction
+
+        dirty_rects = []
+        for x, y in changed:
+            rect = self.cell_rect(x, y)
+            self.screen.blit(self.background, rect, rect)
+            if (x, y) in self._robot_cells:
+                self.screen.blit(self.robot_sprites[robot_direction], rect)
+            dirty_rects.append(rect)
+        return dirty_rects
@@ -0,0 +1,154 @@
+import argparse
+import pygame
+from robot import DIRECTIONS
+from trajectory import TrajectoryReader
+from gui_utils import draw_legend
+from assets import get_font, load_robot_image
+from renderer import GridRenderer
+
+CELL_SIZE = 50
+PROGRESS_HEIGHT = 20
+SEEK_STEP = 100  # Records skipped by the left and right arrow keys
+
+class TrajectoryPlayer:
+    def __init__(self, reader):
+        """
+        Steps through a recorded trajectory and keeps a grid showing the current record.
+
+        Args:
+            reader (TrajectoryReader): The recording to play.
+        """
+        self.reader = reader
+        self.index = 0
+        self.grid = reader.grid_at(0)
+
+    def seek(self, index):
+        """
+        Moves to a record. Moving forward applies only the records in between; moving backward rebuilds the grid.
+
+        Args:
+            index (int): The record index, clamped to the recording.
+        """
+        index = max(0, min(index, len(self.reader) - 1))
+        if index >= self.index:
+            self.reader.apply(self.grid, self.index, index)
+        else:
+            # Rebuild in place, so a renderer holding the grid keeps working
+            rebuilt = self.reader.grid_at(index)
+            self.grid.cells[:] = rebuilt.cells
+            self.grid.recount()
+        self.index = index
+
+    def direction(self):
+        """
+        Returns the direction of the robot at the current record.
+
+        Returns:
+            str: The direction ('N', 'E', 'S', 'W').
+        """
+        if len(self.reader) == 0:
+            return 'N'
+        return DIRECTIONS[self.reader.records[self.index]['heading']]
+
+def draw_progress(screen, rect, player, speed, paused):
+    """
+    Draws the progress bar and the playback status.
+
+    Args:
+        screen (pygame.Surface): The Pygame screen to draw on.
+        rect (pygame.Rect): The area of the progress bar and status line.
+        player (TrajectoryPlayer): The player.
+        speed (float): The playback speed in records per second.
+        paused (bool): Whether playback is paused.
+    """
+    screen.fill((255, 255, 255), rect)
+    total = max(len(player.reader) - 1, 1)
+    bar = pygame.Rect(rect.x, rect.y, rect.width, PROGRESS_HEIGHT)
+    pygame.draw.rect(screen, (200, 200, 200), bar)
+    pygame.draw.rect(screen, (0, 128, 0), (bar.x, bar.y, bar.width * player.index // total, bar.height))
+    font = get_font(24)
+    status = f"{player.index + 1}/{len(player.reader)}  {speed:g} steps/s{'  paused' if paused else ''}"
+    screen.blit(font.render(status, True, (0, 0, 0)), (rect.x, rect.y + PROGRESS_HEIGHT + 5))
+
+def run_replay(path, speed=10.0):
+    """
+    Plays a trajectory file in a window.
+
+    Space pauses, up and down double and halve the speed, left and right skip SEEK_STEP records, Home and End
+    jump to the start and the end, and clicking the progress bar seeks to that point.
+
+    Args:
+        path (str): The trajectory file.
+        speed (float): The initial playback speed in records per second.
+    """
+    reader = TrajectoryReader(path)
+    player = TrajectoryPlayer(reader)
+    width = reader.width * CELL_SIZE
+    height = reader.height * CELL_SIZE + 200  # Legend and progress bar below the grid
+
+    pygame.init()
+    screen = pygame.display.set_mode((width, height))
+    pygame.display.set_caption(f"Replay: {path}")
+    renderer = GridRenderer(screen, player.grid, load_robot_image(CELL_SIZE), CELL_SIZE)
+    progress_rect = pygame.Rect(10, height - 50, width - 20, 45)
+
+    screen.fill((255, 255, 255))
+    draw_legend(screen, reader.height, CELL_SIZE)
+    pygame.display.flip()
+
+    clock = pygame.time.Clock()
+    paused = False
+    position = 0.0  # Fractional record index, advanced by speed * elapsed time
+    while True:
+        time_delta = clock.tick(60) / 1000.0
+        target = None
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                pygame.quit()
+                return
+            if event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_SPACE:
+                    paused = not paused
+                elif event.key == pygame.K_UP:
+                    speed *= 2
+                elif event.key == pygame.K_DOWN:
+                    speed = max(speed / 2, 0.25)
+                elif event.key == pygame.K_RIGHT:
+                    target = player.index + SEEK_STEP
+                elif event.key == pygame.K_LEFT:
+                    target = player.index - SEEK_STEP
+                elif event.key == pygame.K_HOME:
+                    target = 0
+                elif event.key == pygame.K_END:
+                    target = len(reader) - 1
+            if event.type == pygame.MOUSEBUTTONDOWN and progress_rect.collidepoint(event.pos):
+                target = (event.pos[0] - progress_rect.x) * (len(reader) - 1) // max(progress_rect.width, 1)
+
+        if target is not None:
+            position = float(max(0, min(target, len(reader) - 1)))
+        elif not paused:
+            position = min(position + speed * time_delta, max(len(reader) - 1, 0))
+        if int(position) != player.index:
+            player.seek(int(position))
+
+        dirty_rects = renderer.draw(player.direction())
+        draw_progress(screen, progress_rect, player, speed, paused)
+        dirty_rects.append(progress_rect)
+        pygame.display.update(dirty_rects)
+
+def main(argv=None, prog=None):
+    """
+    Replays a trajectory file from the command line.
+
+    Args:
+        argv (list of str): The command line arguments; None uses sys.argv.
+        prog (str): The program name shown in the usage, e.g. 'cli.py replay'.
+    """
+    parser = argparse.ArgumentParser(prog=prog, description="Replay a recorded trajectory")
+    parser.add_argument('path', help="Trajectory file written with --record")
+    parser.add_argument('--speed', type=float, default=10.0, help="Playback speed in steps per second")
+    args = parser.parse_args(argv)
+    run_replay(args.path, args.speed)
+
+if __name__ == "__main__":
+    main()
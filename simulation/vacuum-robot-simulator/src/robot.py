@@ -1,41 +1,40 @@
+# Headings in clockwise order, so turning right adds one and turning left subtracts one
+DIRECTIONS = ('N', 'E', 'S', 'W')
+HEADING_INDEX = {direction: heading for heading, direction in enumerate(DIRECTIONS)}
+# (dx, dy) step for each heading; y grows downwards
+DIRECTION_OFFSETS = ((0, -1), (1, 0), (0, 1), (-1, 0))
+
 class Robot:
-    def __init__(self, initial_position, initial_direction, grid):
+    def __init__(self, initial_position, initial_direction, grid, sensor_cache=None):
         """
         Initializes the robot.
 
         Args:
             initial_position (tuple): The initial position of the robot (x, y).
             initial_direction (str): The initial direction of the robot ('N', 'E', 'S', 'W').
-            grid (list of list of str): The grid representing the room.
+            grid (Grid): The grid representing the room.
+            sensor_cache (SensorCache): Optional precomputed sensor readings of the grid.
         """
         self.position = initial_position
         self.direction = initial_direction
         self.grid = grid
+        self.sensor_cache = sensor_cache
 
     def turn_left(self):
         """Turns the robot 90 degrees to the left."""
-        directions = ['N', 'W', 'S', 'E']
-        self.direction = directions[(directions.index(self.direction) + 1) % 4]
+        self.direction = DIRECTIONS[(HEADING_INDEX[self.direction] - 1) % 4]
 
     def turn_right(self):
         """Turns the robot 90 degrees to the right."""
-        directions = ['N', 'E', 'S', 'W']
-        self.direction = directions[(directions.index(self.direction) + 1) % 4]
+        self.direction = DIRECTIONS[(HEADING_INDEX[self.direction] + 1) % 4]
 
     def move_forward(self):
         """Moves the robot one step forward in the current direction."""
-        x, y = self.position
-        if self.direction == 'N':
-            y -= 1
-        elif self.direction == 'E':
-            x += 1
-        elif self.direction == 'S':
-            y += 1
-        elif self.direction == 'W':
-            x -= 1
+        dx, dy = DIRECTION_OFFSETS[HEADING_INDEX[self.direction]]
+        x, y = self.position[0] + dx, self.position[1] + dy
 
         # Check if the new position is within the grid and not an obstacle
-        if 0 <= x < len(self.grid[0]) and 0 <= y < len(self.grid) and self.grid[y][x] != 'O':
+        if self.grid.in_bounds(x, y) and not self.grid.is_obstacle(x, y):
             self.position = (x, y)
 
     def execute_command(self, command):
@@ -56,27 +55,27 @@ class Robot:
         """
         Simulates the robot's sensors to check for obstacles.
 
+        The left and right sensors look at the cells diagonally ahead of the robot.
+        They also report True when the robot stands against the grid border on that side.
+
         Returns:
             dict: A dictionary with sensor readings for 'front', 'left', and 'right'.
         """
         x, y = self.position
-        sensors = {'front': False, 'left': False, 'right': False}
+        if self.sensor_cache is not None:
+            return self.sensor_cache.lookup(x, y, self.direction)
 
-        if self.direction == 'N':
-            sensors['front'] = y <= 0 or self.grid[y - 1][x] == 'O' or self.grid[y - 1][x] == 'I'
-            sensors['left'] = x <= 0 or (y > 0 and (self.grid[y - 1][x - 1] == 'O' or self.grid[y - 1][x - 1] == 'I'))
-            sensors['right'] = x >= len(self.grid[0]) - 1 or (y > 0 and (self.grid[y - 1][x + 1] == 'O' or self.grid[y - 1][x + 1] == 'I'))
-        elif self.direction == 'E':
-            sensors['front'] = x >= len(self.grid[0]) - 1 or self.grid[y][x + 1] == 'O' or self.grid[y][x + 1] == 'I'
-            sensors['left'] = y >= len(self.grid) - 1 or (x < len(self.grid[0]) - 1 and (self.grid[y + 1][x + 1] == 'O' or self.grid[y + 1][x + 1] == 'I'))
-            sensors['right'] = y <= 0 or (x < len(self.grid[0]) - 1 and (self.grid[y - 1][x + 1] == 'O' or self.grid[y - 1][x + 1] == 'I'))
-        elif self.direction == 'S':
-            sensors['front'] = y >= len(self.grid) - 1 or self.grid[y + 1][x] == 'O' or self.grid[y + 1][x] == 'I'
-            sensors['left'] = x >= len(self.grid[0]) - 1 or (y < len(self.grid) - 1 and (self.grid[y + 1][x + 1] == 'O' or self.grid[y + 1][x + 1] == 'I'))
-            sensors['right'] = x <= 0 or (y < len(self.grid) - 1 and (self.grid[y + 1][x - 1] == 'O' or self.grid[y + 1][x - 1] == 'I'))
-        elif self.direction == 'W':
-            sensors['front'] = x <= 0 or self.grid[y][x - 1] == 'O' or self.grid[y][x - 1] == 'I'
-            sensors['left'] = y >= len(self.grid) - 1 or (x > 0 and (self.grid[y + 1][x - 1] == 'O' or self.grid[y + 1][x - 1] == 'I'))
-            sensors['right'] = y <= 0 or (x > 0 and (self.grid[y - 1][x - 1] == 'O' or self.grid[y - 1][x - 1] == 'I'))
+        heading = HEADING_INDEX[self.direction]
+        dx, dy = DIRECTION_OFFSETS[heading]
+        left_dx, left_dy = DIRECTION_OFFSETS[(heading - 1) % 4]
+        right_dx, right_dy = DIRECTION_OFFSETS[(heading + 1) % 4]
+        grid = self.grid
 
-        return sensors
\ No newline at end of file
+        front_in_bounds = grid.in_bounds(x + dx, y + dy)
+        return {
+            'front': not front_in_bounds or grid.is_obstacle(x + dx, y + dy),
+            'left': not grid.in_bounds(x + left_dx, y + left_dy)
+                    or (front_in_bounds and grid.is_obstacle(x + dx + left_dx, y + dy + left_dy)),
+            'right': not grid.in_bounds(x + right_dx, y + right_dy)
+                     or (front_in_bounds and grid.is_obstacle(x + dx + right_dx, y + dy + right_dy)),
+        }
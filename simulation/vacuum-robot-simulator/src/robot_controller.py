@@ -1,12 +1,14 @@
 class RobotController:
-    def __init__(self, robot):
+    def __init__(self, robot, range_sensor=None):
         """
         Initializes the robot controller.
 
         Args:
             robot (Robot): The robot instance to control.
+            range_sensor (RangeSensor): Optional distance sensor whose readings are added to the sensor data.
         """
         self.robot = robot
+        self.range_sensor = range_sensor
 
     def process_command(self, command):
         """
@@ -22,6 +24,11 @@ class RobotController:
         Gets the sensor data from the robot.
 
         Returns:
-            dict: The sensor data.
+            dict: The sensor data. With a range sensor it also holds 'ranges', the distance in cells per beam.
         """
-        return self.robot.simulate_sensors()
\ No newline at end of file
+        sensors = self.robot.simulate_sensors()
+        if self.range_sensor is not None:
+            # simulate_sensors returns a new dict on every call, also from the sensor cache, so it is extended in place
+            x, y = self.robot.position
+            sensors['ranges'] = self.range_sensor.measure(self.robot.grid, x, y, self.robot.direction)
+        return sensors
\ No newline at end of file
@@ -1,14 +1,15 @@
 from robot import Robot
+from grid import Grid
 
 def test_robot_sensors():
     # Define a sample grid
-    grid = [
+    grid = Grid.from_rows([
         ['U', 'U', 'U', 'U', 'U'],
         ['U', 'O', 'U', 'O', 'U'],
         ['U', 'U', 'R', 'U', 'U'],
         ['U', 'O', 'U', 'O', 'U'],
         ['U', 'U', 'U', 'U', 'U']
-    ]
+    ])
 
     # Initialize the robot at position (2, 2) facing North
     robot = Robot(initial_position=(2, 2), initial_direction='N', grid=grid)
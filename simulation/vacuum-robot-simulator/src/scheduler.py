@@ -0,0 +1,116 @@
+import asyncio
+import time
+
+# Time scales selectable with the number keys; None runs the simulation as fast as possible
+TIME_SCALES = (1.0, 10.0, None)
+
+class Scheduler:
+    def __init__(self, tick_rate=30, max_fps=30, time_scale=1.0, max_backlog=0.25, clock=time.perf_counter):
+        """
+        Runs simulation ticks at a fixed rate and rendering at an independent, capped frame rate.
+
+        Each loop iteration runs the ticks that are due, renders if a frame is due and then waits. Ticks never
+        run past the next frame, so rendering stays on time; frames that are missed under load are skipped
+        rather than drawn late.
+
+        Args:
+            tick_rate (float): Simulation ticks per second at a time scale of 1.
+            max_fps (float): The maximum number of rendered frames per second.
+            time_scale (float): How much faster than real time the simulation runs, or None for as fast as possible.
+            max_backlog (float): The most real time in seconds the simulation catches up after a stall; older
+                ticks are dropped.
+            clock (callable): Returns the current time in seconds.
+        """
+        self.tick_interval = 1.0 / tick_rate
+        self.frame_interval = 1.0 / max_fps
+        self.time_scale = time_scale
+        self.max_backlog = max_backlog
+        self.clock = clock
+        now = clock()
+        self._last_time = now
+        self._accumulator = 0.0  # Simulated time not yet consumed by ticks
+        self._ticking = False  # Whether ticks() ran since the last wait, i.e. the simulation is running
+        self._next_frame = now
+        self._last_frame = now
+        self.frame_delta = 0.0  # Seconds between the last two rendered frames
+        self.ticks_run = 0
+        self.frames_rendered = 0
+        self.frames_skipped = 0
+
+    def set_time_scale(self, time_scale):
+        """
+        Changes the simulation speed.
+
+        Args:
+            time_scale (float): How much faster than real time the simulation runs, or None for as fast as possible.
+        """
+        self.time_scale = time_scale
+        self._accumulator = 0.0
+
+    def ticks(self):
+        """
+        Yields once for every simulation tick to run now.
+
+        Returns:
+            generator: Iterate over it and run one tick per item.
+        """
+        self._ticking = True
+        now = self.clock()
+        elapsed = now - self._last_time
+        self._last_time = now
+        # Leave the time until the next frame for ticks, but at least half a frame if a frame is already due
+        deadline = max(self._next_frame, now + self.frame_interval / 2)
+        if self.time_scale is None:
+            while self.clock() < deadline:
+                self.ticks_run += 1
+                yield
+            return
+        self._accumulator = min(self._accumulator + elapsed * self.time_scale, self.max_backlog * self.time_scale)
+        while self._accumulator >= self.tick_interval and self.clock() < deadline:
+            self._accumulator -= self.tick_interval
+            self.ticks_run += 1
+            yield
+
+    def should_render(self):
+        """
+        Checks whether a frame is due, and if so schedules the next one.
+
+        Returns:
+            bool: True if a frame should be rendered now.
+        """
+        now = self.clock()
+        if now < self._next_frame:
+            return False
+        missed = int((now - self._next_frame) / self.frame_interval)
+        self.frames_skipped += missed
+        self._next_frame += (missed + 1) * self.frame_interval
+        self.frame_delta = now - self._last_frame
+        self._last_frame = now
+        self.frames_rendered += 1
+        return True
+
+    def sleep_time(self):
+        """
+        Computes how long the loop can sleep before a tick or a frame is due.
+
+        Returns:
+            float: The time in seconds; 0 when running as fast as possible. If ticks() was not called since
+            the last wait, e.g. while the map is edited before the start, only the next frame is waited for.
+        """
+        now = self.clock()
+        if not self._ticking:
+            return max(0.0, self._next_frame - now)
+        if self.time_scale is None:
+            return 0.0
+        until_tick = (self.tick_interval - self._accumulator) / self.time_scale - (now - self._last_time)
+        return max(0.0, min(until_tick, self._next_frame - now))
+
+    async def wait(self):
+        """Sleeps until the next tick or frame is due, yielding to the event loop."""
+        if not self._ticking:
+            # Time without ticks is not simulated later, so the first ticks after the start don't burst
+            self._last_time = self.clock()
+            self._accumulator = 0.0
+        sleep_time = self.sleep_time()
+        self._ticking = False
+        await asyncio.sleep(sleep_time)
@@ -0,0 +1,142 @@
+import numpy as np
+from robot import HEADING_INDEX, DIRECTION_OFFSETS
+
+# Bits of the packed sensor code; shifting a code left by one gives the byte of format_sensor_data_as_bits
+FRONT_BIT = 4
+LEFT_BIT = 2
+RIGHT_BIT = 1
+
+# Bits of the padded cell table
+OBSTACLE_BIT = 1
+OUTSIDE_BIT = 2
+
+# Sensor dicts for every code, shared by all lookups
+_SENSOR_DICTS = tuple(
+    {'front': bool(code & FRONT_BIT), 'left': bool(code & LEFT_BIT), 'right': bool(code & RIGHT_BIT)}
+    for code in range(8)
+)
+
+class SensorCache:
+    def __init__(self, grid):
+        """
+        Precomputes the packed front/left/right sensor code for every cell and heading of a grid.
+
+        The cache registers itself as a listener on the grid and recomputes only the 3x3 neighbourhood of a
+        cell whose obstacle state changes. Marking cells as visited costs a single comparison.
+
+        Args:
+            grid (Grid): The grid to cache the sensor readings of.
+        """
+        self.grid = grid
+        self.padded_width = grid.width + 2
+        self.padded_height = grid.height + 2
+        # Cell table with a one-cell border marked as outside, so neighbours never need a bounds check
+        self.padded = np.zeros((self.padded_height, self.padded_width), dtype=np.uint8)
+        # Sensor code per heading and padded cell; the border entries are unused
+        self.table = np.zeros((4, self.padded_height, self.padded_width), dtype=np.uint8)
+        self.rebuild()
+        grid.add_listener(self._on_cells_changed)
+
+    def close(self):
+        """Stops following changes of the grid."""
+        self.grid.remove_listener(self._on_cells_changed)
+
+    def rebuild(self):
+        """Recomputes the whole table from the grid."""
+        self.padded.fill(OUTSIDE_BIT)
+        self.padded[1:-1, 1:-1] = self.grid.obstacle_mask() * OBSTACLE_BIT
+        self._compute_region(0, 0, self.grid.width, self.grid.height)
+
+    def _compute_region(self, x0, y0, x1, y1):
+        """
+        Recomputes the sensor codes of all cells in a rectangle.
+
+        Args:
+            x0 (int): The first column.
+            y0 (int): The first row.
+            x1 (int): The column after the last one.
+            y1 (int): The row after the last one.
+        """
+        padded = self.padded
+
+        def shifted(dx, dy):
+            return padded[y0 + 1 + dy:y1 + 1 + dy, x0 + 1 + dx:x1 + 1 + dx]
+
+        for heading, (dx, dy) in enumerate(DIRECTION_OFFSETS):
+            left_dx, left_dy = DIRECTION_OFFSETS[(heading - 1) % 4]
+            right_dx, right_dy = DIRECTION_OFFSETS[(heading + 1) % 4]
+            ahead = shifted(dx, dy)
+            ahead_inside = (ahead & OUTSIDE_BIT) == 0
+            front = ahead != 0
+            left = ((shifted(left_dx, left_dy) & OUTSIDE_BIT) != 0) \
+                | (ahead_inside & ((shifted(dx + left_dx, dy + left_dy) & OBSTACLE_BIT) != 0))
+            right = ((shifted(right_dx, right_dy) & OUTSIDE_BIT) != 0) \
+                | (ahead_inside & ((shifted(dx + right_dx, dy + right_dy) & OBSTACLE_BIT) != 0))
+            self.table[heading, y0 + 1:y1 + 1, x0 + 1:x1 + 1] = front * FRONT_BIT | left * LEFT_BIT | right * RIGHT_BIT
+
+    def _on_cells_changed(self, xs, ys):
+        """
+        Grid listener that updates the table when the obstacle state of cells changed.
+
+        Args:
+            xs (int or numpy.ndarray): The columns of the changed cells, or None if the whole grid changed.
+            ys (int or numpy.ndarray): The rows of the changed cells, or None if the whole grid changed.
+        """
+        if xs is None:
+            self.rebuild()
+            return
+        if not isinstance(xs, np.ndarray):
+            # Fast path for single cells, e.g. the robot marking its cell as visited
+            if self.grid.is_obstacle(xs, ys) == bool(self.padded[ys + 1, xs + 1] & OBSTACLE_BIT):
+                return
+        xs = np.atleast_1d(xs)
+        ys = np.atleast_1d(ys)
+        obstacle = self.grid.obstacle_mask_at(xs, ys)
+        cached = (self.padded[ys + 1, xs + 1] & OBSTACLE_BIT) != 0
+        changed = obstacle != cached
+        for x, y, is_obstacle in zip(xs[changed].tolist(), ys[changed].tolist(), obstacle[changed].tolist()):
+            self.padded[y + 1, x + 1] = OBSTACLE_BIT if is_obstacle else 0
+            # Only robots on the 3x3 block around the cell can see it
+            self._compute_region(max(x - 1, 0), max(y - 1, 0), min(x + 2, self.grid.width), min(y + 2, self.grid.height))
+
+    def code(self, x, y, heading):
+        """
+        Looks up the packed sensor code of one position.
+
+        Args:
+            x (int): The column.
+            y (int): The row.
+            heading (int): The heading index, see robot.DIRECTIONS.
+
+        Returns:
+            int: front * FRONT_BIT | left * LEFT_BIT | right * RIGHT_BIT.
+        """
+        return int(self.table[heading, y + 1, x + 1])
+
+    def lookup(self, x, y, direction):
+        """
+        Looks up the sensor readings of one position in the format of Robot.simulate_sensors.
+
+        Args:
+            x (int): The column.
+            y (int): The row.
+            direction (str): The direction the robot is facing ('N', 'E', 'S', 'W').
+
+        Returns:
+            dict: A new dictionary with sensor readings for 'front', 'left', and 'right'.
+        """
+        return dict(_SENSOR_DICTS[self.table[HEADING_INDEX[direction], y + 1, x + 1]])
+
+    def codes(self, xs, ys, headings):
+        """
+        Looks up the packed sensor codes of many positions at once.
+
+        Args:
+            xs (numpy.ndarray): The columns.
+            ys (numpy.ndarray): The rows.
+            headings (numpy.ndarray): The heading indices.
+
+        Returns:
+            numpy.ndarray: The uint8 sensor code per position.
+        """
+        return self.table[headings, ys + 1, xs + 1]
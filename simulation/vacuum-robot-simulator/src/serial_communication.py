@@ -1,5 +1,7 @@
 import serial
 import time
+# The one sensor layout shared with the firmware; this script used to set a marker bit of its own
+from serial_utils import format_sensor_data_as_bits
 
 class SerialCommunication:
     def __init__(self, port, baudrate, timeout=1):
@@ -44,24 +46,6 @@ class SerialCommunication:
         """
         self.ser.close()
 
-def format_sensor_data_as_bits(sensors):
-    """
-    Formats the sensor data into a byte format.
-
-    Args:
-        sensors (dict): The sensor data.
-
-    Returns:
-        bytes: The formatted sensor data as bytes.
-    """
-    front = 1 if sensors['front'] else 0
-    left = 1 if sensors['left'] else 0
-    right = 1 if sensors['right'] else 0
-    collision = 1 if sensors['collision'] else 0
-    # Combine the bits into a single byte
-    data_byte = (front << 4) | (left << 3) | (right << 2) | (collision << 1) | 1
-    return bytes([data_byte])
-
 def send_sensor_data(serial_comm, sensors):
     """
     Sends the sensor data over the serial connection.
@@ -70,8 +54,7 @@ def send_sensor_data(serial_comm, sensors):
         serial_comm (SerialCommunication): The serial communication instance.
         sensors (dict): The sensor data.
     """
-    # formatted_data = format_sensor_data_as_bits(sensors)
-    formatted_data = sensors
+    formatted_data = format_sensor_data_as_bits(sensors)
     serial_comm.send_data(formatted_data)
     print(f"Sent data: {formatted_data}")
 
@@ -1,21 +1,100 @@
-import serial
+import queue
+import threading
 import time
-import asyncio
+from collections import OrderedDict
+import protocol
+
+DEFAULT_PORT = 'COM3'
+DEFAULT_BAUDRATE = 9600
+# Every reply from the firmware ends with this byte, e.g. b"1\n"
+FRAME_DELIMITER = b'\n'
+# Set on the sequence ID byte that precedes a sensor byte in pipelined mode
+SEQUENCE_FLAG = 0x80
+SEQUENCE_MODULO = 128
+# Pass this as the port to open_serial_connection to talk to the firmware emulator instead of a board
+EMULATOR_PORT = 'emulator'
+
+class FrameBuffer:
+    def __init__(self, delimiter=FRAME_DELIMITER):
+        """
+        Splits a byte stream into delimiter-terminated frames.
+
+        Args:
+            delimiter (bytes): The byte that terminates each frame.
+        """
+        self.delimiter = delimiter
+        self._buffer = bytearray()
+
+    def feed(self, chunk):
+        """
+        Appends received bytes and returns every frame they complete.
+
+        Args:
+            chunk (bytes): The received bytes.
+
+        Returns:
+            list of bytes: The complete frames without their delimiter; empty frames are skipped.
+        """
+        self._buffer.extend(chunk)
+        frames = []
+        while True:
+            end = self._buffer.find(self.delimiter)
+            if end < 0:
+                return frames
+            frame = bytes(self._buffer[:end]).strip(b'\r')
+            del self._buffer[:end + len(self.delimiter)]
+            if frame:
+                frames.append(frame)
 
 class SerialCommunication:
-    def __init__(self, port, baudrate, timeout=1):
+    def __init__(self, port=DEFAULT_PORT, baudrate=DEFAULT_BAUDRATE, timeout=1, delimiter=FRAME_DELIMITER,
+                 framer=None):
         """
-        Initializes the serial communication.
+        Initializes the serial communication and starts the background reader thread.
 
         Args:
             port (str): The serial port to connect to.
             baudrate (int): The baud rate for the serial communication.
-            timeout (int): The timeout for the serial communication in seconds.
+            timeout (int): The read timeout in seconds. It bounds how long close() waits for the reader thread.
+            delimiter (bytes): The byte that terminates each received frame.
+            framer (FrameBuffer or protocol.FrameDecoder): Splits the received bytes into frames; defaults to
+                a FrameBuffer for delimiter. Use a protocol.FrameDecoder for binary replies.
         """
-        self.ser = serial.Serial(port, baudrate, timeout=timeout)
+        # pyserial is only loaded when a port is opened, so the simulation core imports without it
+        import serial
+        # serial_for_url also accepts URLs such as loop:// or socket://host:port besides device names
+        self.ser = serial.serial_for_url(port, baudrate=baudrate, timeout=timeout)
         self.ser.flushInput()
         self.ser.flushOutput()
-    
+        self.frames = queue.Queue()
+        self._frame_buffer = framer if framer is not None else FrameBuffer(delimiter)
+        self._running = True
+        self._reader = threading.Thread(target=self._read_loop, name=f"serial-reader-{port}", daemon=True)
+        self._reader.start()
+
+    def _read_loop(self):
+        """Reads from the port until it is closed and splits the stream into frames."""
+        while self._running:
+            try:
+                # Block for the first byte, then take whatever else has arrived in one call
+                chunk = self.ser.read(max(1, self.ser.in_waiting))
+            except (TypeError, OSError) as e:  # serial.SerialException is an OSError
+                if self._running:
+                    print(f"Serial read failed: {e}")
+                break
+            for frame in self._frame_buffer.feed(chunk):
+                self.frames.put(frame)
+
+    def alive(self):
+        """
+        Checks whether the connection still works, i.e. the port is open and the reader thread has not
+        stopped on a read error such as an unplugged board.
+
+        Returns:
+            bool: True if the connection is usable.
+        """
+        return self.ser.is_open and self._reader.is_alive()
+
     def send_data(self, data):
         """
         Sends data over the serial connection.
@@ -27,42 +106,252 @@ class SerialCommunication:
             self.ser.write(data)
         else:
             print("Serial port is not open. Cannot send data.")
-    
-    async def receive_data(self):
+
+    def receive_frame(self, timeout=None):
         """
-        Asynchronously receives data from the serial connection.
+        Takes the next complete frame received by the reader thread.
+
+        Args:
+            timeout (float): How long to wait in seconds. 0 returns immediately, None waits forever.
 
         Returns:
-            bytes: The received data.
+            bytes: The frame without its delimiter, a (sequence ID, values) tuple from a protocol.FrameDecoder,
+            or None if no frame arrived in time.
         """
-        while True:
-            if self.ser.is_open and self.ser.in_waiting:
-                return self.ser.read(self.ser.in_waiting)
-            await asyncio.sleep(0.1)
-    
+        try:
+            if timeout == 0:
+                return self.frames.get_nowait()
+            return self.frames.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    async def receive_data(self, timeout=None):
+        """
+        Asynchronously waits for the next frame without blocking the event loop.
+
+        Args:
+            timeout (float): How long to wait in seconds, or None to wait forever.
+
+        Returns:
+            bytes: The frame without its delimiter, or None if no frame arrived in time.
+        """
+        frame = self.receive_frame(timeout=0)
+        if frame is not None:
+            return frame
+        # asyncio is loaded anyway when a coroutine runs; importing it here keeps it out of headless startup
+        import asyncio
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.receive_frame, timeout)
+
     def close(self):
         """
-        Closes the serial connection.
+        Stops the reader thread and closes the serial connection.
         """
+        self._running = False
+        if hasattr(self.ser, 'cancel_read'):
+            self.ser.cancel_read()
+        self._reader.join(timeout=self.ser.timeout)
         self.ser.close()
 
-def format_sensor_data_as_bits(sensors):
+def open_serial_connection(port=DEFAULT_PORT, baudrate=DEFAULT_BAUDRATE, binary=False):
     """
-    Formats the sensor data into a byte format.
+    Opens a connection to the controller board, or to the firmware emulator if port is EMULATOR_PORT.
+
+    Args:
+        port (str): The serial port to connect to, or EMULATOR_PORT.
+        baudrate (int): The baud rate for the serial communication.
+        binary (bool): Whether replies are binary protocol frames instead of text lines.
+
+    Returns:
+        SerialCommunication: The connection; a FirmwareEmulator has the same interface.
+    """
+    framer = protocol.FrameDecoder() if binary else None
+    if port == EMULATOR_PORT:
+        # Imported here because the emulator itself builds on this module
+        from firmware_emulator import FirmwareEmulator
+        return FirmwareEmulator(framer=framer)
+    return SerialCommunication(port=port, baudrate=baudrate, framer=framer)
+
+def sensor_nibble(sensors):
+    """
+    Packs the sensor data into the 4-bit layout shared by all protocols and the firmware.
 
     Args:
         sensors (dict): The sensor data.
 
     Returns:
-        bytes: The formatted sensor data as bytes.
+        int: front << 3 | left << 2 | right << 1 | collision.
     """
     front = 1 if sensors.get('front', False) else 0
     left = 1 if sensors.get('left', False) else 0
     right = 1 if sensors.get('right', False) else 0
     collision = 1 if sensors.get('collision', False) else 0
-    # Combine the bits into a single byte
-    data_byte = (front << 3) | (left << 2) | (right << 1) | collision
-    return bytes([data_byte])
+    return (front << 3) | (left << 2) | (right << 1) | collision
+
+def format_sensor_data_as_bits(sensors):
+    """
+    Formats the sensor data into a byte format.
+
+    Args:
+        sensors (dict): The sensor data.
+
+    Returns:
+        bytes: The formatted sensor data as bytes.
+    """
+    return bytes([sensor_nibble(sensors)])
+
+def format_sequenced_sensor_data(sequence_id, sensors):
+    """
+    Formats the sensor data as a pipelined frame: a sequence ID byte followed by the sensor byte.
+
+    Args:
+        sequence_id (int): The sequence ID, between 0 and 127.
+        sensors (dict): The sensor data.
+
+    Returns:
+        bytes: The frame.
+    """
+    return bytes([SEQUENCE_FLAG | sequence_id]) + format_sensor_data_as_bits(sensors)
+
+def parse_reply(frame):
+    """
+    Splits a reply frame into its sequence ID and command.
+
+    Args:
+        frame (bytes): A reply such as b"1" or, in pipelined mode, b"17:1".
+
+    Returns:
+        tuple: The sequence ID (None for a plain reply) and the command string.
+    """
+    text = frame.decode('utf-8').strip()
+    if ':' in text:
+        sequence_id, command = text.split(':', 1)
+        return int(sequence_id), command
+    return None, text
+
+class PipelinedExchange:
+    def __init__(self, serial_comm, window=4, timeout=1.0, sequenced=True, binary=False):
+        """
+        Sends sensor frames without waiting for earlier replies and matches each reply to its frame.
+
+        Args:
+            serial_comm (SerialCommunication): The serial communication instance.
+            window (int): The maximum number of frames in flight.
+            timeout (float): Seconds after which an unanswered frame is given up.
+            sequenced (bool): Whether to tag frames with sequence IDs. Without them replies are matched
+                in order and only one frame may be in flight.
+            binary (bool): Whether to send binary protocol frames, which are always sequenced and can carry
+                a batch of readings. The connection must split replies with a protocol.FrameDecoder.
+        """
+        sequenced = sequenced or binary
+        self.sequence_modulo = protocol.SEQUENCE_MODULO if binary else SEQUENCE_MODULO
+        if sequenced and not 1 <= window < self.sequence_modulo:
+            raise ValueError(f"window must be between 1 and {self.sequence_modulo - 1}")
+        self.serial_comm = serial_comm
+        self.window = window if sequenced else 1
+        self.timeout = timeout
+        self.sequenced = sequenced
+        self.binary = binary
+        self.in_flight = OrderedDict()  # sequence ID -> (send time, context, batch size or None)
+        self.next_sequence_id = 0
+        self.timeouts = 0
+        self.unmatched = 0
+
+    def can_send(self):
+        """
+        Checks whether another frame fits into the window.
+
+        Returns:
+            bool: True if a frame can be sent now.
+        """
+        self.expire()
+        return len(self.in_flight) < self.window
+
+    def contexts(self):
+        """
+        Returns the contexts of all frames in flight.
+
+        Returns:
+            list: The contexts, oldest first.
+        """
+        return [context for _, context, _ in self.in_flight.values()]
+
+    def send(self, sensors, context=None):
+        """
+        Sends one sensor frame.
+
+        Args:
+            sensors (dict or list of dict): The sensor data. In binary mode a list of up to protocol.MAX_COUNT
+                readings, e.g. of several robots or ticks, is sent as one frame and answered with one reply.
+            context: Any value to hand back with the reply, e.g. the robot state the sensors belong to.
+
+        Returns:
+            int: The sequence ID of the frame.
+        """
+        batch = len(sensors) if isinstance(sensors, list) else None
+        if batch is not None and not self.binary:
+            raise ValueError("batches need the binary protocol")
+        sequence_id = self.next_sequence_id
+        self.next_sequence_id = (sequence_id + 1) % self.sequence_modulo
+        # A frame still holding this ID has been in flight for a full cycle of IDs, so give it up
+        if self.in_flight.pop(sequence_id, None) is not None:
+            self.timeouts += 1
+        if self.binary:
+            readings = [sensor_nibble(reading) for reading in sensors] if batch is not None else [sensor_nibble(sensors)]
+            self.serial_comm.send_data(protocol.encode_frame(sequence_id, readings))
+        elif self.sequenced:
+            self.serial_comm.send_data(format_sequenced_sensor_data(sequence_id, sensors))
+        else:
+            self.serial_comm.send_data(format_sensor_data_as_bits(sensors))
+        self.in_flight[sequence_id] = (time.perf_counter(), context, batch)
+        return sequence_id
+
+    def expire(self):
+        """
+        Gives up frames that have been waiting longer than the timeout.
+        """
+        now = time.perf_counter()
+        for sequence_id, (sent_time, _, _) in list(self.in_flight.items()):
+            if now - sent_time <= self.timeout:
+                break
+            del self.in_flight[sequence_id]
+            self.timeouts += 1
+
+    def poll(self):
+        """
+        Collects all replies that have arrived, without blocking.
+
+        Returns:
+            list of tuple: (command, context, latency in seconds) per matched reply, in arrival order. The
+            command of a batch is a list with one command per reading.
+        """
+        replies = []
+        while True:
+            frame = self.serial_comm.receive_frame(timeout=0)
+            if frame is None:
+                break
+            if self.binary:
+                sequence_id, codes = frame
+                command = [str(code) for code in codes.tolist()]
+            else:
+                try:
+                    sequence_id, command = parse_reply(frame)
+                except (UnicodeDecodeError, ValueError):
+                    self.unmatched += 1
+                    continue
+                if sequence_id is None and not self.sequenced and self.in_flight:
+                    sequence_id = next(iter(self.in_flight))
+            entry = self.in_flight.get(sequence_id)
+            if entry is None or (self.binary and len(command) != (entry[2] or 1)):
+                self.unmatched += 1
+                continue
+            del self.in_flight[sequence_id]
+            sent_time, context, batch = entry
+            if self.binary and batch is None:
+                command = command[0]
+            replies.append((command, context, time.perf_counter() - sent_time))
+        self.expire()
+        return replies
 
 def send_sensor_data(serial_comm, sensors):
     """
@@ -76,17 +365,18 @@ def send_sensor_data(serial_comm, sensors):
     serial_comm.send_data(formatted_data)
     print(f"Sent data: {formatted_data}")
 
-async def wait_for_data(serial_comm):
+async def wait_for_data(serial_comm, timeout=None):
     """
     Asynchronously waits for data to be received over the serial connection.
 
     Args:
         serial_comm (SerialCommunication): The serial communication instance.
+        timeout (float): How long to wait in seconds, or None to wait forever.
 
     Returns:
-        bytes: The received data.
+        bytes: The received frame, or None if no frame arrived in time.
     """
     print("Waiting for data...")
-    received_data = await serial_comm.receive_data()
+    received_data = await serial_comm.receive_data(timeout=timeout)
     print(f"Received data: {received_data}")
-    return received_data
\ No newline at end of file
+    return received_data
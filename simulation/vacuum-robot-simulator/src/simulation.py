@@ -0,0 +1,262 @@
+import argparse
+import random
+import time
+from robot import Robot, DIRECTIONS, HEADING_INDEX
+from robot_controller import RobotController
+from grid import Grid, CellState
+from sensor_cache import SensorCache
+from serial_utils import format_sensor_data_as_bits
+
+# Robot commands for the firmware's movement codes; STOP ('4') ends the episode
+COMMANDS_BY_CODE = {'1': 'F', '2': 'L', '3': 'R'}
+CODES_BY_COMMAND = {command: int(code) for code, command in COMMANDS_BY_CODE.items()}
+
+def make_random_turn_policy(seed=None):
+    """
+    Creates a policy that mirrors the firmware's decide_movement rule.
+
+    The robot moves forward while the front sensor is clear and turns left or
+    right at random when it is blocked.
+
+    Args:
+        seed (int): The seed for the random number generator.
+
+    Returns:
+        callable: A policy mapping a sensor dict to a command ('F', 'L' or 'R').
+    """
+    rng = random.Random(seed)
+
+    def policy(sensors):
+        if sensors['front']:
+            return 'L' if rng.random() < 0.5 else 'R'
+        return 'F'
+
+    return policy
+
+def make_serial_policy(serial_comm, timeout=1.0):
+    """
+    Creates a policy that asks the controller over the serial protocol, one round trip per step.
+
+    Together with a FirmwareEmulator this runs the firmware logic headlessly with the exact byte protocol.
+
+    Args:
+        serial_comm (SerialCommunication): The connection to the controller board or a FirmwareEmulator.
+        timeout (float): How long to wait for each reply in seconds.
+
+    Returns:
+        callable: A policy mapping a sensor dict to a command ('F', 'L' or 'R'), or None on STOP or timeout.
+    """
+    def policy(sensors):
+        serial_comm.send_data(format_sensor_data_as_bits(sensors))
+        reply = serial_comm.receive_frame(timeout=timeout)
+        if reply is None:
+            print("No reply from the controller.")
+            return None
+        return COMMANDS_BY_CODE.get(reply.decode('utf-8').strip())
+
+    return policy
+
+class HeadlessSimulation:
+    def __init__(self, grid, initial_position, initial_direction, policy, recorder=None, range_sensor=None,
+                 heatmap=None):
+        """
+        Initializes a headless simulation that runs without pygame.
+
+        Args:
+            grid (Grid or ChunkedGrid): The grid representing the room. It is modified in place.
+            initial_position (tuple): The start position of the robot (x, y).
+            initial_direction (str): The start direction of the robot ('N', 'E', 'S', 'W').
+            policy (callable): Maps a sensor dict to a command ('F', 'L', 'R') or None to stop.
+            recorder (TrajectoryRecorder): Records every step if given.
+            range_sensor (RangeSensor): Adds distance readings ('ranges') to the sensor data the policy gets.
+            heatmap (VisitCounter): Counts the visits of every cell, starting with the start cell.
+        """
+        self.grid = grid
+        # The sensor table is dense, so chunked grids are read directly instead
+        self.sensor_cache = SensorCache(grid) if isinstance(grid, Grid) else None
+        self.robot = Robot(initial_position, initial_direction, grid, sensor_cache=self.sensor_cache)
+        self.controller = RobotController(self.robot, range_sensor=range_sensor)
+        self.policy = policy
+        self.recorder = recorder
+        self.heatmap = heatmap
+        self.steps = 0
+        self.collisions = 0
+        self.forward_moves = 0
+        self.revisits = 0
+        self.turns = 0
+        grid.set(initial_position[0], initial_position[1], CellState.ROBOT)
+        if heatmap is not None:
+            heatmap.visit(initial_position[0], initial_position[1])
+
+    def coverage(self):
+        """
+        Computes the fraction of free cells the robot has visited.
+
+        Returns:
+            float: The coverage between 0.0 and 1.0.
+        """
+        return self.grid.coverage_ratio()
+
+    def close(self):
+        """Detaches the sensor cache from the grid, so the grid can be reused by another simulation."""
+        if self.sensor_cache is not None:
+            self.sensor_cache.close()
+
+    def step(self):
+        """
+        Runs one sense -> decide -> act cycle.
+
+        Returns:
+            bool: False if the policy asked to stop, True otherwise.
+        """
+        sensors = self.controller.get_sensor_data()
+        command = self.policy(sensors)
+        if command is None:
+            return False
+        if self.recorder is not None:
+            x, y = self.robot.position
+            self.recorder.record(self.steps, x, y, HEADING_INDEX[self.robot.direction],
+                                 format_sensor_data_as_bits(sensors)[0], CODES_BY_COMMAND[command])
+
+        if command == 'F':
+            old_position = self.robot.position
+            self.controller.process_command(command)
+            x, y = self.robot.position
+            if self.robot.position == old_position:
+                self.collisions += 1
+            else:
+                if self.grid.get(x, y) == CellState.VISITED:
+                    self.revisits += 1
+                self.grid.set(old_position[0], old_position[1], CellState.VISITED)
+                self.grid.set(x, y, CellState.ROBOT)
+                self.forward_moves += 1
+                if self.heatmap is not None:
+                    self.heatmap.visit(x, y)
+        else:
+            self.controller.process_command(command)
+            self.turns += 1
+
+        self.steps += 1
+        return True
+
+    def run(self, max_steps=10000, target_coverage=1.0, milestones=()):
+        """
+        Runs the simulation until the target coverage, the step limit or a stop command is reached.
+
+        Args:
+            max_steps (int): The maximum number of steps to simulate.
+            target_coverage (float): The coverage at which the run ends early.
+            milestones (tuple of float): Coverage levels to record the step count of.
+
+        Returns:
+            dict: The run statistics ('coverage', 'steps', 'collisions', 'forward_moves', 'revisits', 'turns',
+            'elapsed', and 'milestone_steps', which maps each milestone reached to the step it was reached at).
+            With a heatmap, 'visits' holds its statistics, see VisitCounter.stats.
+        """
+        start_time = time.perf_counter()
+        pending = sorted(milestones)
+        milestone_steps = {}
+        coverage = self.coverage()
+        while True:
+            while pending and coverage >= pending[0]:
+                milestone_steps[pending.pop(0)] = self.steps
+            if self.steps >= max_steps or coverage >= target_coverage or not self.step():
+                break
+            coverage = self.coverage()
+        result = {
+            'coverage': self.coverage(),
+            'steps': self.steps,
+            'collisions': self.collisions,
+            'forward_moves': self.forward_moves,
+            'revisits': self.revisits,
+            'turns': self.turns,
+            'elapsed': time.perf_counter() - start_time,
+            'milestone_steps': milestone_steps,
+        }
+        if self.heatmap is not None:
+            result['visits'] = self.heatmap.stats()
+        return result
+
+def run_episode(grid, initial_position, initial_direction, policy, max_steps=10000, target_coverage=1.0,
+                milestones=()):
+    """
+    Runs a single headless episode.
+
+    Args:
+        grid (Grid or ChunkedGrid): The grid representing the room. It is modified in place.
+        initial_position (tuple): The start position of the robot (x, y).
+        initial_direction (str): The start direction of the robot ('N', 'E', 'S', 'W').
+        policy (callable): Maps a sensor dict to a command ('F', 'L', 'R') or None to stop.
+        max_steps (int): The maximum number of steps to simulate.
+        target_coverage (float): The coverage at which the run ends early.
+        milestones (tuple of float): Coverage levels to record the step count of.
+
+    Returns:
+        dict: The run statistics, see HeadlessSimulation.run.
+    """
+    simulation = HeadlessSimulation(grid, initial_position, initial_direction, policy)
+    try:
+        return simulation.run(max_steps=max_steps, target_coverage=target_coverage, milestones=milestones)
+    finally:
+        simulation.close()
+
+def main(argv=None, prog=None):
+    """
+    Runs one headless episode from the command line and prints its statistics.
+
+    Only the modules a run needs are imported, so pyserial is loaded only with --port and the planners only
+    for their policies.
+
+    Args:
+        argv (list of str): The command line arguments; None uses sys.argv.
+        prog (str): The program name shown in the usage, e.g. 'cli.py headless'.
+    """
+    parser = argparse.ArgumentParser(prog=prog, description="Headless simulation of one cleaning run")
+    parser.add_argument('--map', metavar='PATH', help="Map file (.map) or PNG floor plan; an empty room by default")
+    parser.add_argument('--size', type=int, default=10, help="Width and height of the empty room")
+    parser.add_argument('--start', type=int, nargs=2, default=(0, 0), metavar=('X', 'Y'))
+    parser.add_argument('--direction', choices=DIRECTIONS, default='N')
+    parser.add_argument('--policy', default='random_turn',
+                        choices=('random_turn', 'firmware', 'boustrophedon', 'frontier'))
+    parser.add_argument('--port', help="Ask the controller on this serial port (or 'emulator') instead of --policy")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--max-steps', type=int, default=10000)
+    parser.add_argument('--target-coverage', type=float, default=1.0)
+    parser.add_argument('--record', metavar='PATH', help="Record the run to a trajectory file for replay.py")
+    args = parser.parse_args(argv)
+
+    if args.map:
+        from map_file import open_map, import_png
+        grid = import_png(args.map) if args.map.lower().endswith('.png') else open_map(args.map)
+    else:
+        grid = Grid(args.size, args.size)
+    start = tuple(args.start)
+
+    serial_comm = None
+    if args.port:
+        from serial_utils import open_serial_connection
+        serial_comm = open_serial_connection(args.port)
+        policy = make_serial_policy(serial_comm)
+    elif args.policy == 'random_turn':
+        policy = make_random_turn_policy(args.seed)
+    else:
+        from sweep import POLICIES
+        policy = POLICIES[args.policy](grid, start, args.direction, args.seed)
+
+    recorder = None
+    if args.record:
+        from trajectory import TrajectoryRecorder
+        recorder = TrajectoryRecorder(args.record, grid)
+    simulation = HeadlessSimulation(grid, start, args.direction, policy, recorder=recorder)
+    try:
+        result = simulation.run(max_steps=args.max_steps, target_coverage=args.target_coverage)
+    finally:
+        simulation.close()
+        if recorder:
+            recorder.close()
+        if serial_comm:
+            serial_comm.close()
+    print(f"Result: {result}")
+
+if __name__ == "__main__":
+    main()
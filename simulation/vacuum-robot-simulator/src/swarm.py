@@ -0,0 +1,199 @@
+import numpy as np
+import protocol
+from grid import CellState
+from robot import DIRECTIONS, HEADING_INDEX, DIRECTION_OFFSETS
+from sensor_cache import SensorCache, FRONT_BIT, LEFT_BIT, RIGHT_BIT
+
+# Command codes, matching the firmware's FORWARD/TURN_LEFT/TURN_RIGHT/STOP defines
+NO_COMMAND = 0
+FORWARD = 1
+TURN_LEFT = 2
+TURN_RIGHT = 3
+STOP = 4
+
+_OFFSETS = np.array(DIRECTION_OFFSETS, dtype=np.intp)
+
+def firmware_policy(sensor_bits, rng):
+    """
+    Vectorized version of the firmware's decide_movement rule.
+
+    Args:
+        sensor_bits (numpy.ndarray): Packed sensor bits per robot, see RobotSwarm.sensor_bits.
+        rng (numpy.random.Generator): The random number generator used for the turn direction.
+
+    Returns:
+        numpy.ndarray: The command code per robot.
+    """
+    front = (sensor_bits >> 3) & 1
+    turns = TURN_LEFT + rng.integers(0, 2, size=len(sensor_bits), dtype=np.uint8)
+    return np.where(front == 1, turns, FORWARD).astype(np.uint8)
+
+def make_serial_swarm_policy(serial_comm, timeout=1.0):
+    """
+    Creates a swarm policy that asks the controller for the commands of all robots, batching up to
+    protocol.MAX_COUNT robots into each binary frame.
+
+    Args:
+        serial_comm (SerialCommunication): A connection opened with binary replies, e.g.
+            open_serial_connection(port, binary=True).
+        timeout (float): How long to wait for each reply in seconds.
+
+    Returns:
+        callable: A policy for RobotSwarm.step; robots whose reply is missing get NO_COMMAND.
+    """
+    next_sequence_id = [0]
+
+    def policy(sensor_bits):
+        commands = np.full(len(sensor_bits), NO_COMMAND, dtype=np.uint8)
+        pending = {}  # sequence ID -> index of the first robot in the frame
+        for start in range(0, len(sensor_bits), protocol.MAX_COUNT):
+            sequence_id = next_sequence_id[0]
+            next_sequence_id[0] = (sequence_id + 1) % protocol.SEQUENCE_MODULO
+            serial_comm.send_data(protocol.encode_frame(sequence_id, sensor_bits[start:start + protocol.MAX_COUNT]))
+            pending[sequence_id] = start
+        while pending:
+            frame = serial_comm.receive_frame(timeout=timeout)
+            if frame is None:
+                break
+            sequence_id, codes = frame
+            start = pending.pop(sequence_id, None)
+            if start is not None:
+                commands[start:start + len(codes)] = codes
+        return commands
+
+    return policy
+
+class RobotSwarm:
+    def __init__(self, grid, positions, directions, sensor_cache=None, heatmap=None):
+        """
+        Initializes a swarm of robots that share one grid.
+
+        Robots do not block each other; each one only collides with obstacles and the grid border.
+
+        Args:
+            grid (Grid): The grid shared by all robots.
+            positions (list of tuple): The start position (x, y) of every robot.
+            directions (list of str): The start direction ('N', 'E', 'S', 'W') of every robot.
+            sensor_cache (SensorCache): The sensor cache of the grid, created if not given.
+            heatmap (VisitCounter): Counts the cells the robots move into, starting with their start cells.
+        """
+        positions = np.asarray(positions, dtype=np.intp).reshape(-1, 2)
+        self.grid = grid
+        self.heading = np.array([HEADING_INDEX[direction] for direction in directions], dtype=np.intp)
+        if len(self.heading) != len(positions):
+            raise ValueError("positions and directions must have the same length")
+        self.sensor_cache = sensor_cache if sensor_cache is not None else SensorCache(grid)
+        self._padded_width = self.sensor_cache.padded_width
+        self._plane_size = self.sensor_cache.padded_width * self.sensor_cache.padded_height
+        self._step = _OFFSETS[:, 1] * self._padded_width + _OFFSETS[:, 0]
+        # Positions are kept as flat indices into the padded tables of the sensor cache,
+        # so a move is a single addition and sensing is a single gather
+        self.index = (positions[:, 1] + 1) * self._padded_width + (positions[:, 0] + 1)
+        self.heatmap = heatmap
+        if heatmap is not None:
+            heatmap.visit_many(positions[:, 0], positions[:, 1])
+
+    def __len__(self):
+        return len(self.index)
+
+    @property
+    def x(self):
+        """numpy.ndarray: The column of every robot."""
+        return self.index % self._padded_width - 1
+
+    @property
+    def y(self):
+        """numpy.ndarray: The row of every robot."""
+        return self.index // self._padded_width - 1
+
+    @property
+    def directions(self):
+        """list of str: The current direction of every robot."""
+        return [DIRECTIONS[heading] for heading in self.heading.tolist()]
+
+    def sensor_codes(self):
+        """
+        Looks up the packed sensor codes of all robots in the sensor cache.
+
+        Returns:
+            numpy.ndarray: The uint8 code per robot, see SensorCache.code.
+        """
+        return self.sensor_cache.table.reshape(-1)[self.heading * self._plane_size + self.index]
+
+    def simulate_sensors(self):
+        """
+        Simulates the front, left and right sensors of all robots at once.
+
+        Uses the same rules as Robot.simulate_sensors.
+
+        Returns:
+            numpy.ndarray: A bool array of shape (N, 3) with the 'front', 'left' and 'right' readings.
+        """
+        codes = self.sensor_codes()
+        sensors = np.empty((len(codes), 3), dtype=bool)
+        sensors[:, 0] = (codes & FRONT_BIT) != 0
+        sensors[:, 1] = (codes & LEFT_BIT) != 0
+        sensors[:, 2] = (codes & RIGHT_BIT) != 0
+        return sensors
+
+    def sensor_bits(self):
+        """
+        Simulates all sensors and packs them in the layout of format_sensor_data_as_bits.
+
+        Returns:
+            numpy.ndarray: A uint8 array with front << 3 | left << 2 | right << 1 per robot.
+        """
+        return self.sensor_codes() << 1
+
+    def simulate_ranges(self, range_sensor):
+        """
+        Measures the distance readings of all robots at once.
+
+        Args:
+            range_sensor (RangeSensor): The sensor model.
+
+        Returns:
+            numpy.ndarray: The distance in cells per robot and beam.
+        """
+        return range_sensor.cast(self.grid, self.x, self.y, self.heading)
+
+    def execute_commands(self, commands, mark_visited=True):
+        """
+        Applies one command to every robot at once.
+
+        Args:
+            commands (numpy.ndarray): The command code per robot (FORWARD, TURN_LEFT, TURN_RIGHT, STOP or NO_COMMAND).
+            mark_visited (bool): Whether to mark the cells the robots move into as visited on the grid.
+
+        Returns:
+            numpy.ndarray: A bool array that is True for robots whose forward move was blocked.
+        """
+        commands = np.asarray(commands)
+        self.heading = (self.heading + (commands == TURN_RIGHT) - (commands == TURN_LEFT)) % 4
+
+        forward = commands == FORWARD
+        step = self._step[self.heading]
+        blocked = forward & (self.sensor_cache.padded.reshape(-1)[self.index + step] != 0)
+        moving = forward & ~blocked
+        self.index += step * moving
+
+        if (mark_visited or self.heatmap is not None) and moving.any():
+            rows, columns = np.divmod(self.index[moving], self._padded_width)
+            if mark_visited:
+                self.grid.set_many(columns - 1, rows - 1, CellState.VISITED)
+            if self.heatmap is not None:
+                self.heatmap.visit_many(columns - 1, rows - 1)
+        return blocked
+
+    def step(self, policy, mark_visited=True):
+        """
+        Runs one sense -> decide -> act cycle for all robots.
+
+        Args:
+            policy (callable): Maps the packed sensor bits of all robots to an array of command codes.
+            mark_visited (bool): Whether to mark the cells the robots move into as visited on the grid.
+
+        Returns:
+            numpy.ndarray: A bool array that is True for robots whose forward move was blocked.
+        """
+        return self.execute_commands(policy(self.sensor_bits()), mark_visited=mark_visited)
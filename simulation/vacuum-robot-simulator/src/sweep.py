@@ -0,0 +1,227 @@
+import argparse
+import itertools
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+from grid import Grid
+from simulation import run_episode, make_random_turn_policy
+from firmware_emulator import AvrRand, decide_movement
+from planner import BoustrophedonPlanner, FrontierPlanner
+from map_file import open_map
+from map_generator import generate_scatter, load_or_generate
+from swarm import FORWARD, TURN_LEFT, TURN_RIGHT
+
+# Coverage level whose step count is reported as 'steps_to_target'
+TARGET_COVERAGE = 0.95
+
+_FIRMWARE_COMMANDS = {FORWARD: 'F', TURN_LEFT: 'L', TURN_RIGHT: 'R'}
+
+def make_firmware_policy(seed=1):
+    """
+    Creates a policy that runs the firmware's decide_movement with the emulated avr-libc rand().
+
+    Args:
+        seed (int): The seed of the emulated rand().
+
+    Returns:
+        callable: A policy mapping a sensor dict to a command ('F', 'L' or 'R'), or None on STOP.
+    """
+    rng = AvrRand(seed)
+
+    def policy(sensors):
+        values = {'front': sensors['front'], 'left': sensors['left'], 'right': sensors['right'], 'collision': 0}
+        return _FIRMWARE_COMMANDS.get(decide_movement(values, rng))
+
+    return policy
+
+# Policy factories by name. Each takes (grid, start, direction, seed) so tasks only carry the name.
+POLICIES = {
+    'random_turn': lambda grid, start, direction, seed: make_random_turn_policy(seed),
+    'firmware': lambda grid, start, direction, seed: make_firmware_policy(seed + 1),
+    'boustrophedon': lambda grid, start, direction, seed: BoustrophedonPlanner(grid).make_policy(start, direction),
+    'frontier': lambda grid, start, direction, seed: FrontierPlanner(grid).make_policy(start, direction),
+}
+
+# Shared-memory maps attached by each worker process, see _attach_maps
+_worker_maps = []
+_worker_blocks = []
+
+def _attach_maps(specs):
+    """
+    Worker initializer that maps the shared grids into the worker process.
+
+    Args:
+        specs (list of tuple): (shared memory name, width, height) per map.
+    """
+    for name, width, height in specs:
+        block = shared_memory.SharedMemory(name=name)
+        _worker_blocks.append(block)
+        _worker_maps.append(np.ndarray((height, width), dtype=np.uint8, buffer=block.buf))
+
+def _run_tasks(tasks, max_steps):
+    """
+    Runs a batch of episodes in a worker process.
+
+    Args:
+        tasks (list of tuple): (map index, start, direction, policy name, seed) per episode.
+        max_steps (int): The step limit of each episode.
+
+    Returns:
+        list of tuple: (policy name, steps to TARGET_COVERAGE or -1, revisit ratio, collisions, coverage) per episode.
+    """
+    results = []
+    for map_index, start, direction, policy_name, seed in tasks:
+        cells = _worker_maps[map_index]
+        # Every episode marks cells, so it works on a private copy of the shared map
+        grid = Grid(cells.shape[1], cells.shape[0], cells=cells.copy())
+        policy = POLICIES[policy_name](grid, start, direction, seed)
+        result = run_episode(grid, start, direction, policy, max_steps=max_steps, milestones=(TARGET_COVERAGE,))
+        revisit_ratio = result['revisits'] / result['forward_moves'] if result['forward_moves'] else 0.0
+        results.append((policy_name, result['milestone_steps'].get(TARGET_COVERAGE, -1), revisit_ratio,
+                        result['collisions'], result['coverage']))
+    return results
+
+def summarize(values):
+    """
+    Summarizes a distribution.
+
+    Args:
+        values (numpy.ndarray): The samples.
+
+    Returns:
+        dict: 'mean', 'p5', 'median' and 'p95' of the samples, or None if there are none.
+    """
+    if len(values) == 0:
+        return None
+    p5, median, p95 = np.percentile(values, [5, 50, 95])
+    return {'mean': float(np.mean(values)), 'p5': float(p5), 'median': float(median), 'p95': float(p95)}
+
+def aggregate(results):
+    """
+    Aggregates episode results per policy.
+
+    Args:
+        results (list of tuple): The episode results returned by the workers.
+
+    Returns:
+        dict: Per policy name, the number of 'episodes', the 'success_rate' of reaching TARGET_COVERAGE and
+        the distributions of 'steps_to_target' (successful episodes only), 'revisit_ratio', 'collisions'
+        and 'coverage'.
+    """
+    by_policy = {}
+    for policy_name, steps, revisit_ratio, collisions, coverage in results:
+        by_policy.setdefault(policy_name, []).append((steps, revisit_ratio, collisions, coverage))
+    summary = {}
+    for policy_name, rows in by_policy.items():
+        data = np.array(rows, dtype=float)
+        steps = data[:, 0]
+        reached = steps >= 0
+        summary[policy_name] = {
+            'episodes': len(rows),
+            'success_rate': float(reached.mean()),
+            'steps_to_target': summarize(steps[reached]),
+            'revisit_ratio': summarize(data[:, 1]),
+            'collisions': summarize(data[:, 2]),
+            'coverage': summarize(data[:, 3]),
+        }
+    return summary
+
+def run_sweep(grids, starts, policies, seeds, max_steps=10000, workers=None, batch_size=64):
+    """
+    Runs every combination of map, start pose, policy and seed across a process pool.
+
+    The maps are copied once into shared memory, so tasks only carry indices and names.
+
+    Args:
+        grids (list of Grid): The maps.
+        starts (list of tuple): ((x, y), direction) start poses; poses on an obstacle of a map are skipped.
+        policies (list of str): Names from POLICIES.
+        seeds (iterable of int): The seeds to run each combination with.
+        max_steps (int): The step limit of each episode.
+        workers (int): The number of worker processes, or None for one per CPU.
+        batch_size (int): The number of episodes sent to a worker at once.
+
+    Returns:
+        dict: The per-policy summary, see aggregate.
+    """
+    for policy_name in policies:
+        if policy_name not in POLICIES:
+            raise ValueError(f"Unknown policy {policy_name!r}, expected one of {sorted(POLICIES)}")
+    tasks = []
+    for (map_index, grid), (start, direction), policy_name, seed in itertools.product(
+            enumerate(grids), starts, policies, seeds):
+        if grid.in_bounds(*start) and not grid.is_obstacle(*start):
+            tasks.append((map_index, start, direction, policy_name, seed))
+    batches = [tasks[i:i + batch_size] for i in range(0, len(tasks), batch_size)]
+
+    blocks = []
+    try:
+        specs = []
+        for grid in grids:
+            block = shared_memory.SharedMemory(create=True, size=max(grid.cells.nbytes, 1))
+            blocks.append(block)
+            np.ndarray(grid.cells.shape, dtype=np.uint8, buffer=block.buf)[:] = grid.cells
+            specs.append((block.name, grid.width, grid.height))
+        results = []
+        with ProcessPoolExecutor(max_workers=workers, initializer=_attach_maps, initargs=(specs,)) as executor:
+            for batch_results in executor.map(_run_tasks, batches, itertools.repeat(max_steps)):
+                results.extend(batch_results)
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
+    return aggregate(results)
+
+def make_random_map(width, height, obstacle_ratio, seed):
+    """
+    Creates a map with randomly scattered obstacle cells.
+
+    Args:
+        width (int): The number of columns.
+        height (int): The number of rows.
+        obstacle_ratio (float): The probability of a cell being an obstacle.
+        seed (int): The seed for the random number generator.
+
+    Returns:
+        Grid: The map; cell (0, 0) is always free.
+    """
+    return generate_scatter(width, height, seed, obstacle_ratio=obstacle_ratio)
+
+def main(argv=None, prog=None):
+    """
+    Runs a Monte Carlo sweep from the command line and prints the per-policy summary.
+
+    Args:
+        argv (list of str): The command line arguments; None uses sys.argv.
+        prog (str): The program name shown in the usage, e.g. 'cli.py sweep'.
+    """
+    parser = argparse.ArgumentParser(prog=prog, description="Monte Carlo sweep of controller policies on random maps.")
+    parser.add_argument('--policies', nargs='+', default=['random_turn', 'firmware'], choices=sorted(POLICIES))
+    parser.add_argument('--map-files', nargs='+', metavar='PATH', help="Map files to use instead of random maps")
+    parser.add_argument('--maps', type=int, default=4, help="Number of random maps")
+    parser.add_argument('--size', type=int, default=20, help="Width and height of each map")
+    parser.add_argument('--obstacles', type=float, default=0.1, help="Obstacle ratio of each map")
+    parser.add_argument('--floor-plans', action='store_true',
+                        help="Use generated floor plans (cached on disk) instead of scattered obstacles")
+    parser.add_argument('--seeds', type=int, default=25, help="Seeds per map, start pose and policy")
+    parser.add_argument('--max-steps', type=int, default=10000)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args(argv)
+
+    if args.map_files:
+        grids = [open_map(path) for path in args.map_files]
+    elif args.floor_plans:
+        grids = [load_or_generate('floor_plan', args.size, args.size, seed) for seed in range(args.maps)]
+    else:
+        grids = [make_random_map(args.size, args.size, args.obstacles, seed) for seed in range(args.maps)]
+    starts = [((0, 0), 'N'), ((0, 0), 'E')]
+    start_time = time.perf_counter()
+    summary = run_sweep(grids, starts, args.policies, range(args.seeds), max_steps=args.max_steps, workers=args.workers)
+    elapsed = time.perf_counter() - start_time
+    for policy_name, stats in summary.items():
+        print(f"{policy_name}: {stats}")
+    print(f"Elapsed: {elapsed:.2f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+import struct
+import numpy as np
+from grid import Grid, CellState
+from chunked_grid import ChunkedGrid
+
+# File layout: header, the grid as width * height uint8 cell codes at the start of the recording, records
+TRAJECTORY_MAGIC = b'TRAJ'
+TRAJECTORY_VERSION = 1
+HEADER = struct.Struct('<4sHHHH')  # magic, version, width, height, record size
+RECORD = struct.Struct('<IHHBBBxf')  # tick, x, y, heading, sensor byte, command byte, padding, latency
+RECORD_DTYPE = np.dtype({
+    'names': ['tick', 'x', 'y', 'heading', 'sensors', 'command', 'latency'],
+    'formats': ['<u4', '<u2', '<u2', 'u1', 'u1', 'u1', '<f4'],
+    'offsets': [0, 4, 6, 8, 9, 10, 12],
+    'itemsize': RECORD.size,
+})
+MAX_SIDE = 0xFFFF  # The header and the records store coordinates as uint16
+NO_COMMAND = 0  # Command byte of a record the controller did not answer, e.g. the final pose
+
+class TrajectoryRecorder:
+    def __init__(self, path, grid, capacity=4096):
+        """
+        Opens a trajectory file and writes the header and the current grid.
+
+        Records are packed into a preallocated buffer and written in blocks of capacity records.
+
+        Args:
+            path (str): The file to write.
+            grid (Grid or ChunkedGrid): The grid at the start of the recording.
+            capacity (int): The number of records buffered before they are written.
+
+        Raises:
+            ValueError: If the grid is wider or higher than MAX_SIDE cells.
+        """
+        if grid.width > MAX_SIDE or grid.height > MAX_SIDE:
+            raise ValueError(f"Trajectory files hold grids up to {MAX_SIDE}x{MAX_SIDE} cells, "
+                             f"got {grid.width}x{grid.height}")
+        self.file = open(path, 'wb')
+        self.file.write(HEADER.pack(TRAJECTORY_MAGIC, TRAJECTORY_VERSION, grid.width, grid.height, RECORD.size))
+        if isinstance(grid, ChunkedGrid):
+            # One band of tile rows at a time, so a sparse grid is never copied into a dense array at once
+            for y0 in range(0, grid.height, grid.tile_size):
+                self.file.write(grid.region(0, y0, grid.width, min(y0 + grid.tile_size, grid.height)).tobytes())
+        else:
+            self.file.write(grid.cells.tobytes())
+        self.capacity = capacity
+        self._buffer = bytearray(capacity * RECORD.size)
+        self._count = 0
+        self.records_written = 0
+
+    def record(self, tick, x, y, heading, sensors, command, latency=0.0):
+        """
+        Appends one step.
+
+        Args:
+            tick (int): The step number.
+            x (int): The column of the robot when the sensors were read.
+            y (int): The row of the robot when the sensors were read.
+            heading (int): The heading index of the robot, see robot.DIRECTIONS.
+            sensors (int): The sensor byte sent to the controller, see format_sensor_data_as_bits.
+            command (int): The movement code the controller answered with, or NO_COMMAND.
+            latency (float): The round-trip time of the command in seconds.
+        """
+        RECORD.pack_into(self._buffer, self._count * RECORD.size, tick, x, y, heading, sensors, command, latency)
+        self._count += 1
+        self.records_written += 1
+        if self._count == self.capacity:
+            self.flush()
+
+    def flush(self):
+        """Writes the buffered records to the file."""
+        self.file.write(memoryview(self._buffer)[:self._count * RECORD.size])
+        self.file.flush()
+        self._count = 0
+
+    def close(self):
+        """Writes the buffered records and closes the file."""
+        self.flush()
+        self.file.close()
+
+class TrajectoryReader:
+    def __init__(self, path):
+        """
+        Opens a trajectory file. The records are memory-mapped, so opening is instant for any length.
+
+        Args:
+            path (str): The file to read.
+        """
+        with open(path, 'rb') as file:
+            magic, version, width, height, record_size = HEADER.unpack(file.read(HEADER.size))
+            if magic != TRAJECTORY_MAGIC or version != TRAJECTORY_VERSION or record_size != RECORD.size:
+                raise ValueError(f"{path} is not a version {TRAJECTORY_VERSION} trajectory file")
+            cells = np.frombuffer(file.read(width * height), dtype=np.uint8).reshape(height, width).copy()
+            file.seek(0, 2)
+            size = file.tell()
+        self.width = width
+        self.height = height
+        self.initial_cells = cells
+        offset = HEADER.size + width * height
+        # A recording cut short by a crash may end with a partial record, which is ignored
+        count = (size - offset) // RECORD.size
+        if count:
+            self.records = np.memmap(path, dtype=RECORD_DTYPE, mode='r', offset=offset, shape=(count,))
+        else:
+            self.records = np.zeros(0, dtype=RECORD_DTYPE)
+
+    def __len__(self):
+        return len(self.records)
+
+    def grid_at(self, index):
+        """
+        Reconstructs the grid as it was when the sensors of a record were read.
+
+        Args:
+            index (int): The record index.
+
+        Returns:
+            Grid: A new grid with the cells driven over before the record marked as visited and the robot cell
+            of the record marked as robot.
+        """
+        grid = Grid(self.width, self.height, cells=self.initial_cells.copy())
+        grid.cells[grid.cells == CellState.ROBOT] = CellState.VISITED
+        grid.recount()
+        self.apply(grid, 0, index)
+        return grid
+
+    def apply(self, grid, start, stop):
+        """
+        Advances a grid reconstructed at record start to record stop.
+
+        Args:
+            grid (Grid): The grid as returned by grid_at(start).
+            start (int): The record the grid currently shows.
+            stop (int): The record to advance to; must not be before start.
+        """
+        if len(self.records) == 0:
+            return
+        records = self.records[start:stop + 1]
+        grid.set_many(records['x'][:-1].astype(np.intp), records['y'][:-1].astype(np.intp), CellState.VISITED)
+        last = records[-1]
+        grid.set(int(last['x']), int(last['y']), CellState.ROBOT)
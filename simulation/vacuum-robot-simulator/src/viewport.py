@@ -0,0 +1,438 @@
+import math
+import numpy as np
+import pygame
+from grid import CellState
+from chunked_grid import ChunkedGrid
+from renderer import CELL_COLORS, ROBOT_ROTATIONS, ROBOT_BACKGROUND
+from heatmap import HEAT_PALETTE
+
+MIN_CELL_SIZE = 0.05  # Pixels per cell when zoomed out furthest
+MAX_CELL_SIZE = 100.0
+SPRITE_MIN_CELL_SIZE = 8  # Below this cell size the robot is drawn as a colored cell instead of its sprite
+ROBOT_COLOR = (255, 255, 0)  # The robot cell when zoomed out, as in the legend
+VIEW_BACKGROUND = (255, 255, 255)
+MAX_CHANGED_CELLS = 1024  # More changed cells than this between two frames redraw the whole view
+
+def reduce_max(array, block):
+    """
+    Reduces blocks of block x block cells to their maximum.
+
+    Args:
+        array (numpy.ndarray): The 2D array. Partial blocks at the edges are padded with zeros.
+        block (int): The block size.
+
+    Returns:
+        numpy.ndarray: The reduced array.
+    """
+    height, width = -(-array.shape[0] // block) * block, -(-array.shape[1] // block) * block
+    if (height, width) != array.shape:
+        array = np.pad(array, ((0, height - array.shape[0]), (0, width - array.shape[1])))
+    # One strided maximum per offset in the block is far faster than max() over a reshaped view
+    reduced = array[::block, ::block].copy()
+    for dy in range(block):
+        for dx in range(block):
+            if dx or dy:
+                np.maximum(reduced, array[dy::block, dx::block], out=reduced)
+    return reduced
+
+class Viewport:
+    def __init__(self, rect, grid_width, grid_height, cell_size=50):
+        """
+        Camera that maps grid cells to an area of the screen, with zoom and pan.
+
+        Args:
+            rect (pygame.Rect): The screen area the grid is drawn in.
+            grid_width (int): The number of columns of the grid.
+            grid_height (int): The number of rows of the grid.
+            cell_size (float): The initial size of a cell in pixels.
+        """
+        self.rect = pygame.Rect(rect)
+        self.grid_width = grid_width
+        self.grid_height = grid_height
+        self.cell_size = float(cell_size)
+        self.offset_x = 0.0  # Grid coordinates of the top-left corner of the view
+        self.offset_y = 0.0
+        self.version = 0  # Incremented on every camera change, so renderers know when to redraw
+
+    def _changed(self):
+        # Keep part of the grid in view
+        view_width = self.rect.width / self.cell_size
+        view_height = self.rect.height / self.cell_size
+        self.offset_x = min(max(self.offset_x, -view_width / 2), self.grid_width - view_width / 2)
+        self.offset_y = min(max(self.offset_y, -view_height / 2), self.grid_height - view_height / 2)
+        self.version += 1
+
+    def fit(self):
+        """Zooms so the whole grid is visible and moves it to the top-left corner."""
+        self.cell_size = min(max(min(self.rect.width / self.grid_width, self.rect.height / self.grid_height),
+                                 MIN_CELL_SIZE), MAX_CELL_SIZE)
+        self.offset_x = 0.0
+        self.offset_y = 0.0
+        self._changed()
+
+    def pan(self, dx, dy):
+        """
+        Moves the view by a distance in pixels, e.g. a mouse drag.
+
+        Args:
+            dx (float): The horizontal distance; positive moves the grid to the right.
+            dy (float): The vertical distance; positive moves the grid down.
+        """
+        self.offset_x -= dx / self.cell_size
+        self.offset_y -= dy / self.cell_size
+        self._changed()
+
+    def zoom(self, factor, anchor=None):
+        """
+        Scales the cell size, keeping the cell under the anchor in place.
+
+        Args:
+            factor (float): The scale factor, greater than 1 to zoom in.
+            anchor (tuple): The screen position to zoom around; defaults to the center of the view.
+        """
+        anchor_x, anchor_y = anchor if anchor is not None else self.rect.center
+        grid_x, grid_y = self.screen_to_grid(anchor_x, anchor_y)
+        self.cell_size = min(max(self.cell_size * factor, MIN_CELL_SIZE), MAX_CELL_SIZE)
+        self.offset_x = grid_x - (anchor_x - self.rect.x) / self.cell_size
+        self.offset_y = grid_y - (anchor_y - self.rect.y) / self.cell_size
+        self._changed()
+
+    def center_on(self, x, y):
+        """
+        Moves the view so a cell is in its center.
+
+        Args:
+            x (int): The column.
+            y (int): The row.
+        """
+        self.offset_x = x + 0.5 - self.rect.width / self.cell_size / 2
+        self.offset_y = y + 0.5 - self.rect.height / self.cell_size / 2
+        self._changed()
+
+    def screen_to_grid(self, px, py):
+        """
+        Converts a screen position to fractional grid coordinates.
+
+        Args:
+            px (int): The screen x coordinate.
+            py (int): The screen y coordinate.
+
+        Returns:
+            tuple: The grid coordinates (x, y) as floats.
+        """
+        return (self.offset_x + (px - self.rect.x) / self.cell_size,
+                self.offset_y + (py - self.rect.y) / self.cell_size)
+
+    def screen_to_cell(self, px, py):
+        """
+        Finds the cell under a screen position.
+
+        Args:
+            px (int): The screen x coordinate.
+            py (int): The screen y coordinate.
+
+        Returns:
+            tuple: The cell (x, y), or None if the position is outside the view or the grid.
+        """
+        if not self.rect.collidepoint(px, py):
+            return None
+        x, y = self.screen_to_grid(px, py)
+        x, y = math.floor(x), math.floor(y)
+        if 0 <= x < self.grid_width and 0 <= y < self.grid_height:
+            return x, y
+        return None
+
+    def visible_cells(self):
+        """
+        Returns the range of cells that are at least partly visible.
+
+        Returns:
+            tuple: (x0, y0, x1, y1), where x1 and y1 are exclusive; empty if the grid is out of view.
+        """
+        x0 = max(math.floor(self.offset_x), 0)
+        y0 = max(math.floor(self.offset_y), 0)
+        x1 = min(math.ceil(self.offset_x + self.rect.width / self.cell_size), self.grid_width)
+        y1 = min(math.ceil(self.offset_y + self.rect.height / self.cell_size), self.grid_height)
+        return x0, y0, max(x1, x0), max(y1, y0)
+
+    def cell_to_screen(self, x, y):
+        """
+        Converts a cell's top-left corner to a screen position.
+
+        Args:
+            x (float): The column.
+            y (float): The row.
+
+        Returns:
+            tuple: The screen position (px, py).
+        """
+        return (self.rect.x + round((x - self.offset_x) * self.cell_size),
+                self.rect.y + round((y - self.offset_y) * self.cell_size))
+
+class ViewportRenderer:
+    def __init__(self, screen, grid, robot_image, viewport, heatmap=None):
+        """
+        Draws the visible part of a grid through a viewport.
+
+        The visible cells are turned into an RGB array with one pixel per cell, copied into a surface with
+        surfarray.blit_array and scaled to the screen in a single blit. When a cell is smaller than a pixel,
+        blocks of cells are first reduced to one pixel each, keeping the highest cell code so the robot and
+        obstacles stay visible. While the camera stays put, only the cells that changed and the robot sprites
+        are redrawn, from a copy of the scaled view kept without sprites.
+
+        Args:
+            screen (pygame.Surface): The Pygame screen to draw on.
+            grid (Grid): The grid to draw.
+            robot_image (pygame.Surface): The image of the robot facing north.
+            viewport (Viewport): The camera.
+            heatmap (VisitCounter): Visit counts that toggle_heatmap shows instead of the visited color.
+        """
+        self.screen = screen
+        self.grid = grid
+        self.robot_image = robot_image
+        self.viewport = viewport
+        self.palette = np.zeros((len(CellState), 3), dtype=np.uint8)
+        for state, color in CELL_COLORS.items():
+            self.palette[state] = color
+        self.palette[CellState.ROBOT] = ROBOT_COLOR
+        # The heat colors follow the cell colors, so the overlay is colored with a single lookup
+        self.heat_palette = np.concatenate([self.palette, HEAT_PALETTE])
+        self.heatmap = heatmap
+        self.show_heatmap = False
+        self._sprites = {}
+        self._surface = None  # One pixel per visible cell, reused while the size stays the same
+        self._background = None  # The scaled view without sprites, as blitted by the last full draw
+        self._layout = None  # (x0, y0, block, columns, rows, left, top, width, height) of the last full draw
+        self._robot_cells = set()  # Visible cells (x, y) drawn with a robot sprite
+        self._robot_direction = None
+        self._changed = set()  # Cells (x, y) changed since the last draw
+        self._dirty = True
+        self._drawn = None  # (camera version, maximum visit count of the heatmap) of the last full draw
+        grid.add_listener(self._on_cells_changed)
+
+    def close(self):
+        """Stops following changes of the grid."""
+        self.grid.remove_listener(self._on_cells_changed)
+
+    def _on_cells_changed(self, xs, ys):
+        if self._dirty:
+            return
+        if xs is None:
+            self._dirty = True
+        elif isinstance(xs, np.ndarray):
+            self._changed.update(zip(xs.tolist(), ys.tolist()))
+        else:
+            self._changed.add((int(xs), int(ys)))
+        if len(self._changed) > MAX_CHANGED_CELLS:
+            self._dirty = True
+        if self._dirty:
+            self._changed.clear()
+
+    def invalidate(self):
+        """Forces a full redraw on the next call to draw."""
+        self._dirty = True
+        self._changed.clear()
+
+    def toggle_heatmap(self):
+        """
+        Switches between the cell colors and the visit heatmap, where visited cells are colored by how often
+        they were entered. Does nothing without a heatmap.
+        """
+        if self.heatmap is not None:
+            self.show_heatmap = not self.show_heatmap
+            self.invalidate()
+
+    def _cell_surface(self, colors):
+        """
+        Copies an RGB array into the reused surface with one pixel per cell.
+
+        Args:
+            colors (numpy.ndarray): The colors, shape (rows, columns, 3).
+
+        Returns:
+            pygame.Surface: The surface.
+        """
+        size = (colors.shape[1], colors.shape[0])
+        if self._surface is None or self._surface.get_size() != size:
+            self._surface = pygame.Surface(size)
+        pygame.surfarray.blit_array(self._surface, colors.transpose(1, 0, 2))
+        return self._surface
+
+    def _sprite(self, direction, size):
+        """
+        Returns the robot image rotated to a direction and scaled to a cell size, caching the result.
+
+        Args:
+            direction (str): The direction ('N', 'E', 'S', 'W').
+            size (int): The cell size in pixels.
+
+        Returns:
+            pygame.Surface: The sprite.
+        """
+        key = (direction, size)
+        if key not in self._sprites:
+            scaled = pygame.transform.scale(self.robot_image, (size, size))
+            self._sprites[key] = pygame.transform.rotate(scaled, ROBOT_ROTATIONS[direction])
+        return self._sprites[key]
+
+    def _window(self, x0, y0, x1, y1):
+        """
+        Returns the cell codes of a rectangle of the grid.
+
+        Args:
+            x0 (int): The first column.
+            y0 (int): The first row.
+            x1 (int): The column after the last one.
+            y1 (int): The row after the last one.
+
+        Returns:
+            numpy.ndarray: The uint8 cell codes; a view for a Grid and a copy for a ChunkedGrid.
+        """
+        if isinstance(self.grid, ChunkedGrid):
+            return self.grid.region(x0, y0, x1, y1)
+        return self.grid.cells[y0:y1, x0:x1]
+
+    def _colors(self, cells, counts, heatmap, draw_sprites):
+        """
+        Colors cell codes, with the visit heatmap over the cells the robot entered.
+
+        Args:
+            cells (numpy.ndarray): The cell codes.
+            counts (numpy.ndarray): The visit counts of the same cells, or None without a heatmap.
+            heatmap (VisitCounter): The heatmap shown, or None.
+            draw_sprites (bool): Whether robot cells get the sprite background instead of the robot color.
+
+        Returns:
+            numpy.ndarray: The RGB colors, shape cells.shape + (3,).
+        """
+        if heatmap:
+            # Cells the robot entered take their heat color; unvisited cells, obstacles found on visited cells and
+            # the robot keep theirs. The codes from OBSTACLE up are exactly the obstacles and the robot.
+            index = np.where((counts == 0) | (cells >= CellState.OBSTACLE), cells,
+                             heatmap.levels(counts) + np.uint16(len(CellState)))
+            colors = np.take(self.heat_palette, index, axis=0)
+        else:
+            colors = np.take(self.palette, cells, axis=0)
+        if draw_sprites:
+            colors[cells == CellState.ROBOT] = ROBOT_BACKGROUND
+        return colors
+
+    def _sprite_rect(self, x, y):
+        """Returns the screen area of the robot sprite on a cell."""
+        size = max(round(self.viewport.cell_size), 1)
+        return pygame.Rect(self.viewport.cell_to_screen(x, y), (size, size))
+
+    def draw(self, robot_direction):
+        """
+        Redraws what changed since the last call.
+
+        A camera change, a toggle of the heatmap or a new maximum visit count redraws the whole view; otherwise
+        only the changed cells in view and, after a turn, the robot sprites are redrawn. Visit counts are
+        expected to change together with their cell, as when the robot enters it.
+
+        Args:
+            robot_direction (str): The direction the robot is facing ('N', 'E', 'S', 'W').
+
+        Returns:
+            list of pygame.Rect: The screen areas that were redrawn, for pygame.display.update.
+        """
+        heatmap = self.heatmap if self.show_heatmap else None
+        state = (self.viewport.version, heatmap.max_visits if heatmap else None)
+        if self._dirty or state != self._drawn:
+            self._drawn = state
+            return self._draw_view(robot_direction, heatmap)
+        return self._draw_changes(robot_direction, heatmap)
+
+    def _draw_view(self, robot_direction, heatmap):
+        """Draws the whole view and keeps its scaled background for later partial redraws."""
+        viewport = self.viewport
+        self._dirty = False
+        self._changed.clear()
+        self._layout = None
+        self._robot_cells = set()
+        self._robot_direction = robot_direction
+
+        self.screen.set_clip(viewport.rect)
+        self.screen.fill(VIEW_BACKGROUND, viewport.rect)
+        x0, y0, x1, y1 = viewport.visible_cells()
+        if x1 > x0 and y1 > y0:
+            cells = self._window(x0, y0, x1, y1)
+            draw_sprites = viewport.cell_size >= SPRITE_MIN_CELL_SIZE
+            counts = heatmap.counts[y0:y1, x0:x1] if heatmap else None
+            block = max(1, math.floor(1 / viewport.cell_size))
+            if block > 1:
+                # Several cells per pixel: keep the highest code of each block. The padding is UNVISITED, the
+                # lowest code, so it never hides a cell of a partial block at the edge.
+                cells = reduce_max(cells, block)
+                if heatmap:
+                    counts = reduce_max(counts, block)
+                x1, y1 = x0 + cells.shape[1] * block, y0 + cells.shape[0] * block
+            surface = self._cell_surface(self._colors(cells, counts, heatmap, draw_sprites))
+            left, top = viewport.cell_to_screen(x0, y0)
+            right, bottom = viewport.cell_to_screen(x1, y1)
+            if (right - left, bottom - top) != surface.get_size():
+                surface = pygame.transform.scale(surface, (max(right - left, 1), max(bottom - top, 1)))
+            self.screen.blit(surface, (left, top))
+            self._background = surface
+            self._layout = (x0, y0, block, cells.shape[1], cells.shape[0], left, top) + surface.get_size()
+
+            if draw_sprites:
+                sprite = self._sprite(robot_direction, max(round(viewport.cell_size), 1))
+                for y, x in np.argwhere(cells == CellState.ROBOT).tolist():
+                    self._robot_cells.add((x0 + x, y0 + y))
+                    self.screen.blit(sprite, viewport.cell_to_screen(x0 + x, y0 + y))
+        self.screen.set_clip(None)
+        return [viewport.rect]
+
+    def _draw_changes(self, robot_direction, heatmap):
+        """Redraws the changed cells (or blocks of cells) in view and the robot sprites around them."""
+        viewport = self.viewport
+        changed, self._changed = self._changed, set()
+        turned = robot_direction != self._robot_direction
+        self._robot_direction = robot_direction
+        if self._layout is None or not (changed or turned and self._robot_cells):
+            return []
+        x0, y0, block, columns, rows, left, top, width, height = self._layout
+        draw_sprites = viewport.cell_size >= SPRITE_MIN_CELL_SIZE
+        areas = [self._sprite_rect(x, y) for x, y in self._robot_cells] if turned else []
+        for column, row in {((x - x0) // block, (y - y0) // block) for x, y in changed}:
+            if not (0 <= column < columns and 0 <= row < rows):
+                continue
+            bx, by = x0 + column * block, y0 + row * block
+            cells = self._window(bx, by, min(bx + block, self.grid.width), min(by + block, self.grid.height))
+            cell = cells.max(keepdims=True)
+            counts = heatmap.counts[by:by + cells.shape[0], bx:bx + cells.shape[1]].max(keepdims=True) \
+                if heatmap else None
+            color = self._colors(cell, counts, heatmap, draw_sprites)[0, 0]
+            # transform.scale maps pixel p of the scaled surface to cell p * columns // width
+            px0, px1 = -(-column * width // columns), -(-(column + 1) * width // columns)
+            py0, py1 = -(-row * height // rows), -(-(row + 1) * height // rows)
+            if px1 <= px0 or py1 <= py0:
+                continue
+            rect = pygame.Rect(px0, py0, px1 - px0, py1 - py0)
+            self._background.fill(color, rect)
+            areas.append(rect.move(left, top))
+            if draw_sprites:
+                if (bx, by) in self._robot_cells:
+                    areas.append(self._sprite_rect(bx, by))
+                if cell[0, 0] == CellState.ROBOT:
+                    self._robot_cells.add((bx, by))
+                else:
+                    self._robot_cells.discard((bx, by))
+
+        self.screen.set_clip(viewport.rect)
+        dirty_rects = []
+        for area in areas:
+            area = area.clip(viewport.rect)
+            if area.width and area.height:
+                self.screen.fill(VIEW_BACKGROUND, area)
+                self.screen.blit(self._background, area.topleft, area.move(-left, -top))
+                dirty_rects.append(area)
+        if self._robot_cells and dirty_rects:
+            sprite = self._sprite(robot_direction, max(round(viewport.cell_size), 1))
+            for x, y in self._robot_cells:
+                rect = self._sprite_rect(x, y)
+                if rect.collidelist(dirty_rects) >= 0:
+                    self.screen.blit(sprite, rect)
+        self.screen.set_clip(None)
+        return dirty_rects